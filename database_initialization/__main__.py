@@ -1,5 +1,7 @@
 """
 Entry point for db initializing and sql generation.
+
+`python -m database_initialization upgrade` upgrades tables of the existing database [`sql/upgrade.sql`].
 """
 
 import asyncio
@@ -15,10 +17,13 @@ sys.path.append(pathlib.Path(__file__).parent.parent.__str__())
 if __name__ == '__main__':
     from database_initialization.init_db import main
 
+    to_upgrade_tables = 'upgrade' in sys.argv[1:]
+
     asyncio.run(
         main(
             to_drop_tables=False,
             to_create_tables=False,
-            to_dump_sql_of_tables_creation=True
+            to_upgrade_tables=to_upgrade_tables,
+            to_dump_sql_of_tables_creation=not to_upgrade_tables
         )
     )
@@ -5,20 +5,24 @@ Initializes database.
 .. func:: dump_in_file_sql_of_tables_creation(metadata: MetaData) -> None
 .. async:: drop_tables(engine: AsyncEngine, metadata: MetaData) -> None
 .. async:: create_tables(engine: AsyncEngine, metadata: MetaData) -> None
+.. async:: upgrade_tables(engine: AsyncEngine) -> None
 .. async:: main(*, to_drop_tables: bool = False, to_create_tables: bool = False,
-        to_dump_sql_of_tables_creation: bool = True) -> None
+        to_upgrade_tables: bool = False, to_dump_sql_of_tables_creation: bool = True) -> None
 
 .. const:: DIRECTORY_NAME_FOR_SQL_DUMP
 .. const:: FILE_NAME_FOR_SQL_DUMP
+.. const:: FILE_NAME_OF_SQL_UPGRADE
 """
 
 import datetime
 import logging
 import pathlib
+import re
 
 from sqlalchemy import (
     MetaData,
-    Table
+    Table,
+    text
 )
 from sqlalchemy.schema import CreateTable
 from sqlalchemy.ext.asyncio import AsyncEngine
@@ -39,6 +43,8 @@ logger = logging.getLogger(__name__)
 # CONSTANTS FOR SQL DUMP -----------------------------------------------------------------------------------------------
 DIRECTORY_NAME_FOR_SQL_DUMP = 'sql'
 FILE_NAME_FOR_SQL_DUMP = 'init.sql'
+# idempotent upgrade of the existing database [written by hand, lives next to the dump]
+FILE_NAME_OF_SQL_UPGRADE = 'upgrade.sql'
 # ----------------------------------------------------------------------------------------------------------------------
 
 
@@ -146,20 +152,48 @@ async def create_tables(engine: AsyncEngine, metadata: MetaData) -> None:
     logger.info('All tables have been created.')
 
 
+async def upgrade_tables(engine: AsyncEngine) -> None:
+    """
+    Upgrade tables of the existing database by the sql upgrade file.
+    Statements are idempotent, so it might be run on any version of the database.
+
+    :param engine: db engine
+    :type engine: AsyncEngine
+
+    :return: None
+    :rtype: None
+    """
+
+    filepath = pathlib.Path(__file__).parent / DIRECTORY_NAME_FOR_SQL_DUMP / FILE_NAME_OF_SQL_UPGRADE
+    sql_upgrade = re.sub(r'/\*.*?\*/', '', filepath.read_text(), flags=re.DOTALL)
+    # driver executes one statement per call
+    statements = [statement.strip() for statement in sql_upgrade.split(';') if statement.strip()]
+
+    async with engine.begin() as connection:
+        for statement in statements:
+            await connection.execute(text(statement))
+
+    logger.info(f'Tables have been upgraded by {filepath}')
+
+
 async def main(*,
                to_drop_tables: bool = False,
                to_create_tables: bool = False,
+               to_upgrade_tables: bool = False,
                to_dump_sql_of_tables_creation: bool = True
                ) -> None:
     """
     Main coro, where might be executed:
         * dropping and creating of all tables;
+        * upgrading of the existing tables;
         * dumping sql of tables creation.
 
     :keyword to_drop_tables: to drop all tables
     :type to_drop_tables: bool
     :keyword to_create_tables: to create all tables
     :type to_create_tables: bool
+    :keyword to_upgrade_tables: to upgrade existing tables [add new columns and tables]
+    :type to_upgrade_tables: bool
     :keyword to_dump_sql_of_tables_creation: to dump sql code of tables creation
     :type to_dump_sql_of_tables_creation: bool
 
@@ -175,6 +209,8 @@ async def main(*,
             await drop_tables(engine, metadata)
         if to_create_tables:
             await create_tables(engine, metadata)
+    if to_upgrade_tables:
+        await upgrade_tables(engine)
 
     if to_dump_sql_of_tables_creation:
         dump_in_file_sql_of_tables_creation(engine, metadata)
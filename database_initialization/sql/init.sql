@@ -1,14 +1,27 @@
 /*
 	This file is generated by `database_initialization` package.
-	Version of the `models.py`: 1.0
-	Time of the generation [UTC]: 2021-04-29 14:34:07
+	Version of the `models.py`: 1.1
+	Time of the generation [UTC]: 2026-10-18 23:16:54
 */
 
 	/* The start of sql code */
 
+CREATE TABLE broadcasts (
+	id BIGSERIAL NOT NULL, 
+	message VARCHAR NOT NULL, 
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	finished_at TIMESTAMP WITHOUT TIME ZONE, 
+	last_user_id BIGINT DEFAULT '0', 
+	sent_count INTEGER DEFAULT '0', 
+	failed_count INTEGER DEFAULT '0', 
+	blocked_count INTEGER DEFAULT '0', 
+	PRIMARY KEY (id)
+);
+
 CREATE TABLE users (
 	id BIGINT NOT NULL, 
 	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP, 
+	is_blocked BOOLEAN DEFAULT 'false', 
 	PRIMARY KEY (id)
 );
 
@@ -0,0 +1,21 @@
+/*
+	Upgrades tables of the existing database to the current `models.py` [written by hand, idempotent].
+	Run it by `python -m database_initialization upgrade` or by `psql -f upgrade.sql`.
+	Tables that are missing entirely are created by `init.sql`.
+*/
+
+	/* Version of the `models.py`: 1.0 -> 1.1 [broadcasts] */
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS is_blocked BOOLEAN DEFAULT 'false';
+
+CREATE TABLE IF NOT EXISTS broadcasts (
+	id BIGSERIAL NOT NULL,
+	message VARCHAR NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+	finished_at TIMESTAMP WITHOUT TIME ZONE,
+	last_user_id BIGINT DEFAULT '0',
+	sent_count INTEGER DEFAULT '0',
+	failed_count INTEGER DEFAULT '0',
+	blocked_count INTEGER DEFAULT '0',
+	PRIMARY KEY (id)
+);
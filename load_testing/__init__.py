@@ -0,0 +1,3 @@
+"""
+Contains tools for the bot load testing [fake Bot API server, benchmarks].
+"""
@@ -0,0 +1,168 @@
+"""
+Entry point for load testing.
+
+Usage:
+    python load_testing webhook --updates 1000 --concurrency 50
+    python load_testing flows --users 1000 --concurrency 200 --latency 0.05 --retry-after-probability 0.01
+    python load_testing serialization --iterations 10000 --repeats 5
+    python load_testing throttling --users 500 --messages 20 --interval 0.05 --rate 0.5
+    python load_testing throttling-overhead --messages 2000 --workers 4
+    python load_testing throttling-mixed --users 1000 --flooders 10 --duration 10 --rate 0.2
+    python load_testing callback-storm --users 50 --taps 20 --interval 0.05 --query-latency 0.02
+    python load_testing validation --iterations 10000 --repeats 5
+    python load_testing url-extraction --fuzz-messages 10000 --repeats 3 --seed 0
+    python load_testing routing --handlers-counts 10 45 200 --updates 1000 --repeats 3
+"""
+
+import argparse
+import asyncio
+import logging
+import pathlib
+import sys
+
+
+# add package to global path -------------------------------------------------------------------------------------------
+sys.path.append(pathlib.Path(__file__).parent.parent.__str__())
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Bot load testing')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    webhook_parser = subparsers.add_parser('webhook', help='post synthetic updates to the bot webhook')
+    webhook_parser.add_argument('--updates', type=int, default=1000)
+    webhook_parser.add_argument('--concurrency', type=int, default=50)
+    webhook_parser.add_argument('--fake-api-host', default='127.0.0.1')
+    webhook_parser.add_argument('--fake-api-port', type=int, default=8081)
+    webhook_parser.add_argument('--startup-timeout', type=float, default=60)
+    webhook_parser.add_argument('--answer-timeout', type=float, default=30)
+
+    flows_parser = subparsers.add_parser('flows', help='drive flows of the virtual users [bot polls fake Bot API]')
+    flows_parser.add_argument('--users', type=int, default=1000)
+    flows_parser.add_argument('--concurrency', type=int, default=200)
+    flows_parser.add_argument('--quick-adds', type=int, default=3)
+    flows_parser.add_argument('--think-time', type=float, default=.5, help='pause before every step in seconds')
+    flows_parser.add_argument('--fake-api-host', default='127.0.0.1')
+    flows_parser.add_argument('--fake-api-port', type=int, default=8081)
+    flows_parser.add_argument('--latency', type=float, default=0, help='injected Bot API latency in seconds')
+    flows_parser.add_argument('--retry-after-probability', type=float, default=0)
+    flows_parser.add_argument('--startup-timeout', type=float, default=60)
+    flows_parser.add_argument('--answer-timeout', type=float, default=30)
+
+    serialization_parser = subparsers.add_parser('serialization', help='measure serializers of the FSM data')
+    serialization_parser.add_argument('--iterations', type=int, default=10_000)
+    serialization_parser.add_argument('--repeats', type=int, default=5)
+
+    throttling_parser = subparsers.add_parser('throttling', help='flood the in-process dispatcher with throttling')
+    throttling_parser.add_argument('--users', type=int, default=500)
+    throttling_parser.add_argument('--messages', type=int, default=20)
+    throttling_parser.add_argument('--interval', type=float, default=.05, help='time between messages of the user')
+    throttling_parser.add_argument('--rate', type=float, default=.5, help='throttling rate limit in seconds')
+
+    overhead_parser = subparsers.add_parser('throttling-overhead', help='measure throttlers against redis')
+    overhead_parser.add_argument('--messages', type=int, default=2000)
+    overhead_parser.add_argument('--workers', type=int, default=4, help='workers that throttle one user at once')
+
+    mixed_parser = subparsers.add_parser('throttling-mixed', help='throttle regular users and flooders by redis')
+    mixed_parser.add_argument('--users', type=int, default=1000, help='regular users')
+    mixed_parser.add_argument('--flooders', type=int, default=10)
+    mixed_parser.add_argument('--duration', type=float, default=10, help='time in seconds users send messages')
+    mixed_parser.add_argument('--rate', type=float, default=.2, help='throttling rate limit in seconds')
+
+    storm_parser = subparsers.add_parser('callback-storm', help='tap inline buttons of the in-process dispatcher')
+    storm_parser.add_argument('--users', type=int, default=50, help='tapping users per action')
+    storm_parser.add_argument('--taps', type=int, default=20, help='taps of the button per user')
+    storm_parser.add_argument('--interval', type=float, default=.05, help='time between taps of the user')
+    storm_parser.add_argument('--query-latency', type=float, default=.02, help='injected SQL query latency')
+
+    validation_parser = subparsers.add_parser('validation', help='measure validators of the user input')
+    validation_parser.add_argument('--iterations', type=int, default=10_000)
+    validation_parser.add_argument('--repeats', type=int, default=5)
+
+    urls_parser = subparsers.add_parser('url-extraction', help='fuzz links extractor, measure it against regexp')
+    urls_parser.add_argument('--fuzz-messages', type=int, default=10_000)
+    urls_parser.add_argument('--repeats', type=int, default=3)
+    urls_parser.add_argument('--seed', type=int, default=0)
+
+    routing_parser = subparsers.add_parser('routing', help='dispatch text messages by the in-process dispatcher')
+    routing_parser.add_argument('--handlers-counts', type=int, nargs='+', default=[10, 45, 200])
+    routing_parser.add_argument('--updates', type=int, default=1000)
+    routing_parser.add_argument('--repeats', type=int, default=3)
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    from load_testing.callback_storm_benchmark import run_callback_storm_benchmark
+    from load_testing.routing_benchmark import run_routing_benchmark
+    from load_testing.serialization_benchmark import run_serialization_benchmark
+    from load_testing.throttling_benchmark import (
+        run_throttling_benchmark,
+        run_throttling_mixed_benchmark,
+        run_throttling_overhead_benchmark
+    )
+    from load_testing.url_extraction_benchmark import run_url_extraction_benchmark
+    from load_testing.validation_benchmark import run_validation_benchmark
+    from load_testing.virtual_users import run_flows_benchmark
+    from load_testing.webhook_benchmark import run_webhook_benchmark
+
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO
+    )
+
+    args = parse_args()
+
+    if args.benchmark == 'webhook':
+        report = asyncio.run(
+            run_webhook_benchmark(
+                updates=args.updates,
+                concurrency=args.concurrency,
+                fake_api_host=args.fake_api_host,
+                fake_api_port=args.fake_api_port,
+                startup_timeout=args.startup_timeout,
+                answer_timeout=args.answer_timeout
+            )
+        )
+    elif args.benchmark == 'serialization':
+        report = run_serialization_benchmark(iterations=args.iterations, repeats=args.repeats)
+    elif args.benchmark == 'throttling':
+        report = run_throttling_benchmark(
+            users=args.users, messages=args.messages, interval=args.interval, rate=args.rate
+        )
+    elif args.benchmark == 'throttling-overhead':
+        report = run_throttling_overhead_benchmark(messages=args.messages, workers=args.workers)
+    elif args.benchmark == 'callback-storm':
+        report = run_callback_storm_benchmark(
+            users=args.users, taps=args.taps, interval=args.interval, query_latency=args.query_latency
+        )
+    elif args.benchmark == 'throttling-mixed':
+        report = run_throttling_mixed_benchmark(
+            users=args.users, flooders=args.flooders, duration=args.duration, rate=args.rate
+        )
+    elif args.benchmark == 'validation':
+        report = run_validation_benchmark(iterations=args.iterations, repeats=args.repeats)
+    elif args.benchmark == 'routing':
+        report = run_routing_benchmark(
+            handlers_counts=args.handlers_counts, updates=args.updates, repeats=args.repeats
+        )
+    elif args.benchmark == 'url-extraction':
+        report = run_url_extraction_benchmark(fuzz_messages=args.fuzz_messages, repeats=args.repeats, seed=args.seed)
+    else:
+        report = asyncio.run(
+            run_flows_benchmark(
+                users=args.users,
+                concurrency=args.concurrency,
+                quick_adds=args.quick_adds,
+                think_time=args.think_time,
+                fake_api_host=args.fake_api_host,
+                fake_api_port=args.fake_api_port,
+                latency=args.latency,
+                retry_after_probability=args.retry_after_probability,
+                startup_timeout=args.startup_timeout,
+                answer_timeout=args.answer_timeout
+            )
+        )
+
+    print(report)
@@ -0,0 +1,169 @@
+"""
+Benchmarks throttling of the inline keyboards taps under tap storms.
+
+Virtual users tap the same button faster than the rate limit of its action to the in-process dispatcher
+[in-memory FSM storage, Bot API requests are answered in-process]. Handlers of the actions make as many
+SQL queries as the real ones [`fetch_one_link` with rubric, `fetch_one_rubric` with links, `delete_one_link`]
+with the injected latency, queries are counted as db engine counts them. Measured by actions:
+    * handled, coalesced and throttled taps;
+    * executed SQL queries [saved ones - compared with the baseline];
+    * answered callback queries.
+Throttling middleware is compared with the baseline that does not throttle taps.
+
+.. def:: run_callback_storm_benchmark(*, users: int, taps: int, interval: float, query_latency: float) -> str
+
+.. data:: ACTIONS
+"""
+
+import asyncio
+import time
+from typing import (
+    Awaitable,
+    Callable
+)
+
+from aiogram import (
+    Bot,
+    Dispatcher,
+    types
+)
+from aiogram.utils.callback_data import CallbackData
+
+from tg_note_bot.middlewares.throttling import (
+    ThrottlingMiddleware,
+    rate_limit
+)
+from tg_note_bot.settings import (
+    THROTTLING_RATE_LIMIT_IN_SECONDS,
+    THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_CALLBACK,
+    THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK,
+    THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_RUBRIC_LINKS_CALLBACK
+)
+from tg_note_bot.storages import MemoryStorage
+from tg_note_bot.utils.metrics import metrics
+
+from .throttling_benchmark import _InProcessBot
+from .updates import (
+    FIRST_SYNTHETIC_USER_ID,
+    make_callback_query,
+    make_text_message
+)
+
+
+__all__ = ['run_callback_storm_benchmark', 'ACTIONS']
+
+
+BENCHMARK_CB = CallbackData('benchmark_data', 'action', 'id')
+
+# action: (rate limit in seconds, SQL queries per tap)
+ACTIONS: dict[str, tuple[float, int]] = {
+    'LINK_DUMPING': (THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_CALLBACK, 1),
+    'LINK_BY_RUBRIC_SELECTING': (THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_RUBRIC_LINKS_CALLBACK, 2),
+    'LINK_DELETING': (THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK, 1)
+}
+
+
+class _UnthrottledTapsMiddleware(ThrottlingMiddleware):
+    """ Baseline: taps are not throttled and not coalesced """
+
+    async def on_process_callback_query(self, call: types.CallbackQuery, data: dict):
+        pass
+
+    async def on_post_process_callback_query(self, call: types.CallbackQuery, results: list, data: dict):
+        pass
+
+
+def _make_action_handler(action: str, rate: float, queries: int,
+                         query_latency: float) -> Callable[[types.CallbackQuery, dict], Awaitable[None]]:
+    async def handle_tap(call: types.CallbackQuery, callback_data: dict) -> None:
+        for _ in range(queries):
+            await asyncio.sleep(query_latency)
+            metrics.increment('db_queries_by_flow', action)
+        metrics.increment('callback_taps_handled', action)
+
+        await call.answer()
+
+    handle_tap.__name__ = f'handle_{action.lower()}'
+    return rate_limit(rate)(handle_tap)
+
+
+async def _run_storm(middleware: ThrottlingMiddleware, *, users: int, taps: int, interval: float,
+                     query_latency: float) -> str:
+    metrics.reset()
+    bot = _InProcessBot(token='123456:benchmark')
+    dp = Dispatcher(bot, storage=MemoryStorage(expired_state='Expired:expired', expired_state_ttl=60))
+    for action, (rate, queries) in ACTIONS.items():
+        dp.register_callback_query_handler(
+            _make_action_handler(action, rate, queries, query_latency), BENCHMARK_CB.filter(action=action)
+        )
+    dp.middleware.setup(middleware)
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+
+    async def tap_storm(user_id: int, action: str) -> list[asyncio.Task]:
+        # inline keyboard of the user is one message, the same button is tapped
+        message = make_text_message(1, user_id, '❔ Choose one of the list below:')
+        tasks = []
+        for number in range(taps):
+            callback_query = make_callback_query(
+                user_id * taps + number, user_id, message, BENCHMARK_CB.new(action=action, id=1)
+            )
+            update = types.Update(update_id=user_id * taps + number, callback_query=callback_query)
+            tasks.append(asyncio.create_task(dp.process_updates([update])))
+            await asyncio.sleep(interval)
+
+        return tasks
+
+    started_at = time.perf_counter()
+    storms = [
+        tap_storm(FIRST_SYNTHETIC_USER_ID + number * len(ACTIONS) + action_number, action)
+        for number in range(users)
+        for action_number, action in enumerate(ACTIONS)
+    ]
+    users_tasks = await asyncio.gather(*storms)
+    await asyncio.gather(*[task for user_tasks in users_tasks for task in user_tasks])
+    elapsed = time.perf_counter() - started_at
+
+    handled_taps = metrics.get_labeled('callback_taps_handled')
+    queries = metrics.get_labeled('db_queries_by_flow')
+    lines = [f'{type(middleware).__name__}:']
+    for action, (rate, _) in ACTIONS.items():
+        lines.append(f'    {action} [rate limit {rate} s]: handled taps {handled_taps.get(action, 0)}, '
+                     f'SQL queries {queries.get(action, 0)}')
+    lines.extend([
+        f'    taps coalesced: {metrics.get("callback_taps_coalesced")}, '
+        f'throttled: {metrics.get("callback_taps_throttled")}',
+        f'    SQL queries: {sum(queries.values())}',
+        f'    answered callback queries: {sum(bot.sent_texts.values())}',
+        f'    until all is done: {elapsed:.2f} s'
+    ])
+
+    return '\n'.join(lines)
+
+
+def run_callback_storm_benchmark(*, users: int, taps: int, interval: float, query_latency: float) -> str:
+    """
+    Run the benchmark.
+
+    :keyword users: quantity of the tapping users per action
+    :type users: int
+    :keyword taps: taps of the button per user
+    :type taps: int
+    :keyword interval: time in seconds between taps of the user
+    :type interval: float
+    :keyword query_latency: injected latency in seconds of the SQL query
+    :type query_latency: float
+
+    :return: formatted report
+    :rtype: str
+    """
+
+    reports = [f'Tap storms [{users} users per action x {taps} taps every {interval} s, '
+               f'SQL query latency {query_latency} s]:']
+    for middleware_class in (_UnthrottledTapsMiddleware, ThrottlingMiddleware):
+        middleware = middleware_class(limit=THROTTLING_RATE_LIMIT_IN_SECONDS,
+                                      callback_limit=THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_CALLBACK)
+        reports.append(asyncio.run(_run_storm(middleware, users=users, taps=taps, interval=interval,
+                                              query_latency=query_latency)))
+
+    return '\n'.join(reports)
@@ -0,0 +1,305 @@
+"""
+Implements fake Telegram Bot API server.
+
+Bot is pointed to the fake server by `BOT_API_SERVER_URL` setting.
+Server answers on the Bot API methods with minimal valid results and records every call,
+so benchmarks can measure when bot has answered on the synthetic update.
+Updates are delivered to the bot by long polling [`getUpdates`] or posted to the webhook registered by the bot.
+
+Latency of the answers and `RetryAfter` errors [429] might be injected.
+
+.. class:: RecordedCall
+.. class:: FakeBotAPI
+"""
+
+import asyncio
+import collections
+import itertools
+import json
+import logging
+import random
+import time
+from typing import (
+    Any,
+    Callable,
+    NamedTuple,
+    Optional
+)
+
+from aiohttp import web
+
+
+__all__ = ['RecordedCall', 'FakeBotAPI', 'ANSWER_METHODS']
+
+
+logger = logging.getLogger(__name__)
+
+
+# methods that show something to the user [lowercase]
+ANSWER_METHODS = frozenset({'sendmessage', 'sendsticker', 'editmessagetext', 'editmessagereplymarkup'})
+# methods that are answered without injected latency and errors [lowercase]
+SERVICE_METHODS = frozenset({'getme', 'getupdates', 'setwebhook', 'deletewebhook', 'setmycommands'})
+
+
+class RecordedCall(NamedTuple):
+    """ Bot API call received by the fake server """
+
+    method: str
+    data: dict[str, Any]
+    received_at: float
+    result: Any = None
+
+    @property
+    def text(self) -> str:
+        """ Text of the sent or edited message """
+        return str(self.data.get('text', ''))
+
+    @property
+    def inline_keyboard(self) -> list[list[dict[str, Any]]]:
+        """ Inline keyboard of the sent or edited message [empty if there is no] """
+        reply_markup = self.data.get('reply_markup')
+        return reply_markup.get('inline_keyboard', []) if isinstance(reply_markup, dict) else []
+
+
+class FakeBotAPI:
+    """
+    Implements fake Bot API server.
+
+    Webhook registered by the bot [with secret token] is kept, so synthetic updates might be posted to the bot.
+    """
+
+    BOT_ID = 1
+    BOT_USERNAME = 'fake_note_bot'
+
+    def __init__(self, *, latency: float = 0.0, retry_after_probability: float = 0.0, retry_after: int = 1,
+                 seed: Optional[int] = None):
+        """
+        :keyword latency: time in seconds before answer on every non-service method
+        :type latency: float
+        :keyword retry_after_probability: probability to answer with `RetryAfter` error on non-service method
+        :type retry_after_probability: float
+        :keyword retry_after: time in seconds passed in `RetryAfter` error
+        :type retry_after: int
+        :keyword seed: seed of the errors injecting
+        :type seed: Optional[int]
+        """
+
+        self.latency = latency
+        self.retry_after_probability = retry_after_probability
+        self.retry_after = retry_after
+
+        self.calls: list[RecordedCall] = []
+        self.rejected_calls = 0
+        self.webhook_url: Optional[str] = None
+        self.webhook_secret_token: Optional[str] = None
+        self.webhook_is_set = asyncio.Event()
+        self.polling_is_started = asyncio.Event()
+
+        self._random = random.Random(seed)
+        self._message_ids = itertools.count(1)
+        self._update_ids = itertools.count(1)
+        self._updates: collections.deque[dict[str, Any]] = collections.deque()
+        self._new_updates = asyncio.Event()
+        # (method, chat id): futures of the waiters
+        self._waiters: collections.defaultdict[tuple[str, int], list[asyncio.Future]] = (
+            collections.defaultdict(list)
+        )
+        # chat id: (predicate, future) of the waiters of the answers
+        self._answer_waiters: collections.defaultdict[
+            int, list[tuple[Callable[[RecordedCall], bool], asyncio.Future]]
+        ] = collections.defaultdict(list)
+        self._runner: Optional[web.AppRunner] = None
+
+    # server -----------------------------------------------------------------------------------------------------------
+    def create_web_app(self) -> web.Application:
+        """ Create web application that handles Bot API requests """
+        app = web.Application()
+        app.router.add_route('POST', '/bot{token}/{method}', self._handle)
+        app.router.add_route('GET', '/bot{token}/{method}', self._handle)
+
+        return app
+
+    async def start(self, host: str, port: int) -> None:
+        """ Start the server """
+        self._runner = web.AppRunner(self.create_web_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+        logger.info(f'Fake Bot API server is running on <http://{host}:{port}>')
+
+    async def stop(self) -> None:
+        """ Stop the server """
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        data = {key: self._parse_value(value) for key, value in (await request.post()).items()}
+
+        if method.lower() == 'getupdates':
+            return web.json_response({'ok': True, 'result': await self._get_updates(data)})
+
+        if method.lower() not in SERVICE_METHODS:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            if self.retry_after_probability and self._random.random() < self.retry_after_probability:
+                self.rejected_calls += 1
+                return web.json_response(
+                    {
+                        'ok': False,
+                        'error_code': 429,
+                        'description': f'Too Many Requests: retry after {self.retry_after}',
+                        'parameters': {'retry_after': self.retry_after}
+                    },
+                    status=429
+                )
+
+        result = self.make_result(method, data)
+        call = RecordedCall(method, data, time.perf_counter(), result)
+        self.calls.append(call)
+        self._notify_waiters(call)
+
+        return web.json_response({'ok': True, 'result': result})
+
+    @staticmethod
+    def _parse_value(value: Any) -> Any:
+        """ Values are passed as form fields [complex values - as JSON] """
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except ValueError:
+                return value
+
+        return value
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # Bot API methods --------------------------------------------------------------------------------------------------
+    def make_result(self, method: str, data: dict[str, Any]) -> Any:
+        """ Return result of the Bot API method """
+        method = method.lower()
+
+        if method == 'getme':
+            return {
+                'id': self.BOT_ID, 'is_bot': True, 'first_name': 'Fake Note Bot', 'username': self.BOT_USERNAME
+            }
+        if method == 'setwebhook':
+            self.webhook_url = data.get('url')
+            self.webhook_secret_token = data.get('secret_token')
+            self.webhook_is_set.set()
+            return True
+        if method in ANSWER_METHODS:
+            return self._make_message(data)
+
+        return True
+
+    def _make_message(self, data: dict[str, Any]) -> dict[str, Any]:
+        return {
+            'message_id': data.get('message_id') or next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': data.get('chat_id'), 'type': 'private'},
+            'from': {'id': self.BOT_ID, 'is_bot': True, 'first_name': 'Fake Note Bot'},
+            'text': str(data.get('text', ''))
+        }
+
+    async def _get_updates(self, data: dict[str, Any]) -> list[dict[str, Any]]:
+        """ Return updates starting from offset [confirmed updates are forgotten], wait for them up to timeout """
+        self.polling_is_started.set()
+
+        offset = data.get('offset') or 0
+        limit = data.get('limit') or 100
+        timeout = data.get('timeout') or 0
+
+        while self._updates and self._updates[0]['update_id'] < offset:
+            self._updates.popleft()
+
+        if not self._updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        return list(itertools.islice(self._updates, limit))
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # updates ----------------------------------------------------------------------------------------------------------
+    def push_update(self, update: dict[str, Any]) -> int:
+        """
+        Queue update for the long polling [update id is assigned].
+
+        :param update: update without id
+        :type update: dict
+
+        :return: update id
+        :rtype: int
+        """
+
+        update_id = next(self._update_ids)
+        self._updates.append({'update_id': update_id, **update})
+        self._new_updates.set()
+
+        return update_id
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # waiting of the bot answers ---------------------------------------------------------------------------------------
+    def wait_for_call(self, method: str, chat_id: int) -> asyncio.Future:
+        """
+        Return future that is resolved with the next call of the method for the chat.
+
+        :param method: Bot API method
+        :type method: str
+        :param chat_id: chat id that is passed in call
+        :type chat_id: int
+
+        :return: future with the recorded call
+        :rtype: asyncio.Future
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[method.lower(), chat_id].append(future)
+
+        return future
+
+    def wait_for_answer(self, chat_id: int, predicate: Callable[[RecordedCall], bool]) -> asyncio.Future:
+        """
+        Return future that is resolved with the next answer [sent or edited message] in the chat
+        that satisfies the predicate.
+
+        :param chat_id: chat id
+        :type chat_id: int
+        :param predicate: check of the answer
+        :type predicate: Callable[[RecordedCall], bool]
+
+        :return: future with the recorded call
+        :rtype: asyncio.Future
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self._answer_waiters[chat_id].append((predicate, future))
+
+        return future
+
+    def _notify_waiters(self, call: RecordedCall) -> None:
+        chat_id = call.data.get('chat_id')
+        if chat_id is None:
+            return
+
+        waiters = self._waiters.pop((call.method.lower(), chat_id), [])
+        for future in waiters:
+            if not future.done():
+                future.set_result(call)
+
+        if call.method.lower() in ANSWER_METHODS and chat_id in self._answer_waiters:
+            answer_waiters = self._answer_waiters[chat_id]
+            for waiter in list(answer_waiters):
+                predicate, future = waiter
+                if future.done():
+                    answer_waiters.remove(waiter)
+                elif predicate(call):
+                    future.set_result(call)
+                    answer_waiters.remove(waiter)
+
+            if not answer_waiters:
+                del self._answer_waiters[chat_id]
+    # ------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,61 @@
+"""
+Contains helpers for the load testing reports.
+
+.. def:: percentile(values: Sequence[float], percent: float) -> float
+.. def:: format_latency_report(title: str, latencies: Sequence[float], elapsed: float) -> str
+"""
+
+import math
+from typing import Sequence
+
+
+__all__ = ['percentile', 'format_latency_report']
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """
+    Return percentile of the values [nearest-rank method].
+
+    :param values: measured values
+    :type values: Sequence[float]
+    :param percent: percent in range (0, 100]
+    :type percent: float
+
+    :return: percentile or NaN if there are no values
+    :rtype: float
+    """
+
+    if not values:
+        return math.nan
+
+    ordered_values = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered_values)), 1)
+
+    return ordered_values[rank - 1]
+
+
+def format_latency_report(title: str, latencies: Sequence[float], elapsed: float) -> str:
+    """
+    Format report with latency percentiles [in milliseconds] and throughput.
+
+    :param title: title of the report
+    :type title: str
+    :param latencies: measured latencies in seconds
+    :type latencies: Sequence[float]
+    :param elapsed: duration of the whole run in seconds
+    :type elapsed: float
+
+    :return: formatted report
+    :rtype: str
+    """
+
+    throughput = len(latencies) / elapsed if elapsed else math.nan
+
+    return '\n'.join([
+        f'{title}:',
+        f'    count: {len(latencies)}',
+        f'    p50: {percentile(latencies, 50) * 1000:.1f} ms',
+        f'    p95: {percentile(latencies, 95) * 1000:.1f} ms',
+        f'    p99: {percentile(latencies, 99) * 1000:.1f} ms',
+        f'    throughput: {throughput:.1f} per second'
+    ])
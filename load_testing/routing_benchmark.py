@@ -0,0 +1,135 @@
+"""
+Benchmarks routing of the messages by the exact text against the linear walk of the handlers.
+
+In-process dispatcher [in-memory FSM storage] has the handlers of the reply keyboard buttons [`text=` filters,
+a part of them is in the states of the conversations] and the handler of the missed text [`state='*'`]
+as the bot has. Updates are processed in batches [every update in its own task as polling processes them].
+Messages:
+    * the first button;
+    * the last button;
+    * missed text [no one button].
+Measured by quantity of the handlers:
+    * dispatch time per update [best of the repeats] of the `Dispatcher` [baseline] and `TextRoutingDispatcher`;
+    * the same handler is called by both dispatchers.
+
+.. def:: run_routing_benchmark(*, handlers_counts: list[int], updates: int, repeats: int) -> str
+"""
+
+import asyncio
+import time
+from collections import Counter
+from typing import Callable
+
+from aiogram import (
+    Bot,
+    Dispatcher,
+    types
+)
+
+from tg_note_bot.storages import MemoryStorage
+from tg_note_bot.utils.text_routing import TextRoutingDispatcher
+
+from .throttling_benchmark import _InProcessBot
+from .updates import (
+    FIRST_SYNTHETIC_USER_ID,
+    make_text_message
+)
+
+
+__all__ = ['run_routing_benchmark']
+
+
+# every n-th button handler is registered in the state of the conversation
+STATE_HANDLERS_EVERY = 5
+
+
+def _make_handler(name: str, calls: Counter) -> Callable:
+    async def handle(message: types.Message) -> None:
+        calls[name] += 1
+
+    handle.__name__ = name
+    return handle
+
+
+def _create_dispatcher(dispatcher_class: type[Dispatcher], handlers_count: int, calls: Counter) -> Dispatcher:
+    bot = _InProcessBot(token='123456:benchmark')
+    dp = dispatcher_class(bot, storage=MemoryStorage(expired_state='Expired:expired', expired_state_ttl=60))
+    for number in range(handlers_count):
+        handler = _make_handler(f'button_{number}', calls)
+        if number % STATE_HANDLERS_EVERY:
+            dp.register_message_handler(handler, text=f'🔘 button {number}')
+        else:
+            dp.register_message_handler(handler, text=f'🔘 button {number}', state=f'Conversation:step_{number}')
+    dp.register_message_handler(_make_handler('catch_missed_text_message', calls), state='*')
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+
+    return dp
+
+
+async def _measure(dp: Dispatcher, text: str, updates: int, repeats: int) -> float:
+    """ Return the best time in seconds of one update dispatching """
+    batch = [
+        types.Update(update_id=number, message=make_text_message(number, FIRST_SYNTHETIC_USER_ID + number, text))
+        for number in range(updates)
+    ]
+    best_elapsed = float('inf')
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        await dp.process_updates(batch)
+        best_elapsed = min(best_elapsed, time.perf_counter() - started_at)
+
+    return best_elapsed / updates
+
+
+async def _run(handlers_count: int, updates: int, repeats: int) -> list[str]:
+    last_button = max(number for number in range(handlers_count) if number % STATE_HANDLERS_EVERY)
+    messages = {
+        'first button': '🔘 button 1',
+        'last button': f'🔘 button {last_button}',
+        'missed text': 'Some text that is not a button'
+    }
+
+    lines = [f'{handlers_count} button handlers:']
+    for message_name, text in messages.items():
+        times, called_handlers = [], []
+        for dispatcher_class in (Dispatcher, TextRoutingDispatcher):
+            calls = Counter()
+            dp = _create_dispatcher(dispatcher_class, handlers_count, calls)
+            times.append(await _measure(dp, text, updates, repeats))
+            called_handlers.append(set(calls))
+
+        if called_handlers[0] != called_handlers[1]:
+            raise RuntimeError(f'Message <{message_name}> is handled by different handlers: {called_handlers}')
+
+        linear_time, routed_time = times
+        lines.append(
+            f'    {message_name} [{", ".join(called_handlers[0])}]: {linear_time * 1_000_000:.1f} us | '
+            f'{routed_time * 1_000_000:.1f} us | x{linear_time / routed_time:.1f}'
+        )
+
+    return lines
+
+
+def run_routing_benchmark(*, handlers_counts: list[int], updates: int, repeats: int) -> str:
+    """
+    Run the benchmark.
+
+    :keyword handlers_counts: quantities of the button handlers
+    :type handlers_counts: list[int]
+    :keyword updates: updates per measurement
+    :type updates: int
+    :keyword repeats: measurements [the best one is taken]
+    :type repeats: int
+
+    :return: formatted report
+    :rtype: str
+
+    :raises RuntimeError: raised if dispatchers call different handlers
+    """
+
+    lines = ['Dispatching of the text messages [linear walk us | routing us | speedup]:']
+    for handlers_count in handlers_counts:
+        lines.extend(asyncio.run(_run(handlers_count, updates, repeats)))
+
+    return '\n'.join(lines)
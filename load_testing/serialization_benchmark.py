@@ -0,0 +1,116 @@
+"""
+Benchmarks serializers of the FSM data.
+
+Realistic payloads of the conversations [data at the last step of the flow] and throttling bucket
+are serialized by every available serializer and by the format of `RedisStorage2` [baseline].
+Measured:
+    * bytes per key;
+    * encode and decode CPU time per value [best of the repeats].
+
+.. def:: run_serialization_benchmark(*, iterations: int, repeats: int) -> str
+
+.. data:: PAYLOADS
+"""
+
+import json
+import time
+from typing import (
+    Any,
+    Callable
+)
+
+from tg_note_bot.storages.serializers import (
+    SERIALIZERS,
+    get_serializer
+)
+
+
+__all__ = ['run_serialization_benchmark', 'PAYLOADS']
+
+
+# payload name: FSM data
+PAYLOADS: dict[str, dict[str, Any]] = {
+    'LinkAddingStatesGroup': {
+        'url': 'https://docs.python.org/3/library/asyncio-task.html#asyncio.wait_for',
+        'description': 'Таймауты корутин - wait_for и shield 🐍',
+        'rubric_id': 1_204_518
+    },
+    'LinkAddingStatesGroup [no description and rubric]': {
+        'url': 'https://github.com/aiogram/aiogram',
+        'description': None,
+        'rubric_id': None
+    },
+    'RubricAddingStatesGroup': {
+        'name': 'Python 🐍',
+        'description': 'Articles about asyncio, typing and packaging'
+    },
+    'RubricDeletingStatesGroup': {
+        'id': 1_204_518
+    },
+    'throttling bucket': {
+        'antiflood__add_link__handle_link_url': {
+            'result': True, 'rate_limit': 0.2, 'called_at': 1_618_500_000.123456, 'delta': 1.5, 'exceeded': 1
+        }
+    }
+}
+
+# name: (dumps, loads)
+Codec = tuple[Callable[[Any], bytes], Callable[[bytes], Any]]
+
+
+def _get_codecs() -> dict[str, Codec]:
+    codecs: dict[str, Codec] = {
+        'RedisStorage2 json [baseline]': (lambda value: json.dumps(value).encode(), json.loads)
+    }
+    for name in SERIALIZERS:
+        serializer = get_serializer(name)
+        # unavailable serializer falls back to the other one
+        if serializer.name == name:
+            codecs[name] = (serializer.dumps, serializer.loads)
+
+    return codecs
+
+
+def _measure(function: Callable[[Any], Any], argument: Any, iterations: int, repeats: int) -> float:
+    """ Return the best time in seconds of one call """
+    best_elapsed = float('inf')
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            function(argument)
+        best_elapsed = min(best_elapsed, time.perf_counter() - started_at)
+
+    return best_elapsed / iterations
+
+
+def run_serialization_benchmark(*, iterations: int, repeats: int) -> str:
+    """
+    Run the benchmark.
+
+    :keyword iterations: calls of the serializer per measurement
+    :type iterations: int
+    :keyword repeats: measurements [the best one is taken]
+    :type repeats: int
+
+    :return: formatted report
+    :rtype: str
+    """
+
+    codecs = _get_codecs()
+
+    lines = ['FSM data serialization [bytes per key | encode us | decode us]:']
+    for payload_name, payload in PAYLOADS.items():
+        lines.append(f'{payload_name}:')
+        for codec_name, (dumps, loads) in codecs.items():
+            raw_value = dumps(payload)
+            if loads(raw_value) != payload:
+                raise RuntimeError(f'Payload <{payload_name}> is changed by <{codec_name}> round-trip')
+
+            encode_time = _measure(dumps, payload, iterations, repeats)
+            decode_time = _measure(loads, raw_value, iterations, repeats)
+            lines.append(
+                f'    {codec_name}: {len(raw_value)} B | {encode_time * 1_000_000:.2f} us | '
+                f'{decode_time * 1_000_000:.2f} us'
+            )
+
+    return '\n'.join(lines)
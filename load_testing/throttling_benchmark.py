@@ -0,0 +1,380 @@
+"""
+Benchmarks throttling under synthetic flood.
+
+Virtual users send messages faster than the rate limit to the in-process dispatcher
+[in-memory FSM storage, Bot API requests are answered in-process]. Measured:
+    * peak quantity of the asyncio tasks and pending timers;
+    * quantity of the sent notifications [flood warnings and unlocks];
+    * time until all unlock notifications are sent.
+Throttling middleware is compared with the baseline that sleeps in the update processing until unlocking.
+
+Overhead of the throttlers is measured against redis [FSM storage with the benchmark keys prefix]:
+    * time of the throttling per message [in the update batch of the FSM writes as middlewares do];
+    * passed calls of one user made concurrently by the several workers [own redis connections].
+Dispatcher throttling by buckets is compared with the Lua script.
+
+Mixed population of the users [regular ones write slower than the rate limit, flooders are much faster]
+is throttled by the redis throttler and by the local-first one. Measured by population:
+    * time of the throttling per message [mean, p95];
+    * passed and throttled messages;
+    * redis calls per message [throttling and reconciliation].
+
+.. def:: run_throttling_benchmark(*, users: int, messages: int, interval: float, rate: float) -> str
+.. def:: run_throttling_overhead_benchmark(*, messages: int, workers: int) -> str
+.. def:: run_throttling_mixed_benchmark(*, users: int, flooders: int, duration: float, rate: float) -> str
+"""
+
+import asyncio
+import collections
+import random
+import statistics
+import time
+from typing import (
+    Any,
+    Optional
+)
+
+from aiogram import (
+    Bot,
+    Dispatcher,
+    types
+)
+from aiogram.utils.exceptions import Throttled
+
+from tg_note_bot.middlewares.throttling import ThrottlingMiddleware
+from tg_note_bot.settings import REDIS_CONFIG
+from tg_note_bot.storages import (
+    MemoryStorage,
+    PipelinedRedisStorage
+)
+from tg_note_bot.utils.throttlers import (
+    BucketThrottler,
+    LocalFirstThrottler,
+    RedisThrottler,
+    Throttler,
+    start_reconciler,
+    stop_reconciler
+)
+from tg_note_bot.utils.timers import timers
+
+from .updates import (
+    FIRST_SYNTHETIC_USER_ID,
+    make_text_update
+)
+
+
+__all__ = ['run_throttling_benchmark', 'run_throttling_overhead_benchmark', 'run_throttling_mixed_benchmark']
+
+
+# interval in seconds of the tasks and timers sampling
+SAMPLING_INTERVAL = 0.01
+# prefix of the redis keys written by the overhead benchmark [keys are deleted after it]
+BENCHMARK_KEYS_PREFIX = 'throttling_benchmark'
+# rate limit in seconds of the overhead benchmark [concurrent calls of the user are in one window]
+OVERHEAD_RATE_LIMIT = 60
+# interval between messages of the regular user and of the flooder [in rate limits, +-20%]
+REGULAR_USER_INTERVAL_IN_RATES = 5
+FLOODER_INTERVAL_IN_RATES = 0.2
+# interval in seconds of the local passes reconciliation in the mixed benchmark
+MIXED_RECONCILE_INTERVAL = 1
+
+
+class _InProcessBot(Bot):
+    """ Bot whose requests are answered in-process [sent messages are counted by text] """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.sent_texts: collections.Counter[str] = collections.Counter()
+
+    async def request(self, method: str, data: Optional[dict] = None, files: Optional[dict] = None,
+                      **kwargs) -> Any:
+        self.sent_texts[data.get('text')] += 1
+
+        # answer of the callback query
+        if 'chat_id' not in data:
+            return True
+
+        return {
+            'message_id': 1, 'date': int(time.time()),
+            'chat': {'id': data['chat_id'], 'type': 'private'}, 'text': data.get('text')
+        }
+
+
+class _SleepingThrottlingMiddleware(ThrottlingMiddleware):
+    """ Baseline: unlocking is notified by the update processing after sleep """
+
+    async def message_throttled(self, message: types.Message, throttled: Throttled):
+        if throttled.exceeded_count <= 2:
+            await message.reply('Too many requests! Don`t flood, please!')
+
+        await asyncio.sleep(throttled.rate - throttled.delta)
+
+        await self.notify_unlocked(message, throttled.key, throttled.exceeded_count)
+
+
+async def echo(message: types.Message) -> None:
+    """ Handler of the flood messages [does nothing] """
+
+
+async def _run_flood(middleware: ThrottlingMiddleware, *, users: int, messages: int, interval: float,
+                     rate: float) -> str:
+    bot = _InProcessBot(token='123456:benchmark')
+    dp = Dispatcher(bot, storage=MemoryStorage(expired_state='Expired:expired', expired_state_ttl=60))
+    dp.register_message_handler(echo)
+    dp.middleware.setup(middleware)
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+
+    peak_tasks = peak_timers = 0
+    is_flooding = True
+
+    async def sample() -> None:
+        nonlocal peak_tasks, peak_timers
+        while is_flooding or timers.pending or timers.running:
+            peak_tasks = max(peak_tasks, len(asyncio.all_tasks()))
+            peak_timers = max(peak_timers, timers.pending)
+            await asyncio.sleep(SAMPLING_INTERVAL)
+
+    async def flood(user_id: int) -> list[asyncio.Task]:
+        # updates are processed concurrently as in long polling [every update in own task]
+        tasks = []
+        for number in range(messages):
+            update = types.Update(**make_text_update(user_id * messages + number, user_id, 'flood'))
+            tasks.append(asyncio.create_task(dp.process_updates([update])))
+            await asyncio.sleep(interval)
+
+        return tasks
+
+    started_at = time.perf_counter()
+    sampler = asyncio.create_task(sample())
+    users_tasks = await asyncio.gather(*[flood(FIRST_SYNTHETIC_USER_ID + number) for number in range(users)])
+    flooded_at = time.perf_counter()
+    await asyncio.gather(*[task for user_tasks in users_tasks for task in user_tasks])
+    is_flooding = False
+    await sampler
+    elapsed = time.perf_counter() - started_at
+
+    return '\n'.join([
+        f'{type(middleware).__name__} [rate limit {rate} s]:',
+        f'    peak tasks: {peak_tasks}',
+        f'    peak pending timers: {peak_timers}',
+        f'    flood warnings: {bot.sent_texts["Too many requests! Don`t flood, please!"]}',
+        f'    unlock notifications: {bot.sent_texts["Unlocked. You can continue!"]}',
+        f'    flood: {flooded_at - started_at:.2f} s, until all is done: {elapsed:.2f} s'
+    ])
+
+
+def run_throttling_benchmark(*, users: int, messages: int, interval: float, rate: float) -> str:
+    """
+    Run the benchmark.
+
+    :keyword users: quantity of the flooding users
+    :type users: int
+    :keyword messages: messages per user
+    :type messages: int
+    :keyword interval: time in seconds between messages of the user
+    :type interval: float
+    :keyword rate: throttling rate limit in seconds
+    :type rate: float
+
+    :return: formatted report
+    :rtype: str
+    """
+
+    reports = [
+        f'Throttling under flood [{users} users x {messages} messages every {interval} s]:',
+        asyncio.run(_run_flood(_SleepingThrottlingMiddleware(limit=rate), users=users, messages=messages,
+                               interval=interval, rate=rate)),
+        asyncio.run(_run_flood(ThrottlingMiddleware(limit=rate), users=users, messages=messages,
+                               interval=interval, rate=rate))
+    ]
+
+    return '\n'.join(reports)
+
+
+def _create_benchmark_storage() -> PipelinedRedisStorage:
+    return PipelinedRedisStorage(
+        **REDIS_CONFIG, prefix=BENCHMARK_KEYS_PREFIX, expired_state='Expired:expired', expired_state_ttl=60
+    )
+
+
+async def _measure_overhead(throttler_class: type[Throttler], *, messages: int, workers: int) -> str:
+    storages = [_create_benchmark_storage() for _ in range(workers)]
+    dispatchers = [Dispatcher(_InProcessBot(token='123456:benchmark'), storage=storage) for storage in storages]
+    throttlers = [
+        RedisThrottler(storage) if throttler_class is RedisThrottler else throttler_class() for storage in storages
+    ]
+
+    async def process_message(worker: int, user_id: int) -> bool:
+        """ Throttle message as middlewares do and return whether it passes """
+        Dispatcher.set_current(dispatchers[worker])
+        batch = storages[worker].start_batch()
+        try:
+            await throttlers[worker].throttle(
+                f'antiflood__{echo.__name__}', chat=user_id, user=user_id, rate=OVERHEAD_RATE_LIMIT
+            )
+        except Throttled:
+            return False
+        finally:
+            await storages[worker].flush_batch(batch)
+
+        return True
+
+    try:
+        # connections of the workers are opened and the script is cached before measurement
+        for worker in range(workers):
+            await process_message(worker, FIRST_SYNTHETIC_USER_ID - 1 - worker)
+
+        started_at = time.perf_counter()
+        for number in range(messages):
+            await asyncio.create_task(process_message(0, FIRST_SYNTHETIC_USER_ID + number))
+        elapsed = time.perf_counter() - started_at
+
+        passed_calls = await asyncio.gather(*[
+            asyncio.create_task(process_message(worker, FIRST_SYNTHETIC_USER_ID + messages))
+            for worker in range(workers)
+        ])
+    finally:
+        redis = await storages[0].redis()
+        benchmark_keys = await redis.keys(f'{BENCHMARK_KEYS_PREFIX}:*')
+        if benchmark_keys:
+            await redis.delete(*benchmark_keys)
+        for storage in storages:
+            await storage.close()
+            await storage.wait_closed()
+
+    return '\n'.join([
+        f'{throttler_class.__name__}:',
+        f'    per message: {elapsed / messages * 1_000_000:.0f} us',
+        f'    passed concurrent calls of one user by {workers} workers: {sum(passed_calls)} [1 is correct]'
+    ])
+
+
+def run_throttling_overhead_benchmark(*, messages: int, workers: int) -> str:
+    """
+    Run the benchmark [redis is required].
+
+    :keyword messages: messages [of the different users] throttled one by one
+    :type messages: int
+    :keyword workers: quantity of the workers that throttle one user concurrently
+    :type workers: int
+
+    :return: formatted report
+    :rtype: str
+    """
+
+    reports = [f'Throttling overhead against redis [{messages} messages, rate limit {OVERHEAD_RATE_LIMIT} s]:']
+    for throttler_class in (BucketThrottler, RedisThrottler):
+        reports.append(asyncio.run(_measure_overhead(throttler_class, messages=messages, workers=workers)))
+
+    return '\n'.join(reports)
+
+
+class _CountingRedisThrottler(RedisThrottler):
+    """ Redis throttler that counts evaluated scripts [redis calls] """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.calls = 0
+
+    async def _evaluate(self, *args, **kwargs) -> Any:
+        self.calls += 1
+        return await super()._evaluate(*args, **kwargs)
+
+
+async def _run_population(*, is_local_first: bool, users: int, flooders: int, duration: float, rate: float) -> str:
+    storage = _create_benchmark_storage()
+    shared_throttler = _CountingRedisThrottler(storage)
+    throttler = LocalFirstThrottler(shared_throttler) if is_local_first else shared_throttler
+    start_reconciler(throttler, interval=MIXED_RECONCILE_INTERVAL)
+
+    # population: timings in seconds, passed and throttled messages
+    timings: dict[str, list[float]] = collections.defaultdict(list)
+    passed_messages: collections.Counter[str] = collections.Counter()
+    throttled_messages: collections.Counter[str] = collections.Counter()
+
+    async def send_messages(user_id: int, population: str, interval: float, deadline: float) -> None:
+        # users do not start at once
+        await asyncio.sleep(random.uniform(0, interval))
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            try:
+                await throttler.throttle(f'antiflood__{echo.__name__}', chat=user_id, user=user_id, rate=rate)
+            except Throttled:
+                throttled_messages[population] += 1
+            else:
+                passed_messages[population] += 1
+            timings[population].append(time.perf_counter() - started_at)
+
+            await asyncio.sleep(interval * random.uniform(0.8, 1.2))
+
+    try:
+        # connection is opened and the scripts are cached before measurement
+        await shared_throttler.throttle('warm_up', chat=FIRST_SYNTHETIC_USER_ID - 1, user=None, rate=rate)
+        await shared_throttler.record_passes([('warm_up', FIRST_SYNTHETIC_USER_ID - 1, None, rate, 0)])
+        shared_throttler.calls = 0
+
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(
+            *[
+                send_messages(FIRST_SYNTHETIC_USER_ID + number, 'regular', rate * REGULAR_USER_INTERVAL_IN_RATES,
+                              deadline)
+                for number in range(users)
+            ],
+            *[
+                send_messages(FIRST_SYNTHETIC_USER_ID + users + number, 'flooders', rate * FLOODER_INTERVAL_IN_RATES,
+                              deadline)
+                for number in range(flooders)
+            ]
+        )
+        await stop_reconciler()
+    finally:
+        redis = await storage.redis()
+        benchmark_keys = await redis.keys(f'{BENCHMARK_KEYS_PREFIX}:*')
+        if benchmark_keys:
+            await redis.delete(*benchmark_keys)
+        await storage.close()
+        await storage.wait_closed()
+
+    messages = sum(len(population_timings) for population_timings in timings.values())
+    lines = [f'{type(throttler).__name__ if is_local_first else RedisThrottler.__name__}:']
+    for population, population_timings in timings.items():
+        p95 = statistics.quantiles(population_timings, n=20)[-1] if len(population_timings) > 1 else 0
+        lines.append(
+            f'    {population}: {len(population_timings)} messages, passed {passed_messages[population]}, '
+            f'throttled {throttled_messages[population]}, '
+            f'mean {statistics.mean(population_timings) * 1_000_000:.0f} us, p95 {p95 * 1_000_000:.0f} us'
+        )
+    lines.append(f'    redis calls per message: {shared_throttler.calls} / {messages} = '
+                 f'{shared_throttler.calls / messages if messages else 0:.3f}')
+
+    return '\n'.join(lines)
+
+
+def run_throttling_mixed_benchmark(*, users: int, flooders: int, duration: float, rate: float) -> str:
+    """
+    Run the benchmark [redis is required].
+
+    :keyword users: quantity of the regular users
+    :type users: int
+    :keyword flooders: quantity of the flooding users
+    :type flooders: int
+    :keyword duration: time in seconds the users send messages
+    :type duration: float
+    :keyword rate: throttling rate limit in seconds
+    :type rate: float
+
+    :return: formatted report
+    :rtype: str
+    """
+
+    reports = [f'Throttling of the mixed population [{users} regular users, {flooders} flooders, {duration} s, '
+               f'rate limit {rate} s]:']
+    for is_local_first in (False, True):
+        reports.append(asyncio.run(_run_population(
+            is_local_first=is_local_first, users=users, flooders=flooders, duration=duration, rate=rate
+        )))
+
+    return '\n'.join(reports)
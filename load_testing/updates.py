@@ -0,0 +1,93 @@
+"""
+Contains builders of the synthetic updates [as Bot API sends them].
+
+.. def:: make_user(user_id: int) -> dict
+.. def:: make_text_message(message_id: int, user_id: int, text: str) -> dict
+.. def:: make_text_update(update_id: int, user_id: int, text: str) -> dict
+.. def:: make_callback_query(callback_query_id: int, user_id: int, message: dict, data: str) -> dict
+
+.. const:: FIRST_SYNTHETIC_USER_ID
+"""
+
+import time
+from typing import Any
+
+
+__all__ = ['make_user', 'make_text_message', 'make_text_update', 'make_callback_query', 'FIRST_SYNTHETIC_USER_ID']
+
+
+# synthetic users get ids from this number to not intersect with real users
+FIRST_SYNTHETIC_USER_ID = 10 ** 12
+
+
+def make_user(user_id: int) -> dict[str, Any]:
+    """ Make user [virtual users are not bots] """
+    return {'id': user_id, 'is_bot': False, 'first_name': 'Load', 'username': f'load_{user_id}'}
+
+
+def make_text_message(message_id: int, user_id: int, text: str) -> dict[str, Any]:
+    """
+    Make private text message from the user.
+
+    :param message_id: message id
+    :type message_id: int
+    :param user_id: sender id [also private chat id]
+    :type user_id: int
+    :param text: message text
+    :type text: str
+
+    :return: message
+    :rtype: dict
+    """
+
+    return {
+        'message_id': message_id,
+        'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private', 'first_name': 'Load'},
+        'from': make_user(user_id),
+        'text': text
+    }
+
+
+def make_text_update(update_id: int, user_id: int, text: str) -> dict[str, Any]:
+    """
+    Make update with private text message.
+
+    :param update_id: update id [also message id]
+    :type update_id: int
+    :param user_id: sender id [also private chat id]
+    :type user_id: int
+    :param text: message text
+    :type text: str
+
+    :return: update as Bot API sends it
+    :rtype: dict
+    """
+
+    return {'update_id': update_id, 'message': make_text_message(update_id, user_id, text)}
+
+
+def make_callback_query(callback_query_id: int, user_id: int, message: dict[str, Any], data: str) -> dict[str, Any]:
+    """
+    Make callback query [pressing of the inline keyboard button].
+
+    :param callback_query_id: callback query id
+    :type callback_query_id: int
+    :param user_id: user that has pressed the button
+    :type user_id: int
+    :param message: message with inline keyboard [as bot has got it]
+    :type message: dict
+    :param data: callback data of the button
+    :type data: str
+
+    :return: callback query
+    :rtype: dict
+    """
+
+    return {
+        'id': str(callback_query_id),
+        'from': make_user(user_id),
+        'message': message,
+        'chat_instance': str(user_id),
+        'data': data
+    }
@@ -0,0 +1,160 @@
+"""
+Benchmarks extractor of the links against the url regexp.
+
+Fuzzing: random messages [url chars, punctuation, whitespaces, emoji and embedded urls] are extracted
+by tokenizing and by entities [built from the found urls with the UTF-16 offsets as Telegram sends].
+Checked:
+    * every found url is a url and it is in the text;
+    * every embedded url is found;
+    * links extracted by entities are the same as tokenized ones.
+Adversarial messages [long garbage the regexp backtracks on] of the Telegram message max length and shorter
+ones are searched by the url regexp [as `Regexp` filter did] and extracted by the extractor.
+Measured:
+    * CPU time per message [best of the repeats].
+
+.. def:: run_url_extraction_benchmark(*, fuzz_messages: int, repeats: int, seed: int) -> str
+
+.. data:: ADVERSARIAL_MESSAGES
+.. data:: EMBEDDED_URLS
+"""
+
+import random
+import time
+from typing import (
+    Callable,
+    Optional
+)
+
+from aiogram import types
+
+from tg_note_bot.utils.regexp import url_pattern
+from tg_note_bot.utils.urls import (
+    extract_links,
+    find_urls,
+    is_url
+)
+
+
+__all__ = ['run_url_extraction_benchmark', 'ADVERSARIAL_MESSAGES', 'EMBEDDED_URLS']
+
+
+# Telegram message max length in chars
+MESSAGE_MAX_LENGTH = 4096
+
+# message name: message factory by length
+ADVERSARIAL_MESSAGES: dict[str, Callable[[int], str]] = {
+    'letters': lambda length: 'a' * length,
+    'dotted letters': lambda length: ('a.' * length)[:length],
+    'dotted numbers': lambda length: ('a.1' * length)[:length],
+    'dots': lambda length: '.' * length,
+    'scheme with garbage': lambda length: ('http://' + 'a-' * length)[:length],
+    'user info garbage': lambda length: ('ab@c:d' * length)[:length]
+}
+
+EMBEDDED_URLS = [
+    'https://docs.python.org/3/library/asyncio-task.html#asyncio.wait_for',
+    'http://example.com:8080/path?query=1&other=2',
+    'github.com/aiogram/aiogram',
+    'en.wikipedia.org/wiki/Python_(programming_language)',
+    'HTTPS://WWW.EXAMPLE.ORG'
+]
+
+_FUZZ_CHARS = 'abcxyzABC0129.,:;/?#@-_=&()[]"\'!  \n\t🐍ё'
+
+
+def _make_fuzz_message(randomizer: random.Random) -> tuple[str, list[str]]:
+    """ Return random message and urls embedded between whitespaces """
+    parts, embedded_urls = [], []
+    for _ in range(randomizer.randint(1, 12)):
+        if randomizer.random() < .3:
+            url = randomizer.choice(EMBEDDED_URLS)
+            parts.append(f' {url} ')
+            embedded_urls.append(url)
+        else:
+            parts.append(''.join(randomizer.choices(_FUZZ_CHARS, k=randomizer.randint(0, 40))))
+
+    return ''.join(parts), embedded_urls
+
+
+def _make_entities(text: str) -> list[types.MessageEntity]:
+    """ Return `url` entities of the found urls as Telegram sends [offsets in the UTF-16 code units] """
+    entities = []
+    for url in find_urls(text):
+        offset = len(text[:url.start].encode('utf-16-le')) // 2
+        length = len(url.url.encode('utf-16-le')) // 2
+        entities.append(types.MessageEntity(type=types.MessageEntityType.URL, offset=offset, length=length))
+
+    return entities
+
+
+def _fuzz(messages: int, seed: int) -> int:
+    """ Return quantity of the extracted links [raise on the first broken invariant] """
+    randomizer = random.Random(seed)
+    extracted_links = 0
+    for _ in range(messages):
+        text, embedded_urls = _make_fuzz_message(randomizer)
+
+        links = extract_links(text)
+        urls = [link.url for link in links]
+        for url in urls:
+            if not is_url(url) or url not in text:
+                raise RuntimeError(f'Not url <{url}> is extracted from <{text!r}>')
+        for url in embedded_urls:
+            if url not in urls:
+                raise RuntimeError(f'Url <{url}> is not extracted from <{text!r}>')
+
+        if extract_links(text, _make_entities(text)) != links:
+            raise RuntimeError(f'Links extracted by entities are different for <{text!r}>')
+
+        extracted_links += len(links)
+
+    return extracted_links
+
+
+def _measure(function: Callable[[str], Optional[object]], text: str, repeats: int) -> float:
+    """ Return the best time in seconds of one call """
+    best_elapsed = float('inf')
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        function(text)
+        best_elapsed = min(best_elapsed, time.perf_counter() - started_at)
+
+    return best_elapsed
+
+
+def run_url_extraction_benchmark(*, fuzz_messages: int, repeats: int, seed: int) -> str:
+    """
+    Run the benchmark.
+
+    :keyword fuzz_messages: random messages to check
+    :type fuzz_messages: int
+    :keyword repeats: measurements [the best one is taken]
+    :type repeats: int
+    :keyword seed: seed of the random messages
+    :type seed: int
+
+    :return: formatted report
+    :rtype: str
+
+    :raises RuntimeError: raised if extracted links are wrong
+    """
+
+    started_at = time.perf_counter()
+    extracted_links = _fuzz(fuzz_messages, seed)
+    lines = [
+        f'Fuzzing [seed {seed}]: {fuzz_messages} messages, {extracted_links} links extracted, invariants hold '
+        f'[{time.perf_counter() - started_at:.2f} s]',
+        'Adversarial messages [regexp ms | extractor ms | speedup]:'
+    ]
+    for message_name, make_message in ADVERSARIAL_MESSAGES.items():
+        lines.append(f'{message_name}:')
+        for length in (MESSAGE_MAX_LENGTH // 4, MESSAGE_MAX_LENGTH):
+            text = make_message(length)
+            regexp_time = _measure(url_pattern.search, text, repeats)
+            extractor_time = _measure(extract_links, text, repeats)
+            lines.append(
+                f'    {length} chars: {regexp_time * 1000:.2f} ms | {extractor_time * 1000:.2f} ms | '
+                f'x{regexp_time / extractor_time:.0f}'
+            )
+
+    return '\n'.join(lines)
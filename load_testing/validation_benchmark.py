@@ -0,0 +1,178 @@
+"""
+Benchmarks validators of the user input.
+
+Values of the every validated field [valid, stripped, too short, too long, missing ones] are validated
+by the compiled validators and by the Pydantic path [baseline - validator object and model instance per call,
+as handlers validated before]. Results and user-facing error messages of the both paths have to be the same.
+Measured:
+    * validation CPU time per value [best of the repeats].
+
+.. def:: run_validation_benchmark(*, iterations: int, repeats: int) -> str
+
+.. data:: VALUES
+"""
+
+import time
+from typing import (
+    Any,
+    Callable,
+    Optional
+)
+
+import pydantic
+
+from tg_note_bot.db.validation import (
+    ValidationError,
+    get_formatted_error_message,
+    validate_bug_message,
+    validate_link_description,
+    validate_link_url,
+    validate_rubric_description,
+    validate_rubric_name
+)
+
+
+__all__ = ['run_validation_benchmark', 'VALUES']
+
+
+# field: values
+VALUES: dict[str, dict[str, Optional[str]]] = {
+    'link': {
+        'valid': 'https://docs.python.org/3/library/asyncio-task.html#asyncio.wait_for',
+        'stripped': '   https://github.com/aiogram/aiogram \n',
+        'too short': '  ab ',
+        'too long': 'https://example.com/' + 'a' * 500
+    },
+    'link_description': {
+        'valid': 'Таймауты корутин - wait_for и shield 🐍',
+        'missing': None,
+        'too long': 'description ' * 20
+    },
+    'rubric_name': {
+        'valid': 'Python 🐍',
+        'too short': '   ',
+        'too long': 'Articles about asyncio'
+    },
+    'rubric_description': {
+        'valid': 'Articles about asyncio, typing and packaging',
+        'missing': None
+    },
+    'bug_message': {
+        'valid': 'Links of the rubric are not shown after deleting',
+        'too short': ' bug  ',
+        'missing': None
+    }
+}
+
+
+# baseline: the Pydantic path --------------------------------------------------------------------------------------
+class _StrippedModel(pydantic.BaseModel):
+    class Config:
+        anystr_strip_whitespace = True
+
+
+class _LinkUrl(_StrippedModel):
+    link: str = pydantic.Field(min_length=3, max_length=500)
+
+
+class _LinkDescription(_StrippedModel):
+    link_description: Optional[str] = pydantic.Field(max_length=200)
+
+
+class _RubricName(_StrippedModel):
+    rubric_name: str = pydantic.Field(min_length=1, max_length=20)
+
+
+class _RubricDescription(_StrippedModel):
+    rubric_description: Optional[str] = pydantic.Field(max_length=200)
+
+
+class _BugMessage(_StrippedModel):
+    bug_message: str = pydantic.Field(min_length=10, max_length=200)
+
+
+class _PydanticValidator:
+    """ Baseline: validator object is created for the every call as handlers did """
+
+    def __init__(self, model: type[pydantic.BaseModel], field: str):
+        self.model = model
+        self.field = field
+
+    def validate(self, value: Optional[str]) -> Optional[str]:
+        return getattr(self.model(**{self.field: value}), self.field)
+
+
+def _make_pydantic_validator(model: type[pydantic.BaseModel], field: str) -> Callable[[Optional[str]], Any]:
+    def validate(value: Optional[str]) -> Optional[str]:
+        return _PydanticValidator(model, field).validate(value)
+
+    return validate
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# field: (pydantic validator, compiled validator)
+_VALIDATORS: dict[str, tuple[Callable[[Optional[str]], Any], Callable[[Optional[str]], Any]]] = {
+    'link': (_make_pydantic_validator(_LinkUrl, 'link'), validate_link_url),
+    'link_description': (_make_pydantic_validator(_LinkDescription, 'link_description'), validate_link_description),
+    'rubric_name': (_make_pydantic_validator(_RubricName, 'rubric_name'), validate_rubric_name),
+    'rubric_description': (
+        _make_pydantic_validator(_RubricDescription, 'rubric_description'), validate_rubric_description
+    ),
+    'bug_message': (_make_pydantic_validator(_BugMessage, 'bug_message'), validate_bug_message)
+}
+
+
+def _validate(validator: Callable[[Optional[str]], Any], value: Optional[str]) -> str:
+    """ Return valid value or user-facing error message """
+    try:
+        return repr(validator(value))
+    except (pydantic.ValidationError, ValidationError) as error:
+        return get_formatted_error_message(error)
+
+
+def _measure(validator: Callable[[Optional[str]], Any], value: Optional[str], iterations: int, repeats: int) -> float:
+    """ Return the best time in seconds of one validation """
+    best_elapsed = float('inf')
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            try:
+                validator(value)
+            except (pydantic.ValidationError, ValidationError):
+                pass
+        best_elapsed = min(best_elapsed, time.perf_counter() - started_at)
+
+    return best_elapsed / iterations
+
+
+def run_validation_benchmark(*, iterations: int, repeats: int) -> str:
+    """
+    Run the benchmark.
+
+    :keyword iterations: validations per measurement
+    :type iterations: int
+    :keyword repeats: measurements [the best one is taken]
+    :type repeats: int
+
+    :return: formatted report
+    :rtype: str
+
+    :raises RuntimeError: raised if results of the compiled validator and Pydantic one are different
+    """
+
+    lines = ['Validation of the user input [pydantic us | compiled us | speedup]:']
+    for field, values in VALUES.items():
+        pydantic_validator, compiled_validator = _VALIDATORS[field]
+        lines.append(f'{field}:')
+        for value_name, value in values.items():
+            if _validate(pydantic_validator, value) != _validate(compiled_validator, value):
+                raise RuntimeError(f'Value <{field}: {value_name}> is validated differently')
+
+            pydantic_time = _measure(pydantic_validator, value, iterations, repeats)
+            compiled_time = _measure(compiled_validator, value, iterations, repeats)
+            lines.append(
+                f'    {value_name}: {pydantic_time * 1_000_000:.2f} us | {compiled_time * 1_000_000:.2f} us | '
+                f'x{pydantic_time / compiled_time:.1f}'
+            )
+
+    return '\n'.join(lines)
@@ -0,0 +1,330 @@
+"""
+Drives realistic flows of the virtual users against the bot through the fake Bot API server.
+
+Bot has to be run separately in the long polling mode and pointed to the fake Bot API server, e.g.:
+    BOT_API_SERVER_URL=http://127.0.0.1:8081 python tg_note_bot/__main__.py
+
+Every virtual user passes the scenario step by step [as a human]:
+    /start -> rubric adding -> links quick adding -> link adding [FSM with rubric picker] -> links seeing ->
+    -> rubric deleting.
+Step latency is measured from the update pushing until the bot answer that finishes the step.
+Texts of the buttons are taken from the bot keyboards, so the flows follow the bot.
+
+.. class:: FlowError(Exception)
+.. class:: FlowStats
+.. class:: VirtualUser
+
+.. async:: run_flows_benchmark(*, users: int, concurrency: int, quick_adds: int, think_time: float,
+        fake_api_host: str, fake_api_port: int, latency: float, retry_after_probability: float,
+        startup_timeout: float, answer_timeout: float) -> str
+
+.. def:: text_contains(*fragments: str) -> Callable[[RecordedCall], bool]
+.. def:: has_inline_keyboard(call: RecordedCall) -> bool
+"""
+
+import asyncio
+import collections
+import itertools
+import logging
+import time
+from typing import (
+    Awaitable,
+    Callable,
+    Optional
+)
+
+from tg_note_bot.keyboards.reply import (
+    DecisionAboutRubricLinksOnDeletingReplyKeyboard,
+    LinksAndRubricsMainReplyKeyboard
+)
+from tg_note_bot.settings import EMPTY_VALUE
+
+from .fake_bot_api import (
+    FakeBotAPI,
+    RecordedCall
+)
+from .report import format_latency_report
+from .updates import (
+    FIRST_SYNTHETIC_USER_ID,
+    make_callback_query,
+    make_text_message
+)
+
+
+__all__ = [
+    'FlowError', 'FlowStats', 'VirtualUser', 'run_flows_benchmark',
+    'text_contains', 'has_inline_keyboard'
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+Predicate = Callable[[RecordedCall], bool]
+Flow = Callable[['VirtualUser'], Awaitable[None]]
+
+
+class FlowError(Exception):
+    """ Bot has not answered as expected """
+
+
+class FlowStats:
+    """ Collects step latencies and failures by flows """
+
+    def __init__(self):
+        self.latencies: collections.defaultdict[str, list[float]] = collections.defaultdict(list)
+        self.failures: collections.Counter[str] = collections.Counter()
+
+    @property
+    def steps(self) -> int:
+        """ Quantity of the passed steps """
+        return sum(len(latencies) for latencies in self.latencies.values())
+
+
+# predicates -----------------------------------------------------------------------------------------------------------
+def text_contains(*fragments: str) -> Predicate:
+    """ Return predicate that checks that answer text contains any of the fragments """
+    def predicate(call: RecordedCall) -> bool:
+        return any(fragment in call.text for fragment in fragments)
+
+    return predicate
+
+
+def has_inline_keyboard(call: RecordedCall) -> bool:
+    """ Check that answer has inline keyboard """
+    return bool(call.inline_keyboard)
+
+
+def either(*predicates: Predicate) -> Predicate:
+    """ Return predicate that checks that answer satisfies any of the predicates """
+    def predicate(call: RecordedCall) -> bool:
+        return any(predicate_(call) for predicate_ in predicates)
+
+    return predicate
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+class VirtualUser:
+    """ Implements virtual user that chats with the bot """
+
+    def __init__(self, user_id: int, fake_api: FakeBotAPI, stats: FlowStats, *,
+                 answer_timeout: float, think_time: float):
+        """
+        :param user_id: user id [also private chat id]
+        :type user_id: int
+        :param fake_api: fake Bot API server the bot is pointed to
+        :type fake_api: FakeBotAPI
+        :param stats: stats the step latencies are collected in
+        :type stats: FlowStats
+        :keyword answer_timeout: time in seconds to wait the answer on the step
+        :type answer_timeout: float
+        :keyword think_time: pause in seconds before every step [the bot throttles flood]
+        :type think_time: float
+        """
+
+        self.user_id = user_id
+        self.fake_api = fake_api
+        self.stats = stats
+        self.answer_timeout = answer_timeout
+        self.think_time = think_time
+
+        self.flow: Optional[str] = None
+        self._numbers = itertools.count(1)
+
+    def next_number(self) -> int:
+        """ Return unique [for the user] number for the names and urls """
+        return next(self._numbers)
+
+    async def run_flow(self, name: str, flow: Flow) -> bool:
+        """
+        Run flow and collect its step latencies.
+
+        :param name: flow name in stats
+        :type name: str
+        :param flow: flow
+        :type flow: Flow
+
+        :return: whether flow has been passed
+        :rtype: bool
+        """
+
+        self.flow = name
+        try:
+            await flow(self)
+        except FlowError as error:
+            logger.debug(f'Flow <{name}> of the user <{self.user_id}> has failed: {error}')
+            self.stats.failures[name] += 1
+            return False
+
+        return True
+
+    async def send_text(self, text: str, expected: Predicate) -> RecordedCall:
+        """ Send text message and wait for the expected answer """
+        message = make_text_message(self.next_number(), self.user_id, text)
+        return await self._push_and_wait({'message': message}, expected, f'text <{text}>')
+
+    async def press_button(self, answer: RecordedCall, callback_data: str, expected: Predicate) -> RecordedCall:
+        """ Press inline keyboard button of the bot answer and wait for the expected answer """
+        callback_query = make_callback_query(self.next_number(), self.user_id, answer.result, callback_data)
+        return await self._push_and_wait({'callback_query': callback_query}, expected, f'button <{callback_data}>')
+
+    async def _push_and_wait(self, update: dict, expected: Predicate, step: str) -> RecordedCall:
+        if self.think_time:
+            await asyncio.sleep(self.think_time)
+
+        answer = self.fake_api.wait_for_answer(self.user_id, expected)
+        started_at = time.perf_counter()
+        self.fake_api.push_update(update)
+
+        try:
+            call = await asyncio.wait_for(answer, self.answer_timeout)
+        except asyncio.TimeoutError:
+            raise FlowError(f'Expected answer on the {step} has not been received')
+
+        self.stats.latencies[self.flow].append(call.received_at - started_at)
+
+        return call
+
+
+# flows ----------------------------------------------------------------------------------------------------------------
+async def start_flow(user: VirtualUser) -> None:
+    await user.send_text('/start', text_contains('Hello'))
+
+
+async def add_rubric_flow(user: VirtualUser) -> None:
+    await user.send_text(LinksAndRubricsMainReplyKeyboard.text_for_button_to_add_rubric, text_contains('rubric name'))
+    await user.send_text(f'load {user.next_number()}', text_contains('rubric description'))
+    await user.send_text(EMPTY_VALUE, text_contains('rubric has been added'))
+
+
+async def quick_add_link_flow(user: VirtualUser) -> None:
+    url = f'https://example.com/{user.user_id}/{user.next_number()}'
+    await user.send_text(url, text_contains('caught your link'))
+
+
+async def add_link_flow(user: VirtualUser) -> None:
+    await user.send_text(LinksAndRubricsMainReplyKeyboard.text_for_button_to_add_link, text_contains('Input url'))
+    await user.send_text(
+        f'https://example.org/{user.user_id}/{user.next_number()}', text_contains('Input link description')
+    )
+
+    link_has_been_added = text_contains('link has been added')
+    answer = await user.send_text(EMPTY_VALUE, either(has_inline_keyboard, link_has_been_added))
+    if answer.inline_keyboard:
+        # rubric picker
+        await user.press_button(answer, answer.inline_keyboard[0][0]['callback_data'], link_has_been_added)
+
+
+async def see_links_flow(user: VirtualUser) -> None:
+    await user.send_text(LinksAndRubricsMainReplyKeyboard.text_for_button_to_see_links, text_contains('Links with'))
+
+
+async def delete_rubric_flow(user: VirtualUser) -> None:
+    answer = await user.send_text(
+        LinksAndRubricsMainReplyKeyboard.text_for_button_to_delete_rubric,
+        either(has_inline_keyboard, text_contains('have any rubrics'))
+    )
+    if not answer.inline_keyboard:
+        return
+
+    rubric_has_been_deleted = text_contains('Rubric has been deleted')
+    answer = await user.press_button(
+        answer, answer.inline_keyboard[0][0]['callback_data'],
+        either(text_contains('What do you prefer'), rubric_has_been_deleted)
+    )
+    if not rubric_has_been_deleted(answer):
+        await user.send_text(
+            DecisionAboutRubricLinksOnDeletingReplyKeyboard.text_for_button_to_set_none_rubric_for_links,
+            rubric_has_been_deleted
+        )
+
+
+def make_scenario(quick_adds: int) -> list[tuple[str, Flow]]:
+    """ Return flows of the virtual user in order """
+    return [
+        ('start', start_flow),
+        ('add_rubric', add_rubric_flow),
+        *[('quick_add_link', quick_add_link_flow)] * quick_adds,
+        ('add_link', add_link_flow),
+        ('see_links', see_links_flow),
+        ('delete_rubric', delete_rubric_flow)
+    ]
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+async def run_flows_benchmark(*, users: int, concurrency: int, quick_adds: int, think_time: float,
+                              fake_api_host: str, fake_api_port: int, latency: float, retry_after_probability: float,
+                              startup_timeout: float, answer_timeout: float) -> str:
+    """
+    Run scenario of the virtual users against the bot.
+
+    :keyword users: quantity of the virtual users
+    :type users: int
+    :keyword concurrency: max quantity of the simultaneously active users
+    :type concurrency: int
+    :keyword quick_adds: quantity of the quick link adding in the scenario
+    :type quick_adds: int
+    :keyword think_time: pause in seconds before every step
+    :type think_time: float
+    :keyword fake_api_host: host of the fake Bot API server
+    :type fake_api_host: str
+    :keyword fake_api_port: port of the fake Bot API server
+    :type fake_api_port: int
+    :keyword latency: injected latency of the Bot API answers in seconds
+    :type latency: float
+    :keyword retry_after_probability: probability of the injected `RetryAfter` errors
+    :type retry_after_probability: float
+    :keyword startup_timeout: time in seconds to wait until bot starts polling
+    :type startup_timeout: float
+    :keyword answer_timeout: time in seconds to wait an answer on the step
+    :type answer_timeout: float
+
+    :return: report
+    :rtype: str
+    """
+
+    fake_api = FakeBotAPI(latency=latency, retry_after_probability=retry_after_probability)
+    await fake_api.start(fake_api_host, fake_api_port)
+
+    try:
+        logger.info('Waiting until bot starts polling...')
+        await asyncio.wait_for(fake_api.polling_is_started.wait(), startup_timeout)
+
+        stats = FlowStats()
+        scenario = make_scenario(quick_adds)
+        semaphore = asyncio.Semaphore(concurrency)
+        passed_users = 0
+
+        async def run_user(user_number: int) -> None:
+            nonlocal passed_users
+
+            user = VirtualUser(
+                FIRST_SYNTHETIC_USER_ID + user_number, fake_api, stats,
+                answer_timeout=answer_timeout, think_time=think_time
+            )
+            async with semaphore:
+                for name, flow in scenario:
+                    # state of the failed flow is unknown - the rest of the scenario is skipped
+                    if not await user.run_flow(name, flow):
+                        return
+
+            passed_users += 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*[run_user(user_number) for user_number in range(users)])
+        elapsed = time.perf_counter() - started_at
+
+        return '\n'.join([
+            f'Flows benchmark: {users} users [passed: {passed_users}], concurrency {concurrency}, '
+            f'elapsed {elapsed:.1f} s',
+            f'Steps: {stats.steps} [{stats.steps / elapsed:.1f} per second], '
+            f'Bot API calls: {len(fake_api.calls)}, injected RetryAfter: {fake_api.rejected_calls}',
+            *[
+                format_latency_report(
+                    f'{name} [failures: {stats.failures[name]}] step latency', stats.latencies[name], elapsed
+                )
+                for name in dict.fromkeys([*stats.latencies, *stats.failures])
+            ]
+        ])
+    finally:
+        await fake_api.stop()
@@ -0,0 +1,150 @@
+"""
+Benchmarks bot in the webhook mode.
+
+Bot has to be run separately in the webhook mode and pointed to the fake Bot API server, e.g.:
+    BOT_RUN_MODE=webhook WEBHOOK_HOST=http://127.0.0.1:8080 BOT_API_SERVER_URL=http://127.0.0.1:8081
+    python tg_note_bot/__main__.py
+
+Benchmark starts fake Bot API server, waits until bot sets webhook
+and posts synthetic text updates [from the different users] to the bot webhook.
+Measured:
+    * webhook latency - until webhook request is answered;
+    * answer latency - until bot sends the answer message to the fake Bot API server.
+
+.. async:: run_webhook_benchmark(*, updates: int, concurrency: int, fake_api_host: str, fake_api_port: int,
+        startup_timeout: float, answer_timeout: float) -> str
+
+.. async:: wait_for_webhook_server(webhook_url: str, timeout: float) -> None
+"""
+
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+from .fake_bot_api import FakeBotAPI
+from .report import format_latency_report
+from .updates import (
+    FIRST_SYNTHETIC_USER_ID,
+    make_text_update
+)
+
+
+__all__ = ['run_webhook_benchmark', 'wait_for_webhook_server']
+
+
+logger = logging.getLogger(__name__)
+
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+# text is not matched by any command, menu button or url filter
+SYNTHETIC_TEXT = 'load testing'
+
+
+async def wait_for_webhook_server(webhook_url: str, timeout: float) -> None:
+    """
+    Wait until webhook server accepts connections
+    [bot sets webhook on startup - before the server starts listening].
+
+    :param webhook_url: webhook url
+    :type webhook_url: str
+    :param timeout: time in seconds to wait
+    :type timeout: float
+
+    :return: None
+    :rtype: None
+
+    :raises asyncio.TimeoutError: raised if server has not started in time
+    """
+
+    deadline = time.monotonic() + timeout
+
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(webhook_url) as response:
+                    await response.read()
+                    return
+            except aiohttp.ClientConnectionError:
+                if time.monotonic() > deadline:
+                    raise asyncio.TimeoutError()
+
+                await asyncio.sleep(.1)
+
+
+async def run_webhook_benchmark(*, updates: int, concurrency: int, fake_api_host: str, fake_api_port: int,
+                                startup_timeout: float, answer_timeout: float) -> str:
+    """
+    Run benchmark of the bot in the webhook mode.
+
+    :keyword updates: quantity of the posted updates
+    :type updates: int
+    :keyword concurrency: max quantity of the simultaneously posted updates
+    :type concurrency: int
+    :keyword fake_api_host: host of the fake Bot API server
+    :type fake_api_host: str
+    :keyword fake_api_port: port of the fake Bot API server
+    :type fake_api_port: int
+    :keyword startup_timeout: time in seconds to wait until bot sets webhook
+    :type startup_timeout: float
+    :keyword answer_timeout: time in seconds to wait an answer on the update
+    :type answer_timeout: float
+
+    :return: report
+    :rtype: str
+    """
+
+    fake_api = FakeBotAPI()
+    await fake_api.start(fake_api_host, fake_api_port)
+
+    try:
+        logger.info('Waiting until bot sets webhook...')
+        await asyncio.wait_for(fake_api.webhook_is_set.wait(), startup_timeout)
+        await wait_for_webhook_server(fake_api.webhook_url, startup_timeout)
+
+        headers = {}
+        if fake_api.webhook_secret_token:
+            headers[SECRET_TOKEN_HEADER] = fake_api.webhook_secret_token
+
+        semaphore = asyncio.Semaphore(concurrency)
+        webhook_latencies: list[float] = []
+        answer_latencies: list[float] = []
+        failures = 0
+
+        async def post_update(session: aiohttp.ClientSession, update_number: int) -> None:
+            nonlocal failures
+
+            user_id = FIRST_SYNTHETIC_USER_ID + update_number
+            update = make_text_update(update_number + 1, user_id, SYNTHETIC_TEXT)
+
+            async with semaphore:
+                answer = fake_api.wait_for_call('sendMessage', user_id)
+                started_at = time.perf_counter()
+
+                async with session.post(fake_api.webhook_url, json=update, headers=headers) as response:
+                    await response.read()
+                    if response.status != 200:
+                        failures += 1
+                        return
+                webhook_latencies.append(time.perf_counter() - started_at)
+
+                try:
+                    call = await asyncio.wait_for(answer, answer_timeout)
+                except asyncio.TimeoutError:
+                    failures += 1
+                else:
+                    answer_latencies.append(call.received_at - started_at)
+
+        started_at = time.perf_counter()
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*[post_update(session, update_number) for update_number in range(updates)])
+        elapsed = time.perf_counter() - started_at
+
+        return '\n'.join([
+            f'Webhook benchmark: {updates} updates, concurrency {concurrency}, failures {failures}',
+            format_latency_report('Webhook latency', webhook_latencies, elapsed),
+            format_latency_report('Answer latency', answer_latencies, elapsed)
+        ])
+    finally:
+        await fake_api.stop()
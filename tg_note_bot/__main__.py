@@ -1,7 +1,12 @@
 """
 Entry point.
+
+Usage:
+    python tg_note_bot
+    python tg_note_bot --profile-startup --top 20
 """
 
+import argparse
 import sys
 import pathlib
 
@@ -11,7 +16,32 @@ sys.path.append(pathlib.Path(__file__).parent.parent.__str__())
 # ----------------------------------------------------------------------------------------------------------------------
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Telegram note bot')
+    parser.add_argument(
+        '--profile-startup', action='store_true',
+        help='profile imports and dp setup in the current run mode instead of running [exit code 1 if over budget]'
+    )
+    parser.add_argument('--top', type=int, default=15, help='quantity of the slowest modules in startup profile')
+
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
+    args = parse_args()
+
+    if args.profile_startup:
+        from tg_note_bot.settings import (
+            BOT_RUN_MODE,
+            STARTUP_BUDGET_IN_SECONDS
+        )
+        from tg_note_bot.utils.startup_profiling import profile_startup
+
+        profile = profile_startup(BOT_RUN_MODE, budget=STARTUP_BUDGET_IN_SECONDS)
+        print(profile.format_report(args.top))
+
+        sys.exit(0 if profile.is_within_budget else 1)
+
     from tg_note_bot.app import main
 
     main()
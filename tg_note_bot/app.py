@@ -1,10 +1,12 @@
 """
 Contains main function for running.
 
-Upgrades dp with all stuff (handlers, middlewares, ...) by imports.
+Upgrades dp with all stuff (handlers, middlewares, ...) on demand:
+handlers [with db models and validators] are imported only by the run modes that process updates.
 
+.. func:: setup_dispatcher(run_mode: str) -> None
 .. func:: main
-    Run the bot
+    Run the bot [in long polling, webhook, updates ingest or updates worker mode]
 """
 
 from aiogram import (
@@ -12,27 +14,113 @@ from aiogram import (
     executor
 )
 
-# fresh up dp | | | | | | | | | | | | | | | | | | | | | | | | | | |
-from .loader import dp
-from .handlers import dp
-from .middlewares import dp
-# | | | | | | | | | | | | | | | | | | | | | | | | | | | | | | | | |
+from .loader import (
+    dp,
+    throttler
+)
 from .commands import COMMANDS
+from .settings import (
+    BOT_RUN_MODE,
+    FSM_SWEEP_BATCH_SIZE,
+    FSM_SWEEP_INTERVAL_IN_SECONDS,
+    LOOP_LAG_SAMPLING_INTERVAL_IN_SECONDS,
+    SHUTDOWN_TIMEOUT_IN_SECONDS,
+    THROTTLING_RECONCILE_INTERVAL_IN_SECONDS,
+    WEBAPP_HOST,
+    WEBAPP_PORT,
+    WEBHOOK_PATH
+)
 from .utils.admins_notifying import notify_admins_on_startup
+from .utils.dispatcher import DrainingDispatcher
+from .utils.fsm_sweeper import start_sweeper
+from .utils.loop_lag import loop_lag_monitor
+from .utils.shutdown import shutdown_gracefully
+from .utils.throttlers import start_reconciler
+from .utils.updates_streams import (
+    check_worker_shards,
+    run_updates_ingest,
+    run_updates_worker
+)
+from .utils.webhook import (
+    create_web_app,
+    set_webhook
+)
 
 
-async def on_startup(dp: Dispatcher) -> None:
+RUN_MODE_POLLING = 'polling'
+RUN_MODE_WEBHOOK = 'webhook'
+RUN_MODE_INGEST = 'ingest'
+RUN_MODE_WORKER = 'worker'
+
+
+def setup_dispatcher(run_mode: str) -> None:
+    """ Register handlers and setup middlewares in dp if updates are processed in the run mode """
+    if run_mode == RUN_MODE_INGEST:
+        return
+
+    # fresh up dp | | | | | | | | | | | | | | | | | | | | | | | | | | |
+    from .handlers import register_handlers
+    from .middlewares import setup_middlewares
+
+    register_handlers()
+    setup_middlewares()
+    # | | | | | | | | | | | | | | | | | | | | | | | | | | | | | | | | |
+
+
+async def on_startup_worker(dp: Dispatcher) -> None:
+    # warm-up uses db - it is imported on demand
+    from .utils.warm_up import warm_up
+
+    # connections and statements are warmed up before receiving of the updates
+    await warm_up(dp)
+
+    # abandoned conversations are evicted by the processes that process updates
+    start_sweeper(dp.storage, interval=FSM_SWEEP_INTERVAL_IN_SECONDS, batch_size=FSM_SWEEP_BATCH_SIZE)
+    # local throttling passes are sent to redis by the processes that process updates
+    start_reconciler(throttler, interval=THROTTLING_RECONCILE_INTERVAL_IN_SECONDS)
+    # load shedding of the low-priority handlers is driven by the lag
+    loop_lag_monitor.start(LOOP_LAG_SAMPLING_INTERVAL_IN_SECONDS)
+
+
+async def on_startup_ingest(dp: Dispatcher) -> None:
     await notify_admins_on_startup(dp)
 
     await dp.bot.set_my_commands(COMMANDS)
 
 
-async def on_shutdown(dp: Dispatcher) -> None:
-    # close storage
-    await dp.storage.close()
-    await dp.storage.wait_closed()
+async def on_startup(dp: Dispatcher) -> None:
+    await on_startup_worker(dp)
+
+    await on_startup_ingest(dp)
+
+
+async def on_startup_webhook(dp: Dispatcher) -> None:
+    await set_webhook(dp)
+
+    await on_startup(dp)
+
+
+async def on_shutdown(dp: DrainingDispatcher) -> None:
+    # drain in-flight updates, close storage, db pool and bot session
+    await shutdown_gracefully(dp, timeout=SHUTDOWN_TIMEOUT_IN_SECONDS)
 
 
 def main():
     """ Run the bot """
-    executor.start_polling(dp, on_startup=on_startup, on_shutdown=on_shutdown)
+    setup_dispatcher(BOT_RUN_MODE)
+
+    if BOT_RUN_MODE == RUN_MODE_WEBHOOK:
+        webhook_executor = executor.set_webhook(
+            dp, WEBHOOK_PATH, on_startup=on_startup_webhook, on_shutdown=on_shutdown, web_app=create_web_app()
+        )
+        webhook_executor.run_app(host=WEBAPP_HOST, port=WEBAPP_PORT)
+    elif BOT_RUN_MODE == RUN_MODE_POLLING:
+        executor.start_polling(dp, on_startup=on_startup, on_shutdown=on_shutdown)
+    elif BOT_RUN_MODE == RUN_MODE_INGEST:
+        executor.start(dp, run_updates_ingest(dp), on_startup=on_startup_ingest, on_shutdown=on_shutdown)
+    elif BOT_RUN_MODE == RUN_MODE_WORKER:
+        # workers are run in several processes - admins are notified and commands are set by ingest
+        check_worker_shards()
+        executor.start(dp, run_updates_worker(dp), on_startup=on_startup_worker, on_shutdown=on_shutdown)
+    else:
+        raise ValueError(f'Unknown bot run mode: <{BOT_RUN_MODE}>')
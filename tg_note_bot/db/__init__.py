@@ -3,22 +3,32 @@ Implements db communication.
 """
 
 from .db import (
+    SHORT_URL_PREFIXES,
     # create
     add_entity,
     add_user,
     add_rubric,
     add_link,
+    add_links,
     add_bug,
+    add_broadcast,
     # read
     fetch_one_rubric,
     fetch_all_rubrics,
     fetch_one_link,
     fetch_all_links,
+    search_links,
     fetch_all_bugs,
     fetch_all_unwatched_bugs,
+    stream_broadcast_recipients,
+    fetch_one_broadcast,
+    fetch_last_unfinished_broadcast,
     # update
     mark_all_bugs_as_watched,
     migrate_links_in_another_rubric,
+    mark_users_as_blocked,
+    unmark_user_as_blocked,
+    update_broadcast_progress,
     # delete
     delete_entity_by_instance,
     delete_user,
@@ -48,5 +58,10 @@ from .validation import (
     ValidationError,
     BugValidator,
     RubricValidator,
-    LinkValidator
+    LinkValidator,
+    validate_bug_message,
+    validate_rubric_name,
+    validate_rubric_description,
+    validate_link_url,
+    validate_link_description
 )
@@ -5,18 +5,29 @@ Contains functions that interact with db.
 .. async:: add_user(session: AsyncSession, user: User) -> None
 .. async:: add_rubric(session: AsyncSession, rubric: Rubric) -> None
 .. async:: add_link(session: AsyncSession, link: Link) -> None
+.. async:: add_links(session: AsyncSession, links: list[Link]) -> None
 .. async:: add_bug(session: AsyncSession, bug: Bug) -> None
+.. async:: add_broadcast(session: AsyncSession, broadcast: Broadcast) -> int
 
 .. async:: fetch_one_rubric(session: AsyncSession, rubric_id: int, *, with_links: bool = False) -> Rubric
 .. async:: fetch_all_rubrics(session: AsyncSession, user_id: int, *, with_links: bool = False) -> list[Rubric]
 .. async:: fetch_one_link(session: AsyncSession, link_id: int, *, with_rubric: bool = True) -> Link
 .. async:: fetch_all_links(session: AsyncSession, user_id: int, *, with_rubric: bool = False,
         group_by_rubric: bool = False) -> Union[list[Link], dict[Optional[Rubric], Link]]
+.. async:: search_links(session: AsyncSession, user_id: int, query: str, *, limit: int) -> list[Link]
 .. async:: fetch_all_bugs(session: AsyncSession) -> list[Bug]
 .. async:: fetch_all_unwatched_bugs(session: AsyncSession) -> list[Bug]
+.. async:: stream_broadcast_recipients(session: AsyncSession, *, after_user_id: int = 0,
+        batch_size: int) -> AsyncIterator[list[int]]
+.. async:: fetch_one_broadcast(session: AsyncSession, broadcast_id: int) -> Optional[Broadcast]
+.. async:: fetch_last_unfinished_broadcast(session: AsyncSession) -> Optional[Broadcast]
 
 .. async:: migrate_links_in_another_rubric(session: AsyncSession, old_rubric_id: int, new_rubric_id: int) -> None
 .. async:: mark_all_bugs_as_watched(session: AsyncSession) -> None
+.. async:: mark_users_as_blocked(session: AsyncSession, user_ids: Iterable[int]) -> None
+.. async:: unmark_user_as_blocked(session: AsyncSession, user_id: int) -> None
+.. async:: update_broadcast_progress(session: AsyncSession, broadcast_id: int, *, last_user_id: int,
+        sent_count: int, failed_count: int, blocked_count: int, is_finished: bool) -> None
 
 .. async:: delete_entity_by_instance(session: AsyncSession, entity: Base) -> None
 .. async:: delete_user(session: AsyncSession, user_id: int) -> None
@@ -35,12 +46,16 @@ Contains functions that interact with db.
 .. async:: does_rubric_have_unique_name(session: AsyncSession, user_id: int, rubric_name: str) -> bool
 
 .. async:: count_bot_users(session: AsyncSession) -> int
+
+.. const:: SHORT_URL_PREFIXES
 """
 
 import itertools
 import logging
 import operator
 from typing import (
+    AsyncIterator,
+    Iterable,
     Optional,
     Union
 )
@@ -59,7 +74,8 @@ from .models import (
     User,
     Rubric,
     Link,
-    Bug
+    Bug,
+    Broadcast
 )
 from .errors import UserAlreadyInDbError
 
@@ -67,6 +83,10 @@ from .errors import UserAlreadyInDbError
 logger = logging.getLogger(__name__)
 
 
+# prefixes of the url that are not compared by the search [url is compared as short url]
+SHORT_URL_PREFIXES = ('', 'http://', 'https://', 'www.', 'http://www.', 'https://www.')
+
+
 # create ---------------------------------------------------------------------------------------------------------------
 async def add_entity(session: AsyncSession, entity: Base) -> None:
     """
@@ -147,6 +167,30 @@ async def add_link(session: AsyncSession, link: Link) -> None:
     await add_entity(session, link)
 
 
+async def add_links(session: AsyncSession, links: list[Link]) -> None:
+    """
+    Add links by one bulk insert [instances are not refreshed - ids are not set].
+
+    :param session: db connection
+    :type session: AsyncSession
+    :param links: Link instances
+    :type links: list[Link]
+
+    :return: None
+    :rtype: None
+    """
+
+    if not links:
+        return
+
+    async with session.begin():
+        stmt = sa.insert(Link).values([
+            {'url': link.url, 'description': link.description, 'user_id': link.user_id, 'rubric_id': link.rubric_id}
+            for link in links
+        ])
+        await session.execute(stmt)
+
+
 # # Bug
 async def add_bug(session: AsyncSession, bug: Bug) -> None:
     """
@@ -163,6 +207,29 @@ async def add_bug(session: AsyncSession, bug: Bug) -> None:
     """
 
     await add_entity(session, bug)
+
+
+# # Broadcast
+async def add_broadcast(session: AsyncSession, broadcast: Broadcast) -> int:
+    """
+    Add broadcast.
+    Id is returned, since instance attributes are expired on commit.
+
+    :param session: db connection
+    :type session: AsyncSession
+    :param broadcast: Broadcast instance
+    :type broadcast: Broadcast
+
+    :return: id of the added broadcast
+    :rtype: int
+    """
+
+    async with session.begin():
+        session.add(broadcast)
+        await session.flush()
+        broadcast_id = broadcast.id
+
+    return broadcast_id
 # ----------------------------------------------------------------------------------------------------------------------
 
 
@@ -290,6 +357,58 @@ async def fetch_all_links(session: AsyncSession, user_id: int,
     return links
 
 
+async def search_links(session: AsyncSession, user_id: int, query: str, *, limit: int) -> list[Link]:
+    """
+    Search user links which url or description contain query [case insensitive].
+    Links with url that starts with query go first, then the newest links.
+    Links are loaded with rubric data.
+
+    :param session: db connection
+    :type session: AsyncSession
+    :param user_id: user id
+    :type user_id: int
+    :param query: searched substring [if empty - the newest links are returned]
+    :type query: str
+    :keyword limit: max quantity of the returned links
+    :type limit: int
+
+    :return: found links
+    :rtype: list[Link]
+    """
+
+    # `!` is used as escape character [backslash escaping depends on db settings]
+    escaped_query = query.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+    contains_pattern = f'%{escaped_query}%'
+    # url is compared as short url [without scheme and `www.`]
+    url_starts_with_query = sa.or_(*[
+        Link.url.ilike(f'{url_prefix}{escaped_query}%', escape='!')
+        for url_prefix in SHORT_URL_PREFIXES
+    ])
+
+    stmt = (
+        select(Link)
+        .options(joinedload(Link.rubric))
+        .where(
+            sa.and_(
+                Link.user_id == user_id,
+                sa.or_(
+                    Link.url.ilike(contains_pattern, escape='!'),
+                    Link.description.ilike(contains_pattern, escape='!')
+                )
+            )
+        )
+        .order_by(
+            url_starts_with_query.desc(),
+            Link.created_at.desc()
+        )
+        .limit(limit)
+    )
+    result = await session.execute(stmt)
+    links = list(result.scalars())
+
+    return links
+
+
 # # Bug
 async def fetch_all_bugs(session: AsyncSession) -> list[Bug]:
     """
@@ -325,6 +444,70 @@ async def fetch_all_unwatched_bugs(session: AsyncSession) -> list[Bug]:
     bugs = list(result.scalars())
 
     return bugs
+
+
+# # User
+async def stream_broadcast_recipients(session: AsyncSession, *, after_user_id: int = 0,
+                                      batch_size: int) -> AsyncIterator[list[int]]:
+    """
+    Stream ids of the non-blocked users in order of ids by batches.
+    Rows are fetched with server-side cursor, so all users are not loaded in memory.
+
+    :param session: db connection [is busy until streaming is finished]
+    :type session: AsyncSession
+    :keyword after_user_id: only users with greater id are streamed [to resume broadcast]
+    :type after_user_id: int
+    :keyword batch_size: quantity of the ids in batch
+    :type batch_size: int
+
+    :return: async iterator of the user ids batches
+    :rtype: AsyncIterator[list[int]]
+    """
+
+    stmt = (
+        select(User.id)
+        .where(sa.and_(User.id > after_user_id, User.is_blocked == False))
+        .order_by(User.id)
+    )
+    result = await session.stream(stmt)
+
+    async for user_ids in result.scalars().partitions(batch_size):
+        yield user_ids
+
+
+# # Broadcast
+async def fetch_one_broadcast(session: AsyncSession, broadcast_id: int) -> Optional[Broadcast]:
+    """
+    Fetch broadcast.
+
+    :param session: db connection
+    :type session: AsyncSession
+    :param broadcast_id: broadcast id
+    :type broadcast_id: int
+
+    :return: broadcast or None if it does not exist
+    :rtype: Optional[Broadcast]
+    """
+
+    return await session.get(Broadcast, broadcast_id)
+
+
+async def fetch_last_unfinished_broadcast(session: AsyncSession) -> Optional[Broadcast]:
+    """
+    Fetch the last created broadcast that has not been finished.
+
+    :param session: db connection
+    :type session: AsyncSession
+
+    :return: broadcast or None if all broadcasts are finished
+    :rtype: Optional[Broadcast]
+    """
+
+    stmt = select(Broadcast).where(Broadcast.finished_at == None).order_by(Broadcast.id.desc()).limit(1)
+    result = await session.execute(stmt)
+    broadcast = result.scalar()
+
+    return broadcast
 # ----------------------------------------------------------------------------------------------------------------------
 
 
@@ -369,6 +552,83 @@ async def mark_all_bugs_as_watched(session: AsyncSession) -> None:
     async with session.begin():
         stmt = sa.update(Bug).values(is_shown=True)
         await session.execute(stmt)
+
+
+# # User
+async def mark_users_as_blocked(session: AsyncSession, user_ids: Iterable[int]) -> None:
+    """
+    Mark users as blocked [users have blocked the bot].
+
+    :param session: db connection
+    :type session: AsyncSession
+    :param user_ids: user ids
+    :type user_ids: Iterable[int]
+
+    :return: None
+    :rtype: None
+    """
+
+    async with session.begin():
+        stmt = sa.update(User).where(User.id.in_(list(user_ids))).values(is_blocked=True)
+        await session.execute(stmt)
+
+
+async def unmark_user_as_blocked(session: AsyncSession, user_id: int) -> None:
+    """
+    Unmark user as blocked [user has returned to the bot].
+
+    :param session: db connection
+    :type session: AsyncSession
+    :param user_id: user id
+    :type user_id: int
+
+    :return: None
+    :rtype: None
+    """
+
+    async with session.begin():
+        stmt = sa.update(User).where(sa.and_(User.id == user_id, User.is_blocked == True)).values(is_blocked=False)
+        await session.execute(stmt)
+
+
+# # Broadcast
+async def update_broadcast_progress(session: AsyncSession, broadcast_id: int, *, last_user_id: int,
+                                    sent_count: int, failed_count: int, blocked_count: int,
+                                    is_finished: bool) -> None:
+    """
+    Save broadcast progress.
+
+    :param session: db connection
+    :type session: AsyncSession
+    :param broadcast_id: broadcast id
+    :type broadcast_id: int
+    :keyword last_user_id: id of the last processed recipient
+    :type last_user_id: int
+    :keyword sent_count: total quantity of the sent messages
+    :type sent_count: int
+    :keyword failed_count: total quantity of the failed messages
+    :type failed_count: int
+    :keyword blocked_count: total quantity of the recipients that have blocked the bot
+    :type blocked_count: int
+    :keyword is_finished: whether all recipients are processed
+    :type is_finished: bool
+
+    :return: None
+    :rtype: None
+    """
+
+    values = {
+        'last_user_id': last_user_id,
+        'sent_count': sent_count,
+        'failed_count': failed_count,
+        'blocked_count': blocked_count
+    }
+    if is_finished:
+        values['finished_at'] = sa.func.current_timestamp()
+
+    async with session.begin():
+        stmt = sa.update(Broadcast).where(Broadcast.id == broadcast_id).values(**values)
+        await session.execute(stmt)
 # ----------------------------------------------------------------------------------------------------------------------
 
 
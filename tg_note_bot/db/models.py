@@ -6,6 +6,7 @@ Implements db models.
 .. class:: Links(Base)
 
 .. class:: Bug(Base)
+.. class:: Broadcast(Base)
 """
 
 from aiogram.utils import markdown as md
@@ -29,7 +30,7 @@ from sqlalchemy.exc import MissingGreenlet
 from sqlalchemy.orm.exc import DetachedInstanceError
 
 
-__version__ = 1.0
+__version__ = 1.1
 
 
 Base = declarative_base()
@@ -43,12 +44,14 @@ class User(Base):
     # basically, it supposed to be a telegram id
     id = Column(BigInteger, primary_key=True, autoincrement=False)
     created_at = Column(DateTime, server_default=func.current_timestamp())
+    # user has blocked the bot [broadcasts are not sent]
+    is_blocked = Column(Boolean, server_default='false')
 
     rubrics = relationship('Rubric', back_populates='user', order_by='Rubric.name')
     links = relationship('Link', back_populates='user', order_by='Link.url')
 
     def __repr__(self):
-        return f'User(id={self.id!r}, created_at={self.created_at!r})'
+        return f'User(id={self.id!r}, created_at={self.created_at!r}, is_blocked={self.is_blocked!r})'
 
 
 class Rubric(Base):
@@ -204,3 +207,32 @@ class Bug(Base):
             f'is shown before: {self.is_shown}',
             sep='\n'
         )
+
+
+class Broadcast(Base):
+    """ Implements db table for broadcasts with their progress [to resume after restart] """
+
+    __tablename__ = 'broadcasts'
+
+    id = Column(BigInteger, primary_key=True)
+    message = Column(String, nullable=False)
+    created_at = Column(DateTime, server_default=func.current_timestamp())
+    finished_at = Column(DateTime)
+
+    # recipients are iterated in order of their ids - all users with id <= last_user_id are processed
+    last_user_id = Column(BigInteger, server_default='0')
+    sent_count = Column(Integer, server_default='0')
+    failed_count = Column(Integer, server_default='0')
+    blocked_count = Column(Integer, server_default='0')
+
+    def __repr__(self):
+        return (
+            f'Broadcast(id={self.id!r}, created_at={self.created_at!r}, finished_at={self.finished_at!r}, '
+            f'last_user_id={self.last_user_id!r}, sent_count={self.sent_count!r}, '
+            f'failed_count={self.failed_count!r}, blocked_count={self.blocked_count!r})'
+        )
+
+    @property
+    def is_finished(self) -> bool:
+        """ Return whether all recipients are processed """
+        return self.finished_at is not None
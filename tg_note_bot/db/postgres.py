@@ -1,8 +1,18 @@
 """
 Contains db connection factories.
+
+Executed SQL queries are counted in metrics [in total and by flows].
+
+.. def:: create_db_engine() -> AsyncEngine
+
+.. data:: engine
+    Engine with the connection pool [it has to be disposed on shutdown]
+.. data:: async_db_sessionmaker
 """
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     create_async_engine
 )
@@ -10,11 +20,18 @@ from sqlalchemy.orm import sessionmaker
 
 from ..settings import (
     DB_CONNECTION_STRING,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_RECYCLE_IN_SECONDS,
+    DB_POOL_SIZE,
     DEBUG_DB
 )
+from ..utils.metrics import (
+    current_flow,
+    metrics
+)
 
 
-__all__ = ['async_db_sessionmaker']
+__all__ = ['create_db_engine', 'engine', 'async_db_sessionmaker']
 
 
 # https://docs.sqlalchemy.org/en/14/orm/session_basics.html
@@ -26,5 +43,21 @@ __all__ = ['async_db_sessionmaker']
 # As these objects are both factories, they can be used by any number of functions and threads simultaneously.
 # # #
 
-engine = create_async_engine(DB_CONNECTION_STRING, echo=DEBUG_DB)
+def create_db_engine() -> AsyncEngine:
+    """ Create engine with the connection pool [connections are not pinged on checkout - it costs round trip] """
+    return create_async_engine(
+        DB_CONNECTION_STRING, echo=DEBUG_DB,
+        pool_size=DB_POOL_SIZE, max_overflow=DB_POOL_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE_IN_SECONDS
+    )
+
+
+def _count_query(*args) -> None:
+    """ Count SQL query [flow is seen by the engine - context of the update is copied into greenlet] """
+    metrics.increment('db_queries')
+    metrics.increment('db_queries_by_flow', current_flow.get())
+
+
+engine = create_db_engine()
+event.listen(engine.sync_engine, 'before_cursor_execute', _count_query)
 async_db_sessionmaker = sessionmaker(engine, class_=AsyncSession)
@@ -1,10 +1,12 @@
 """
 Contains validators.
 
-.. exception:: ValidationError
-    Synonym of the `pydantic.ValidationError`
+Validators are compiled once at import [module-level] and called for the every value:
+`validate_link_url(url)`. Errors are the same as Pydantic ones.
 
-.. func:: get_formatted_error_message(validation_error: pydantic.ValidationError,
+.. exception:: ValidationError(ValueError)
+
+.. func:: get_formatted_error_message(validation_error: ValidationError,
         error_message_prefix: Optional[bool] = True) -> str
 """
 
@@ -12,24 +14,34 @@ from typing import (
     Optional
 )
 
-import pydantic
-
-from .bugs import BugValidator
-from .links import LinkValidator
-from .rubrics import RubricValidator
-
-
-ValidationError = pydantic.ValidationError
+from .bugs import (
+    BugValidator,
+    validate_bug_message
+)
+from .fields import (
+    StringFieldValidator,
+    ValidationError
+)
+from .links import (
+    LinkValidator,
+    validate_link_description,
+    validate_link_url
+)
+from .rubrics import (
+    RubricValidator,
+    validate_rubric_description,
+    validate_rubric_name
+)
 
 
-def get_formatted_error_message(validation_error: pydantic.ValidationError,
+def get_formatted_error_message(validation_error: ValidationError,
                                 error_message_prefix: Optional[bool] = True
                                 ) -> str:
     """
     Return formatted message about validation errors.
 
     :param validation_error: error that was raised on validation
-    :type validation_error: pydantic.ValidationError
+    :type validation_error: ValidationError
     :param error_message_prefix: `Incorrect input!` prefix on the start is included by
     :type error_message_prefix: Optional[bool]
 
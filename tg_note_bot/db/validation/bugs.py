@@ -1,41 +1,22 @@
 """
-Contains validators for rubrics.
+Contains validators for bugs.
 
-.. class:: BugMessage(BaseModel)
+.. data:: validate_bug_message
     Bug message validator
 .. class:: BugValidator
     Bug validators joiner
 """
 
-from pydantic import (
-    BaseModel,
-    BaseConfig,
-    Field
-)
+from .fields import StringFieldValidator
 
 
-BaseConfig.anystr_strip_whitespace = True
-
-
-class BugMessage(BaseModel):
-    bug_message: str = Field(min_length=10, max_length=200)
+validate_bug_message = StringFieldValidator('bug_message', min_length=10, max_length=200)
 
 
 class BugValidator:
     """
     Contains validators for bugs fields.
-    As validation is implemented on Pydantic -> pydantic.ValidationError might be occur during validation.
+    Validators are compiled once [module-level], `ValidationError` might be occur during validation.
     """
 
-    BugMessageValidator = BugMessage
-
-    def validate_bug_message(self, bug_message: str) -> str:
-        """
-        Validate rubric name.
-
-        :raises pydantic.ValidationError: raised if value is incorrect
-        """
-
-        bug_message_validator_instance = self.BugMessageValidator(bug_message=bug_message)
-
-        return bug_message_validator_instance.bug_message
+    validate_bug_message = validate_bug_message
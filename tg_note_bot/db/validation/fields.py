@@ -0,0 +1,123 @@
+"""
+Contains compiled validators of the string fields.
+
+Validator is built once at import [limits and error messages are prepared],
+so validation of the value is the strip and the length comparisons only.
+Errors are the same as Pydantic ones [`errors()` of the `ValidationError` - the same locations and messages].
+
+.. exception:: ValidationError(ValueError)
+    Raised if value of the field is incorrect
+
+.. class:: StringFieldValidator
+    Compiled validator of the string field
+"""
+
+from typing import (
+    Any,
+    Optional
+)
+
+
+__all__ = ['ValidationError', 'StringFieldValidator']
+
+
+class ValidationError(ValueError):
+    """ Implements error of the field validation [interface of the `pydantic.ValidationError` errors] """
+
+    __slots__ = ('_errors',)
+
+    def __init__(self, errors: list[dict[str, Any]]):
+        """
+        :param errors: errors [`loc`, `msg` and `type` of the every error]
+        :type errors: list[dict[str, Any]]
+        """
+
+        self._errors = errors
+
+        super(ValidationError, self).__init__(errors)
+
+    def errors(self) -> list[dict[str, Any]]:
+        """ Errors of the validation """
+        return self._errors
+
+    def __str__(self) -> str:
+        return '\n'.join(f'{error["loc"][0]}\n  {error["msg"]} (type={error["type"]})' for error in self._errors)
+
+
+class StringFieldValidator:
+    """
+    Implements compiled validator of the string field:
+    value is stripped, then its length is checked. Validator is called with value and returns the valid one.
+    """
+
+    __slots__ = ('field', 'min_length', 'max_length', 'is_optional', '_errors')
+
+    def __init__(self, field: str, *,
+                 min_length: Optional[int] = None, max_length: Optional[int] = None, is_optional: bool = False):
+        """
+        :param field: name of the field [location of the error]
+        :type field: str
+        :keyword min_length: min length of the stripped value
+        :type min_length: Optional[int]
+        :keyword max_length: max length of the stripped value
+        :type max_length: Optional[int]
+        :keyword is_optional: `None` is valid value
+        :type is_optional: bool
+        """
+
+        self.field = field
+        self.min_length = min_length
+        self.max_length = max_length
+        self.is_optional = is_optional
+
+        loc = (field,)
+        # error kind: error [prepared once - value is not included into error]
+        self._errors = {
+            'not_none': {'loc': loc, 'msg': 'none is not an allowed value', 'type': 'type_error.none.not_allowed'},
+            'not_str': {'loc': loc, 'msg': 'str type expected', 'type': 'type_error.str'},
+            'min_length': {
+                'loc': loc, 'msg': f'ensure this value has at least {min_length} characters',
+                'type': 'value_error.any_str.min_length', 'ctx': {'limit_value': min_length}
+            },
+            'max_length': {
+                'loc': loc, 'msg': f'ensure this value has at most {max_length} characters',
+                'type': 'value_error.any_str.max_length', 'ctx': {'limit_value': max_length}
+            }
+        }
+
+    def __call__(self, value: Optional[str]) -> Optional[str]:
+        """
+        Validate value.
+
+        :param value: value of the field
+        :type value: Optional[str]
+
+        :return: stripped value
+        :rtype: Optional[str]
+
+        :raises ValidationError: raised if value is incorrect
+        """
+
+        if value.__class__ is not str:
+            if value is None:
+                if self.is_optional:
+                    return None
+                self._raise('not_none')
+            if not isinstance(value, str):
+                self._raise('not_str')
+
+        value = value.strip()
+        length = len(value)
+        if self.min_length is not None and length < self.min_length:
+            self._raise('min_length')
+        if self.max_length is not None and length > self.max_length:
+            self._raise('max_length')
+
+        return value
+
+    def _raise(self, kind: str) -> None:
+        raise ValidationError([dict(self._errors[kind])])
+
+    def __repr__(self) -> str:
+        return (f'{self.__class__.__name__}({self.field!r}, min_length={self.min_length}, '
+                f'max_length={self.max_length}, is_optional={self.is_optional})')
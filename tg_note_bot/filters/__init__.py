@@ -1,3 +1,7 @@
 """
 Contains filters.
+
+.. class:: LinksFilter(Filter)
 """
+
+from .urls import LinksFilter
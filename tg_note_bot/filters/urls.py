@@ -0,0 +1,30 @@
+"""
+Contains filter of the messages with links.
+
+.. class:: LinksFilter(Filter)
+"""
+
+from typing import Union
+
+from aiogram import types
+from aiogram.dispatcher.filters import Filter
+
+from ..utils.urls import extract_links
+
+
+__all__ = ['LinksFilter']
+
+
+class LinksFilter(Filter):
+    """
+    Implements filter of the messages with links [text of the message or caption of the media, forwarded posts too].
+    Extracted links are passed in the handler as `links` [list[ExtractedLink]].
+    """
+
+    async def check(self, message: types.Message) -> Union[bool, dict]:
+        if message.text is not None:
+            links = extract_links(message.text, message.entities)
+        else:
+            links = extract_links(message.caption, message.caption_entities)
+
+        return {'links': links} if links else False
@@ -1,9 +1,18 @@
 """
 Contains handlers.
+
+Handlers are registered in dp by imports of their modules.
+Modules are imported on demand [with db models and validators],
+so processes that do not process updates [ingest] do not pay for them on start.
+
+.. def:: register_handlers() -> None
 """
 
-from .errors import dp
-from .users import dp
+
+__all__ = ['register_handlers']
 
 
-__all__ = ["dp"]
+def register_handlers() -> None:
+    """ Register all handlers in dp [errors handlers go first] """
+    from .errors import dp
+    from .users import dp
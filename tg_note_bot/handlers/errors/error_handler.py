@@ -53,12 +53,13 @@ async def errors_handler(update, exception):
         logging.exception(f'InvalidQueryID: {exception} \nUpdate: {update}')
         return True
 
-    if isinstance(exception, TelegramAPIError):
-        logging.exception(f'TelegramAPIError: {exception} \nUpdate: {update}')
+    # before `TelegramAPIError` - its subclass [sent messages are retried by outbound scheduler]
+    if isinstance(exception, RetryAfter):
+        logging.warning(f'RetryAfter: {exception} \nUpdate: {update}')
         return True
 
-    if isinstance(exception, RetryAfter):
-        logging.exception(f'RetryAfter: {exception} \nUpdate: {update}')
+    if isinstance(exception, TelegramAPIError):
+        logging.exception(f'TelegramAPIError: {exception} \nUpdate: {update}')
         return True
 
     if isinstance(exception, CantParseEntities):
@@ -6,6 +6,7 @@ from .basis import dp
 from .data_managing import dp
 from .rubrics import dp
 from .links import dp
+from .inline_mode import dp
 
 from .admin import dp
 
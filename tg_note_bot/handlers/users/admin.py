@@ -5,25 +5,48 @@ Contains handler for admins.
 .. async:: user_count(message: types.Message) -> None
 .. async:: how_all_bugs(message: types.Message) -> None
 .. async:: show_unwatched_bugs(message: types.Message) -> None
+.. async:: show_metrics(message: types.Message) -> None
+.. async:: start_broadcast(message: types.Message) -> None
+.. async:: resume_broadcast(message: types.Message) -> None
+
+.. const:: METRICS_TOP_ITEMS
 """
 
 import logging
+from typing import (
+    Callable,
+    Hashable,
+    TypeVar
+)
 
 from aiogram import types
 from aiogram.dispatcher.filters import IDFilter
 from aiogram.utils import markdown as md
 
 from ... import db
+from ...db.models import Broadcast
 from ...loader import (
     dp,
     async_db_sessionmaker
 )
-from ...settings import ADMINS
+from ...settings import (
+    ADMINS,
+    NAVIGATION_MODE
+)
+from ...utils import broadcasting
+from ...utils.metrics import metrics
+from ...utils.timers import timers
 
 
 logger = logging.getLogger(__name__)
 
 
+# items of the every list of the metrics [by methods, flows, handlers] - message has to fit in the Telegram limit
+METRICS_TOP_ITEMS = 15
+
+_Value = TypeVar('_Value')
+
+
 @dp.message_handler(IDFilter(ADMINS), commands=['admin_commands'])
 async def admin_help_command(message: types.Message) -> None:
     """ Show admin commands """
@@ -34,7 +57,10 @@ async def admin_help_command(message: types.Message) -> None:
                 ('/admin_commands', 'show this message;'),
                 ('/admin_user_count', 'fetch users quantity;'),
                 ('/admin_all_bugs', 'fetch all bugs;'),
-                ('/admin_unwatched_bugs', 'fetch unwatched bugs.'),
+                ('/admin_unwatched_bugs', 'fetch unwatched bugs;'),
+                ('/admin_metrics', 'show metrics: Bot API, FSM storage, throttling, SQL queries, load;'),
+                ('/admin_broadcast [message]', 'send message to all users;'),
+                ('/admin_broadcast_resume', 'resume the last unfinished broadcast.'),
             ]
         ],
         sep='\n'
@@ -97,3 +123,167 @@ async def show_unwatched_bugs(message: types.Message) -> None:
 
     async with async_db_sessionmaker() as session:
         await db.mark_all_bugs_as_watched(session)
+
+
+@dp.message_handler(IDFilter(ADMINS), commands=['admin_metrics'])
+async def show_metrics(message: types.Message) -> None:
+    """ Show metrics: one message per section, lists are cut to the top items """
+    sections = (
+        _format_api_metrics, _format_storage_metrics, _format_throttling_metrics, _format_db_metrics,
+        _format_load_metrics
+    )
+    for format_section in sections:
+        await message.answer(format_section())
+
+
+def _format_top(items: dict[Hashable, _Value], format_item: Callable[[Hashable, _Value], str],
+                order_key: Callable[[tuple[Hashable, _Value]], float]) -> list[str]:
+    """ Format top items of the list [the rest is counted] """
+    lines = [format_item(label, value) for label, value in sorted(items.items(), key=order_key)[:METRICS_TOP_ITEMS]]
+    if len(items) > METRICS_TOP_ITEMS:
+        lines.append(f'... and {len(items) - METRICS_TOP_ITEMS} more')
+
+    return lines
+
+
+def _format_per_run(flow_runs: dict[Hashable, int]) -> Callable[[Hashable, int], str]:
+    """ Return formatter of the quantity by flow [quantity / runs = quantity per run] """
+    def format_item(flow: Hashable, quantity: int) -> str:
+        if flow_runs.get(flow):
+            return f'{md.quote_html(flow)}: {quantity} / {flow_runs[flow]} = {quantity / flow_runs[flow]:.2f}'
+        return f'{md.quote_html(flow)}: {quantity}'
+
+    return format_item
+
+
+def _format_api_metrics() -> str:
+    """ Bot API calls in total, by methods and by flows [handlers], latency of the calls by methods """
+    flow_runs = metrics.get_labeled('flow_runs')
+
+    return md.text(
+        md.hbold(f'Bot API calls [navigation mode: {NAVIGATION_MODE}]:'),
+        f'total: {metrics.get("api_calls")}',
+        f'delayed by RetryAfter: {metrics.get("api_retry_after")}',
+        f'queued now: {dp.bot.send_scheduler.queued_requests if dp.bot.send_scheduler else 0}',
+        md.hbold('By methods:'),
+        *_format_top(
+            metrics.get_labeled('api_calls_by_method'), lambda method, calls: f'{method}: {calls}',
+            lambda item: -item[1]
+        ),
+        md.hbold('By flows [calls / runs = calls per run]:'),
+        *_format_top(metrics.get_labeled('api_calls_by_flow'), _format_per_run(flow_runs), lambda item: -item[1]),
+        md.hbold('Latency by methods [mean / p50 / p95 / max, ms]:'),
+        *_format_top(
+            metrics.get_timings('api_latency_by_method'),
+            lambda method, latency: (
+                f'{method}: {latency.mean * 1000:.0f} / {latency.p50 * 1000:.0f} / '
+                f'{latency.p95 * 1000:.0f} / {latency.max * 1000:.0f}'
+            ),
+            lambda item: -item[1].p95
+        ),
+        sep='\n'
+    )
+
+
+def _format_storage_metrics() -> str:
+    """ FSM storage round-trips saved by the in-process cache and by the writes batching, evicted FSM states """
+    storage_cache_hits = metrics.get('storage_cache_hits')
+    updates = metrics.get('updates')
+    storage_batched_writes = metrics.get('storage_batched_writes')
+    storage_batches_flushed = metrics.get('storage_batches_flushed')
+
+    return md.text(
+        md.hbold('FSM storage cache [hit - saved redis round-trip]:'),
+        f'hits: {storage_cache_hits}, misses: {metrics.get("storage_cache_misses")}',
+        f'saved round-trips per update: {storage_cache_hits / updates if updates else 0:.2f} [{updates} updates]',
+        md.hbold('FSM storage writes batching [batch - one redis transaction]:'),
+        f'writes / batches = writes per batch: {storage_batched_writes} / {storage_batches_flushed} = '
+        f'{storage_batched_writes / storage_batches_flushed if storage_batches_flushed else 0:.2f}',
+        f'abandoned states evicted: {metrics.get("fsm_states_evicted")}',
+        sep='\n'
+    )
+
+
+def _format_throttling_metrics() -> str:
+    """ Throttling calls passed by the process and sent to redis, taps of the inline keyboards answered at once """
+    return md.text(
+        md.hbold('Throttling [local pass - saved redis round-trip]:'),
+        f'local passes: {metrics.get("throttling_local_passes")}, '
+        f'escalated to redis: {metrics.get("throttling_escalations")}',
+        f'reconciled passes: {metrics.get("throttling_reconciled_passes")}',
+        f'taps coalesced: {metrics.get("callback_taps_coalesced")}, '
+        f'throttled: {metrics.get("callback_taps_throttled")}',
+        sep='\n'
+    )
+
+
+def _format_db_metrics() -> str:
+    """ SQL queries in total and by flows """
+    return md.text(
+        md.hbold('SQL queries by flows [queries / runs = queries per run]:'),
+        f'total: {metrics.get("db_queries")}',
+        *_format_top(
+            metrics.get_labeled('db_queries_by_flow'), _format_per_run(metrics.get_labeled('flow_runs')),
+            lambda item: -item[1]
+        ),
+        sep='\n'
+    )
+
+
+def _format_load_metrics() -> str:
+    """ Event loop lag, shed low-priority handlers, timers of the delayed notifications """
+    handlers_shed = metrics.get_labeled('handlers_shed')
+
+    return md.text(
+        md.hbold('Load shedding [event loop lag - mean / p50 / p95 / max, ms]:'),
+        *[
+            f'lag: {lag.mean * 1000:.0f} / {lag.p50 * 1000:.0f} / {lag.p95 * 1000:.0f} / {lag.max * 1000:.0f}'
+            for lag in metrics.get_timings('event_loop_lag').values()
+        ],
+        f'shed handlers: {sum(handlers_shed.values())}',
+        *_format_top(handlers_shed, lambda handler, shed: f'{md.quote_html(handler)}: {shed}', lambda item: -item[1]),
+        md.hbold('Timers [delayed notifications]:'),
+        f'pending: {timers.pending}, running: {timers.running}',
+        f'scheduled: {metrics.get("timers_scheduled")}, replaced: {metrics.get("timers_replaced")}',
+        sep='\n'
+    )
+
+
+@dp.message_handler(IDFilter(ADMINS), commands=['admin_broadcast'])
+async def start_broadcast(message: types.Message) -> None:
+    """ Start broadcast of the message [command arguments with formatting] to all users """
+    if not message.get_args():
+        await message.answer('Pass the message after the command: /admin_broadcast [message]')
+        return
+    if broadcasting.is_broadcast_running():
+        await message.answer('Another broadcast is running. Wait for its report.')
+        return
+
+    # command is not formatted - formatting of the arguments is kept
+    _, broadcast_message = message.html_text.split(maxsplit=1)
+    async with async_db_sessionmaker() as session:
+        broadcast_id = await db.add_broadcast(session, Broadcast(message=broadcast_message))
+
+    broadcasting.start_broadcast(message.bot, broadcast_id, message.chat.id)
+    await message.answer(f'Broadcast #{broadcast_id} has been started. Report will be sent on finish.')
+
+
+@dp.message_handler(IDFilter(ADMINS), commands=['admin_broadcast_resume'])
+async def resume_broadcast(message: types.Message) -> None:
+    """ Resume the last unfinished broadcast [e.g. after restart] """
+    if broadcasting.is_broadcast_running():
+        await message.answer('Another broadcast is running. Wait for its report.')
+        return
+
+    async with async_db_sessionmaker() as session:
+        broadcast = await db.fetch_last_unfinished_broadcast(session)
+
+    if broadcast is None:
+        await message.answer('All broadcasts have been finished.')
+        return
+
+    broadcasting.start_broadcast(message.bot, broadcast.id, message.chat.id)
+    await message.answer(
+        f'Broadcast #{broadcast.id} has been resumed after user {broadcast.last_user_id} '
+        f'[sent: {broadcast.sent_count}].'
+    )
@@ -7,6 +7,10 @@ Contains basis user handlers.
     Answer on help command
 .. async:: command_cancel(message: types.Message, state: FSMContext) -> None
     Cancel current action - reset state
+.. async:: resume_expired_conversation(message: types.Message, state: FSMContext) -> None
+    Resume user at main keyboard after the abandoned conversation has been evicted
+.. async:: resume_expired_conversation_by_call(call: types.CallbackQuery, state: FSMContext) -> None
+    Resume user at main keyboard after the abandoned conversation has been evicted [on the old keyboard call]
 .. async:: command_bug(message: types.Message) -> None
     Handle bug report from user
 """
@@ -24,9 +28,9 @@ from aiogram.utils import markdown as md
 from ... import db
 from ...db import (
     get_formatted_error_message,
-    BugValidator,
     ValidationError,
-    UserAlreadyInDbError
+    UserAlreadyInDbError,
+    validate_bug_message
 )
 from ...db.models import Bug
 from ...db.models import User
@@ -36,6 +40,7 @@ from ...loader import (
     async_db_sessionmaker
 )
 from ...middlewares.throttling import rate_limit
+from ...states import ExpiredStatesGroup
 from ...settings import (
     THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_BUG_COMMAND,
     STICKER_SMILE_WITH_GLASSES,
@@ -58,6 +63,10 @@ async def command_start(message: types.Message):
     except UserAlreadyInDbError:
         logger.debug(f'User with <id={user_tg_id}> has already been in the database.')
 
+        # user might return after blocking of the bot
+        async with async_db_sessionmaker() as session:
+            await db.unmark_user_as_blocked(session, user_tg_id)
+
         text = f'👋 Hello, friend! Do you wanna add something new ? '
     else:
         logger.debug(f'User with <id={user_tg_id}> has been added in the database.')
@@ -135,6 +144,23 @@ async def command_cancel(message: types.Message, state: FSMContext):
     await message.answer('❌ The current action has canceled!', reply_markup=keyboard)
 
 
+@dp.message_handler(content_types=types.ContentType.ANY, state=ExpiredStatesGroup.expired)
+async def resume_expired_conversation(message: types.Message, state: FSMContext):
+    """ Resume user at main keyboard after the abandoned conversation has been evicted """
+    await state.finish()
+
+    keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
+    await message.answer('⌛ The previous action has been dropped after long inactivity. Let`s start over!',
+                         reply_markup=keyboard)
+
+
+@dp.callback_query_handler(state=ExpiredStatesGroup.expired)
+async def resume_expired_conversation_by_call(call: types.CallbackQuery, state: FSMContext):
+    """ Resume user at main keyboard after the abandoned conversation has been evicted [on the old keyboard call] """
+    await call.answer()
+    await resume_expired_conversation(call.message, state)
+
+
 @dp.message_handler(commands=['bug'])
 @rate_limit(THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_BUG_COMMAND)
 async def command_bug(message: types.Message):
@@ -142,7 +168,7 @@ async def command_bug(message: types.Message):
     bug_message = message.get_args()
 
     try:
-        bug_message = BugValidator().validate_bug_message(bug_message)
+        bug_message = validate_bug_message(bug_message)
     except ValidationError as error:
         await message.answer(get_formatted_error_message(error))
     else:
@@ -33,12 +33,13 @@ from ...loader import (
     async_db_sessionmaker
 )
 from ...states import ManageSeriousDeletingStatesGroup
+from ...utils.cache import user_data_versions
 
 
 logger = logging.getLogger(__name__)
 
 
-# Used Redis FSM storage - values must be JSON-serializable ------------------------------------------------------------
+# Used Redis FSM storage - values must be serializable by JSON and msgpack ---------------------------------------------
 KEY_DELETE_ALL_LINKS = 'DELETE_ALL_LINKS'
 KEY_DELETE_ALL_RUBRICS = 'DELETE_ALL_RUBRICS'
 KEY_DELETE_ALL_RUBRIC_LINKS = 'DELETE_ALL_RUBRIC_LINKS'
@@ -183,6 +184,7 @@ async def manage_deleting__execute_after_confirmation(message: types.Message, st
 
     async with async_db_sessionmaker() as session:
         await db_function(session, user_id)
+    user_data_versions.bump(user_id)
 
     keyboard = ManageSeriousDeletingReplyKeyboard(one_time_keyboard=True)
     await message.answer(text, reply_markup=keyboard)
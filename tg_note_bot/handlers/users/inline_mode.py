@@ -0,0 +1,166 @@
+"""
+Contains inline mode handlers [links searching from any chat].
+
+Answer has to be fast enough to be shown while user types, so:
+    * results are limited by `INLINE_QUERY_RESULTS_LIMIT`;
+    * results are cached by Telegram [personally] for `INLINE_QUERY_CACHE_TIME_IN_SECONDS`;
+    * found links are cached on the bot side by (user, user data version, query) -
+      if all links matched by the query prefix are cached, they are filtered and ordered in memory
+      as `db.search_links` does without db query.
+
+.. async:: search_links(inline_query: types.InlineQuery) -> None
+
+.. async:: find_links(user_id: int, query: str) -> list[Link]
+.. def:: build_link_article(link: Link) -> types.InlineQueryResultArticle
+"""
+
+import datetime
+import logging
+import time
+
+from aiogram import types
+from aiogram.utils import markdown as md
+
+from ... import db
+from ...db.models import Link
+from ...loader import (
+    dp,
+    async_db_sessionmaker
+)
+from ...settings import (
+    INLINE_QUERY_RESULTS_LIMIT,
+    INLINE_QUERY_CACHE_TIME_IN_SECONDS,
+    INLINE_QUERY_SERVER_CACHE_SIZE,
+    INLINE_QUERY_SERVER_CACHE_TTL_IN_SECONDS
+)
+from ...utils.cache import (
+    LRUCache,
+    user_data_versions
+)
+from ...utils.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+# (user id, user data version, query): (found links, are all matched links found)
+found_links_cache = LRUCache(INLINE_QUERY_SERVER_CACHE_SIZE, ttl=INLINE_QUERY_SERVER_CACHE_TTL_IN_SECONDS)
+
+
+def _does_link_match_query(link: Link, query: str) -> bool:
+    """ Check the link as `db.search_links` does [query is lowered] """
+    return query in link.url.lower() or (link.description is not None and query in link.description.lower())
+
+
+def _does_url_start_with_query(link: Link, query: str) -> bool:
+    """ Check whether short url [without scheme and `www.`] starts with query as `db.search_links` does """
+    url = link.url.lower()
+    return any(url.startswith(f'{url_prefix}{query}') for url_prefix in db.SHORT_URL_PREFIXES)
+
+
+def _order_links(links: list[Link], query: str) -> list[Link]:
+    """ Order links as `db.search_links` does: url starts with query, then the newest [NULL - first] """
+    links = sorted(links, key=lambda link: link.created_at or datetime.datetime.max, reverse=True)
+    links.sort(key=lambda link: _does_url_start_with_query(link, query), reverse=True)
+
+    return links
+
+
+async def find_links(user_id: int, query: str) -> list[Link]:
+    """
+    Find user links by query with considering of the cached results.
+
+    :param user_id: owner of the links
+    :type user_id: int
+    :param query: searched substring
+    :type query: str
+
+    :return: found links
+    :rtype: list[Link]
+    """
+
+    query = query.strip().lower()
+    version = user_data_versions.get(user_id)
+
+    cached = found_links_cache.get((user_id, version, query))
+    if cached is not None:
+        metrics.increment('inline_query_cache', 'hit')
+        links, _ = cached
+        return links
+
+    # result of the prefix contains all results of the query if all matched links have been found by the prefix
+    for prefix_length in range(len(query) - 1, -1, -1):
+        cached = found_links_cache.get((user_id, version, query[:prefix_length]))
+
+        if cached is not None:
+            prefix_links, are_all_links_found = cached
+
+            if are_all_links_found:
+                metrics.increment('inline_query_cache', 'prefix_hit')
+                links = _order_links([link for link in prefix_links if _does_link_match_query(link, query)], query)
+                found_links_cache.set((user_id, version, query), (links, True))
+                return links
+
+            break
+
+    metrics.increment('inline_query_cache', 'miss')
+
+    async with async_db_sessionmaker() as session:
+        links = await db.search_links(session, user_id, query, limit=INLINE_QUERY_RESULTS_LIMIT)
+
+    found_links_cache.set((user_id, version, query), (links, len(links) < INLINE_QUERY_RESULTS_LIMIT))
+
+    return links
+
+
+def build_link_article(link: Link) -> types.InlineQueryResultArticle:
+    """
+    Build inline query result for the link.
+
+    :param link: link loaded with rubric
+    :type link: Link
+
+    :return: inline query result
+    :rtype: types.InlineQueryResultArticle
+    """
+
+    rubric_name = link.rubric.name if link.rubric else '🖤'
+
+    if link.description:
+        message_text = md.text(md.quote_html(link.description), md.quote_html(link.url), sep='\n')
+    else:
+        message_text = md.quote_html(link.url)
+
+    return types.InlineQueryResultArticle(
+        id=str(link.id),
+        title=link.description or link.short_url,
+        description=f'{rubric_name} | {link.short_url}',
+        # Telegram accepts only urls with scheme
+        url=link.url if link.url.startswith(('http://', 'https://')) else None,
+        hide_url=True,
+        input_message_content=types.InputTextMessageContent(message_text, disable_web_page_preview=False)
+    )
+
+
+@dp.inline_handler(state='*')
+async def search_links(inline_query: types.InlineQuery) -> None:
+    """ Answer with the user links found by query """
+    started_at = time.perf_counter()
+
+    user_id = inline_query.from_user.id
+
+    links = await find_links(user_id, inline_query.query)
+
+    results = [build_link_article(link) for link in links]
+
+    if results:
+        await inline_query.answer(
+            results, cache_time=INLINE_QUERY_CACHE_TIME_IN_SECONDS, is_personal=True
+        )
+    else:
+        await inline_query.answer(
+            results, cache_time=INLINE_QUERY_CACHE_TIME_IN_SECONDS, is_personal=True,
+            switch_pm_text='🕳 No links found. Add links in the bot', switch_pm_parameter='inline_search'
+        )
+
+    logger.debug(f'Inline query of the user <{user_id}> answered in {time.perf_counter() - started_at:.3f} s')
@@ -9,8 +9,9 @@ Contains user links handlers.
 .. async:: see_links_by_rubric__catch_message(message: types.Message) -> None
 .. async:: see_links_by_rubric__handle_rubric_data(call: types.CallbackQuery, callback_data: dict) -> None
 
-.. async:: add_link__finish(user_id: int, message: types.Message, state: FSMContext) -> None
-.. async:: add_link__ask_for_rubric(message: types.Message, state: FSMContext) -> None
+.. async:: add_link__finish(user_id: int, message: types.Message, state: FSMContext,
+        acknowledgement: Optional[str] = None) -> None
+.. async:: add_link__ask_for_rubric(message: types.Message, state: FSMContext, acknowledgement: str) -> None
 .. async:: add_link__catch_message(message: types.Message) -> None
 .. async:: add_link__handle_link_url(message: types.Message, state: FSMContext) -> None
 .. async:: add_link__handle_empty_link_description(message: types.Message, state: FSMContext) -> None
@@ -23,6 +24,7 @@ Contains user links handlers.
 """
 
 import logging
+from typing import Optional
 
 from aiogram import types
 from aiogram.dispatcher import FSMContext
@@ -35,14 +37,15 @@ from ...db.models import (
 )
 from ...db.validation import (
     ValidationError,
-    LinkValidator,
-    get_formatted_error_message
+    get_formatted_error_message,
+    validate_link_description,
+    validate_link_url
 )
 from ...keyboards.inline import (
     LINK_CB,
-    LinkListInlineKeyboard,
     RUBRIC_CB,
-    RubricListInlineKeyboard
+    get_link_list_inline_keyboard,
+    get_rubric_list_inline_keyboard
 )
 from ...keyboards.reply import (
     EmptyValueReplyKeyboard,
@@ -52,8 +55,19 @@ from ...loader import (
     dp,
     async_db_sessionmaker
 )
-from ...settings import EMPTY_VALUE
+from ...middlewares.load_shedding import low_priority
+from ...middlewares.throttling import rate_limit
+from ...settings import (
+    EMPTY_VALUE,
+    THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK,
+    THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_RUBRIC_LINKS_CALLBACK
+)
 from ...states import LinkAddingStatesGroup
+from ...utils.cache import user_data_versions
+from ...utils.navigation import (
+    answer_with_acknowledgement,
+    show_callback_result
+)
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +82,7 @@ LINK_CB_ACTION_FOR_LINK_DUMPING = 'LINK_DUMPING'
 
 # See all links --------------------------------------------------------------------------------------------------------
 @dp.message_handler(text=LinksAndRubricsMainReplyKeyboard.text_for_button_to_see_links)
+@low_priority
 async def see_links(message: types.Message) -> None:
     """ Answer with list of the links"""
     user_id = message.from_user.id
@@ -99,12 +114,10 @@ async def dump_link__catch_message(message: types.Message) -> None:
     """ Trigger om message. Ask to choose link """
     user_id = message.from_user.id
 
-    async with async_db_sessionmaker() as session:
-        links = await db.fetch_all_links(session, user_id, with_rubric=True)
+    keyboard = await get_link_list_inline_keyboard(user_id, LINK_CB_ACTION_FOR_LINK_DUMPING)
 
-    if links:
+    if keyboard:
         text = '❔ Choose one of the list below:'
-        keyboard = LinkListInlineKeyboard(links, action=LINK_CB_ACTION_FOR_LINK_DUMPING, row_width=1)
     else:
         text = '🕳 You don`t have any links'
         keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
@@ -115,8 +128,6 @@ async def dump_link__catch_message(message: types.Message) -> None:
 @dp.callback_query_handler(LINK_CB.filter(action=LINK_CB_ACTION_FOR_LINK_DUMPING))
 async def dump_link__handle_link_data(call: types.CallbackQuery, callback_data: dict) -> None:
     """ Handle link data. Dump link """
-    await call.message.delete_reply_markup()
-
     link_id = int(callback_data['id'])
 
     async with async_db_sessionmaker() as session:
@@ -128,7 +139,7 @@ async def dump_link__handle_link_data(call: types.CallbackQuery, callback_data:
         sep='\n'
     )
     keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
-    await call.message.answer(text, reply_markup=keyboard)
+    await show_callback_result(call, text, menu_markup=keyboard)
 
     await call.answer()
 # ----------------------------------------------------------------------------------------------------------------------
@@ -140,28 +151,22 @@ async def see_links_by_rubric__catch_message(message: types.Message) -> None:
     """ Trigger om message. Ask to choose rubric """
     user_id = message.from_user.id
 
-    async with async_db_sessionmaker() as session:
-        does_user_have_rubrics = await db.count_user_rubrics(session, user_id)
-
-        if does_user_have_rubrics:
-            rubrics = await db.fetch_all_rubrics(session, user_id)
+    keyboard = await get_rubric_list_inline_keyboard(user_id, RUBRIC_CB_ACTION_FOR_LINK_BY_RUBRIC_SELECTING)
 
-            text = '❔ Choose one of the list below:'
-            keyboard = RubricListInlineKeyboard(
-                rubrics, action=RUBRIC_CB_ACTION_FOR_LINK_BY_RUBRIC_SELECTING, row_width=1
-            )
-        else:
-            text = '🕳 You don`t have any rubric.'
-            keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
+    if keyboard:
+        text = '❔ Choose one of the list below:'
+    else:
+        text = '🕳 You don`t have any rubric.'
+        keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
 
-        await message.answer(text, reply_markup=keyboard)
+    await message.answer(text, reply_markup=keyboard)
 
 
 @dp.callback_query_handler(RUBRIC_CB.filter(action=RUBRIC_CB_ACTION_FOR_LINK_BY_RUBRIC_SELECTING))
+@rate_limit(THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_RUBRIC_LINKS_CALLBACK)
+@low_priority
 async def see_links_by_rubric__handle_rubric_data(call: types.CallbackQuery, callback_data: dict) -> None:
     """ Answer with list of the links sorted by rubric """
-    await call.message.delete_reply_markup()
-
     rubric_id = int(callback_data['id'])
 
     async with async_db_sessionmaker() as session:
@@ -173,14 +178,15 @@ async def see_links_by_rubric__handle_rubric_data(call: types.CallbackQuery, cal
         text = '🕳 Rubric is empty! It`s no one link is related with this rubric.'
 
     keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
-    await call.message.answer(text, reply_markup=keyboard, disable_web_page_preview=True)
+    await show_callback_result(call, text, menu_markup=keyboard, disable_web_page_preview=True)
 
     await call.answer()
 # ----------------------------------------------------------------------------------------------------------------------
 
 
 # Add link -------------------------------------------------------------------------------------------------------------
-async def add_link__finish(user_id: int, message: types.Message, state: FSMContext) -> None:
+async def add_link__finish(user_id: int, message: types.Message, state: FSMContext,
+                           acknowledgement: Optional[str] = None) -> None:
     """
     Add link to db. Finish state
 
@@ -190,8 +196,8 @@ async def add_link__finish(user_id: int, message: types.Message, state: FSMConte
     :type message: types.Message
     :param state: to finish
     :type state: FSMContext
-    :param link_data: for link instance creation
-    :type link_data: dict
+    :param acknowledgement: acknowledgement of the last step that will be sent with the result
+    :type acknowledgement: Optional[str]
 
     :return: None
     :rtype: None
@@ -202,32 +208,34 @@ async def add_link__finish(user_id: int, message: types.Message, state: FSMConte
 
     async with async_db_sessionmaker() as session:
         await db.add_link(session, link)
+    user_data_versions.bump(user_id)
 
     text = md.hbold('✅ The new link has been added!')
     keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
-    await message.answer(text, reply_markup=keyboard)
+    if acknowledgement:
+        await answer_with_acknowledgement(message, acknowledgement, text, reply_markup=keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard)
 
     await state.finish()
 
 
-async def add_link__ask_for_rubric(message: types.Message, state: FSMContext) -> None:
+async def add_link__ask_for_rubric(message: types.Message, state: FSMContext, acknowledgement: str) -> None:
     """ Ask for rubric on link adding | used to avoid repeating in handlers below """
     user_id = message.from_user.id
 
-    async with async_db_sessionmaker() as session:
-        rubrics = await db.fetch_all_rubrics(session, user_id)
+    keyboard = await get_rubric_list_inline_keyboard(user_id, RUBRIC_CB_ACTION_FOR_LINK_ADDING)
 
-    if rubrics:
+    if keyboard:
         text = '❔ Choose one of the rubrics [🆓 optional]'
-        keyboard = RubricListInlineKeyboard(rubrics, action=RUBRIC_CB_ACTION_FOR_LINK_ADDING, row_width=1)
-        await message.answer(text, reply_markup=keyboard)
+        await answer_with_acknowledgement(message, acknowledgement, text, reply_markup=keyboard)
 
         await LinkAddingStatesGroup.next()
     else:
         text = '💿 You don`t have any rubric to pin link.\nThis link will be added in (🖤) non-rubric category!'
         # remove empty value keyboard
         keyboard = types.ReplyKeyboardRemove()
-        await message.answer(text, reply_markup=keyboard)
+        await answer_with_acknowledgement(message, acknowledgement, text, reply_markup=keyboard)
 
         async with state.proxy() as data:
             data['rubric_id'] = None
@@ -251,18 +259,17 @@ async def add_link__handle_link_url(message: types.Message, state: FSMContext) -
     link_url = message.text
 
     try:
-        link_url = LinkValidator().validate_link_url(link_url)
+        link_url = validate_link_url(link_url)
     except ValidationError as error:
         await message.answer(get_formatted_error_message(error))
     else:
         async with state.proxy() as data:
             data['url'] = link_url
-        await message.answer('👌 Link url has been accepted.')
 
         text = '📝 Input link description [🆓 optional].'
         # `one_time_keyboard` is omitted - it`ll be used few times [for description and rubric]
         keyboard = EmptyValueReplyKeyboard(resize_keyboard=True)
-        await message.answer(text, reply_markup=keyboard)
+        await answer_with_acknowledgement(message, '👌 Link url has been accepted.', text, reply_markup=keyboard)
 
         await LinkAddingStatesGroup.next()
 
@@ -272,9 +279,8 @@ async def add_link__handle_empty_link_description(message: types.Message, state:
     """ Handle empty link description. Ask to choose rubric """
     async with state.proxy() as data:
         data['description'] = None
-    await message.answer('👌 Empty value has been accepted as link description.')
 
-    await add_link__ask_for_rubric(message, state)
+    await add_link__ask_for_rubric(message, state, '👌 Empty value has been accepted as link description.')
 
 
 @dp.message_handler(state=LinkAddingStatesGroup.handling_of_link_description)
@@ -283,15 +289,14 @@ async def add_link__handle_link_description(message: types.Message, state: FSMCo
     link_description = message.text
 
     try:
-        link_description = LinkValidator().validate_link_description(link_description)
+        link_description = validate_link_description(link_description)
     except ValidationError as error:
         await message.answer(get_formatted_error_message(error))
     else:
         async with state.proxy() as data:
             data['description'] = link_description
-        await message.answer('👌 Link description has been accepted.')
 
-        await add_link__ask_for_rubric(message, state)
+        await add_link__ask_for_rubric(message, state, '👌 Link description has been accepted.')
 
 
 @dp.message_handler(text=EMPTY_VALUE, state=LinkAddingStatesGroup.handling_of_link_rubric)
@@ -302,9 +307,7 @@ async def add_link__handle_empty_link_rubric(message: types.Message, state: FSMC
     async with state.proxy() as data:
         data['rubric_id'] = None
 
-    await message.answer('👌 Empty value has been accepted as link rubric.')
-
-    await add_link__finish(user_id, message, state)
+    await add_link__finish(user_id, message, state, '👌 Empty value has been accepted as link rubric.')
 
 
 @dp.callback_query_handler(
@@ -313,13 +316,11 @@ async def add_link__handle_empty_link_rubric(message: types.Message, state: FSMC
 )
 async def add_link__handle_link_rubric(call: types.CallbackQuery, callback_data: dict, state: FSMContext) -> None:
     """ Handle link rubric. Last state -> adding link to db. """
-    await call.message.delete_reply_markup()
-
     user_id = call.from_user.id
 
     async with state.proxy() as data:
         data['rubric_id'] = int(callback_data['id'])
-    await call.message.answer('👌 Link rubric has been accepted.')
+    await show_callback_result(call, '👌 Link rubric has been accepted.')
 
     await call.answer()
 
@@ -333,12 +334,10 @@ async def delete_link__catch_message(message: types.Message) -> None:
     """ Trigger on link deleting message """
     user_id = message.from_user.id
 
-    async with async_db_sessionmaker() as session:
-        links = await db.fetch_all_links(session, user_id, with_rubric=True)
+    keyboard = await get_link_list_inline_keyboard(user_id, LINK_CB_ACTION_FOR_LINK_DELETING)
 
-    if links:
+    if keyboard:
         text = '❔ Choose one of the list below:'
-        keyboard = LinkListInlineKeyboard(links, action=LINK_CB_ACTION_FOR_LINK_DELETING, row_width=1)
     else:
         text = '🕳 You don`t have any links'
         keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
@@ -347,18 +346,19 @@ async def delete_link__catch_message(message: types.Message) -> None:
 
 
 @dp.callback_query_handler(LINK_CB.filter(action=LINK_CB_ACTION_FOR_LINK_DELETING))
+@rate_limit(THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK)
 async def delete_link__handle_link_data(call: types.CallbackQuery, callback_data: dict):
     """ Handle link data. Delete link """
-    await call.message.delete_reply_markup()
-
+    user_id = call.from_user.id
     link_id = int(callback_data['id'])
 
     async with async_db_sessionmaker() as session:
         await db.delete_one_link(session, link_id)
+    user_data_versions.bump(user_id)
 
     text = f'✅ The link has been deleted!'
     keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
-    await call.message.answer(text, reply_markup=keyboard, disable_web_page_preview=True)
+    await show_callback_result(call, text, menu_markup=keyboard, disable_web_page_preview=True)
 
     await call.answer()
 # ----------------------------------------------------------------------------------------------------------------------
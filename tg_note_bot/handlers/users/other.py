@@ -1,71 +1,77 @@
 """
 Contains handlers that have not caught before.
 
-.. async:: handle_link_in_message(message: types.Message, regexp: re.Match) -> None
+.. async:: handle_links_in_message(message: types.Message, links: list[ExtractedLink]) -> None
 .. async:: catch_missed_text_message(message: types.Message) -> None
 .. async:: catch_voice(message: types.Message) -> None
 .. async:: catch_unhandled_message(message: types.Message) -> None
 """
 
 import logging
-import re
 
 from aiogram import types
-from aiogram.dispatcher.filters import Regexp
 from aiogram.utils import markdown as md
 
 from ... import db
 from ...db import (
     get_formatted_error_message,
     ValidationError,
-    LinkValidator
+    validate_link_description,
+    validate_link_url
 )
 from ...db.models import Link
+from ...filters import LinksFilter
 from ...loader import (
     dp,
     async_db_sessionmaker
 )
 from ...settings import STICKER_CONDEMNING_FROG
-from ...utils.regexp import url_regexp
+from ...utils.cache import user_data_versions
+from ...utils.urls import ExtractedLink
 
 
 logger = logging.getLogger(__name__)
 
 
-@dp.message_handler(Regexp(url_regexp))
-async def handle_link_in_message(message: types.Message, regexp: re.Match) -> None:
-    """ Catch link in message """
+@dp.message_handler(LinksFilter(), content_types=types.ContentType.ANY)
+async def handle_links_in_message(message: types.Message, links: list[ExtractedLink]) -> None:
+    """ Catch links in message [all of them, forwarded posts and captions too] """
     user_id = message.from_user.id
-    message_text = message.text
-
-    url = regexp.group()
-    start, end = regexp.start(), regexp.end()
-
-    description = message_text[:start] + message_text[end:]
-    description = description if description else None
-
-    link_validator = LinkValidator()
-
-    try:
-        url, description = link_validator.validate_link_url(url), link_validator.validate_link_description(description)
-    except ValidationError as error:
-        text = f'I`ve caught your link but validation error has occured:\n{get_formatted_error_message(error)}'
-        await message.answer(text)
-    else:
-        link = Link(url=url, description=description, user_id=user_id)
-        link_repr = link.short_url_with_description
 
+    valid_links, error_texts = [], []
+    for extracted_link in links:
+        try:
+            url = validate_link_url(extracted_link.url)
+            description = validate_link_description(extracted_link.description)
+        except ValidationError as error:
+            error_texts.append(
+                f'{md.quote_html(extracted_link.url)}\n{get_formatted_error_message(error, error_message_prefix=False)}'
+            )
+        else:
+            valid_links.append(Link(url=url, description=description, user_id=user_id))
+
+    if valid_links:
         async with async_db_sessionmaker() as session:
-            await db.add_link(session, link)
+            await db.add_links(session, valid_links)
+        user_data_versions.bump(user_id)
 
         text = md.text(
-            '✅ I`ve caught your link:',
-            link_repr,
+            '✅ I`ve caught your link:' if len(valid_links) == 1 else '✅ I`ve caught your links:',
+            *[link.short_url_with_description for link in valid_links],
             'and added in non-rubric category. 😉',
             sep='\n'
         )
         await message.answer(text, disable_web_page_preview=True)
 
+    if error_texts:
+        text = md.text(
+            'I`ve caught your link but validation error has occured:' if len(links) == 1 else
+            'I`ve caught links but validation errors have occured:',
+            *error_texts,
+            sep='\n'
+        )
+        await message.answer(text)
+
 
 @dp.message_handler(content_types=types.ContentType.TEXT, state='*')
 async def catch_missed_text_message(message: types.Message) -> None:
@@ -7,7 +7,8 @@ Contains user rubrics handlers.
 .. async:: add_rubric__handle_rubric_name(message: types.Message, state: FSMContext) -> None
 .. async:: add_rubric__handle_empty_rubric_description(message: types.Message, state: FSMContext) -> None
 .. async:: add_rubric__handle_rubric_description(message: types.Message, state: FSMContext) -> None
-.. async:: add_rubric__finish(message: types.Message, state: FSMContext, rubric_data: dict) -> None
+.. async:: add_rubric__finish(message: types.Message, state: FSMContext, rubric_data: dict,
+        acknowledgement: Optional[str] = None) -> None
 
 .. async:: delete_rubric__catch_message(message: types.Message) -> None
 .. async:: delete_rubric__handle_rubric_data(call: types.CallbackQuery, callback_data: dict, state: FSMContext) -> None
@@ -20,6 +21,7 @@ Contains user rubrics handlers.
 """
 
 import logging
+from typing import Optional
 
 from aiogram import types
 from aiogram.dispatcher import FSMContext
@@ -29,12 +31,13 @@ from ... import db
 from ...db import (
     get_formatted_error_message,
     ValidationError,
-    RubricValidator
+    validate_rubric_name,
+    validate_rubric_description
 )
 from ...db.models import Rubric
 from ...keyboards.inline import (
     RUBRIC_CB,
-    RubricListInlineKeyboard
+    get_rubric_list_inline_keyboard
 )
 from ...keyboards.reply import (
     EmptyValueReplyKeyboard,
@@ -46,11 +49,21 @@ from ...loader import (
     dp,
     async_db_sessionmaker
 )
-from ...settings import EMPTY_VALUE
+from ...middlewares.load_shedding import low_priority
+from ...middlewares.throttling import rate_limit
+from ...settings import (
+    EMPTY_VALUE,
+    THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK
+)
 from ...states import (
     RubricAddingStatesGroup,
     RubricDeletingStatesGroup
 )
+from ...utils.cache import user_data_versions
+from ...utils.navigation import (
+    answer_with_acknowledgement,
+    show_callback_result
+)
 
 
 logger = logging.getLogger(__name__)
@@ -64,6 +77,7 @@ RUBRIC_CB_ACTION_FOR_LINKS_MOVING = 'LINKS_MOVING'
 
 # See rubrics ----------------------------------------------------------------------------------------------------------
 @dp.message_handler(text=LinksAndRubricsMainReplyKeyboard.text_for_button_to_see_rubrics)
+@low_priority
 async def see_rubrics(message: types.Message) -> None:
     """ Answer with list of the rubrics"""
     user_id = message.from_user.id
@@ -89,7 +103,8 @@ async def see_rubrics(message: types.Message) -> None:
 
 
 # Add rubric -----------------------------------------------------------------------------------------------------------
-async def add_rubric__finish(message: types.Message, state: FSMContext, rubric_data: dict) -> None:
+async def add_rubric__finish(message: types.Message, state: FSMContext, rubric_data: dict,
+                             acknowledgement: Optional[str] = None) -> None:
     """
     Finish step of rubric adding: to add rubric to db, to finish state.
 
@@ -99,6 +114,8 @@ async def add_rubric__finish(message: types.Message, state: FSMContext, rubric_d
     :type state: FSMContext
     :param rubric_data: rubric data that will be passed in `Rubric` model instance
     :type rubric_data: dict
+    :param acknowledgement: acknowledgement of the last step that will be sent with the result
+    :type acknowledgement: Optional[str]
 
     :return: None
     :rtype: None
@@ -110,10 +127,14 @@ async def add_rubric__finish(message: types.Message, state: FSMContext, rubric_d
 
     async with async_db_sessionmaker() as session:
         await db.add_rubric(session, rubric)
+    user_data_versions.bump(user_id)
 
     text = md.hbold('✅ The new rubric has been added!')
     keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
-    await message.answer(text, reply_markup=keyboard)
+    if acknowledgement:
+        await answer_with_acknowledgement(message, acknowledgement, text, reply_markup=keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard)
 
     await state.finish()
 
@@ -141,7 +162,7 @@ async def add_rubric__handle_rubric_name(message: types.Message, state: FSMConte
     rubric_name = message.text
 
     try:
-        rubric_name = RubricValidator().validate_rubric_name(rubric_name)
+        rubric_name = validate_rubric_name(rubric_name)
     except ValidationError as error:
         await message.answer(get_formatted_error_message(error))
     else:
@@ -153,11 +174,10 @@ async def add_rubric__handle_rubric_name(message: types.Message, state: FSMConte
         if rubric_name_is_unique:
             async with state.proxy() as data:
                 data['name'] = rubric_name
-            await message.answer('👌 Rubric name has been accepted.')
 
             text = '📝 Input rubric description [🆓 optional].'
             keyboard = EmptyValueReplyKeyboard(one_time_keyboard=True, resize_keyboard=True)
-            await message.answer(text, reply_markup=keyboard)
+            await answer_with_acknowledgement(message, '👌 Rubric name has been accepted.', text, reply_markup=keyboard)
 
             await RubricAddingStatesGroup.next()
         else:
@@ -173,9 +193,8 @@ async def add_rubric__handle_empty_rubric_description(message: types.Message, st
     """ Handle empty rubric description. Last state -> add rubric to db. """
     async with state.proxy() as data:
         data['description'] = None
-    await message.answer('👌 Empty value has been accepted as rubric description.')
 
-    await add_rubric__finish(message, state, data)
+    await add_rubric__finish(message, state, data, '👌 Empty value has been accepted as rubric description.')
 
 
 @dp.message_handler(state=RubricAddingStatesGroup.handling_of_rubric_description)
@@ -184,16 +203,15 @@ async def add_rubric__handle_rubric_description(message: types.Message, state: F
     rubric_description = message.text
 
     try:
-        rubric_description = RubricValidator().validate_rubric_description(rubric_description)
+        rubric_description = validate_rubric_description(rubric_description)
     except ValidationError as error:
         keyboard = EmptyValueReplyKeyboard(one_time_keyboard=True, resize_keyboard=True)
         await message.answer(get_formatted_error_message(error), reply_markup=keyboard)
     else:
         async with state.proxy() as data:
             data['description'] = rubric_description
-        await message.answer('👌 Rubric description has been accepted.')
 
-        await add_rubric__finish(message, state, data)
+        await add_rubric__finish(message, state, data, '👌 Rubric description has been accepted.')
 # ----------------------------------------------------------------------------------------------------------------------
 
 
@@ -203,12 +221,10 @@ async def delete_rubric__catch_message(message: types.Message) -> None:
     """ Trigger on rubric deleting message. Ask to choose one of the rubric list """
     user_id = message.from_user.id
 
-    async with async_db_sessionmaker() as session:
-        rubrics = await db.fetch_all_rubrics(session, user_id)
+    keyboard = await get_rubric_list_inline_keyboard(user_id, RUBRIC_CB_ACTION_FOR_RUBRIC_DELETING)
 
-    if rubrics:
+    if keyboard:
         text = '❔ Please, choose one from the list below:'
-        keyboard = RubricListInlineKeyboard(rubrics, action=RUBRIC_CB_ACTION_FOR_RUBRIC_DELETING, row_width=1)
 
         await RubricDeletingStatesGroup.handling_of_rubric_data.set()
     else:
@@ -222,10 +238,9 @@ async def delete_rubric__catch_message(message: types.Message) -> None:
     RUBRIC_CB.filter(action=RUBRIC_CB_ACTION_FOR_RUBRIC_DELETING),
     state=RubricDeletingStatesGroup.handling_of_rubric_data
 )
+@rate_limit(THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK)
 async def delete_rubric__handle_rubric_data(call: types.CallbackQuery, callback_data: dict, state: FSMContext) -> None:
     """ Handle rubric data. Ask to make a decision about rubric links """
-    await call.message.delete_reply_markup()
-
     user_id = call.from_user.id
     rubric_id = int(callback_data['id'])
 
@@ -247,18 +262,21 @@ async def delete_rubric__handle_rubric_data(call: types.CallbackQuery, callback_
             )
         else:
             keyboard = DecisionAboutRubricLinksOnDeletingReplyKeyboard(one_time_keyboard=True, resize_keyboard=True)
+        menu_keyboard = None
 
         await RubricDeletingStatesGroup.next()
     else:
         text = f'✅ Rubric has been deleted!'
-        keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
+        keyboard = None
+        menu_keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
 
         async with async_db_sessionmaker() as session:
             await db.delete_one_rubric(session, rubric_id)
+        user_data_versions.bump(user_id)
 
         await state.finish()
 
-    await call.message.answer(text, reply_markup=keyboard)
+    await show_callback_result(call, text, reply_markup=keyboard, menu_markup=menu_keyboard)
 
     await call.answer()
 
@@ -270,11 +288,14 @@ async def delete_rubric__handle_rubric_data(call: types.CallbackQuery, callback_
 async def delete_rubric__handle_rubric_links_decision_to_set_non_rubric(message: types.Message, state: FSMContext
                                                                         ) -> None:
     """ Handle decision. Delete rubric [by default rubric deleting does not remove related links] """
+    user_id = message.from_user.id
+
     async with state.proxy() as data:
         rubric_id = data['id']
 
     async with async_db_sessionmaker() as session:
         await db.delete_one_rubric(session, rubric_id)
+    user_data_versions.bump(user_id)
 
     text = f'✅ Rubric has been deleted!'
     keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
@@ -289,11 +310,14 @@ async def delete_rubric__handle_rubric_links_decision_to_set_non_rubric(message:
 )
 async def delete_rubric__handle_rubric_links_decision_to_delete(message: types.Message, state: FSMContext) -> None:
     """ Handle decision. Delete rubric and related links """
+    user_id = message.from_user.id
+
     async with state.proxy() as data:
         rubric_id = data['id']
 
     async with async_db_sessionmaker() as session:
         await db.delete_one_rubric(session, rubric_id, delete_links=True)
+    user_data_versions.bump(user_id)
 
     text = f'✅ Rubric has been deleted!'
     keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
@@ -313,12 +337,9 @@ async def delete_rubric__handle_rubric_links_decision_to_move(message: types.Mes
     async with state.proxy() as data:
         rubric_id = data['id']
 
-    async with async_db_sessionmaker() as session:
-        rubrics = await db.fetch_all_rubrics(session, user_id)
-
     text = f'❔ Choose on of the list below: [all links that related with deleting rubric will be moved in ...]'
-    keyboard = RubricListInlineKeyboard(
-        rubrics, action=RUBRIC_CB_ACTION_FOR_LINKS_MOVING, row_width=1, except_rubrics_with_id={rubric_id, }
+    keyboard = await get_rubric_list_inline_keyboard(
+        user_id, RUBRIC_CB_ACTION_FOR_LINKS_MOVING, except_rubrics_with_id=frozenset({rubric_id})
     )
     await message.answer(text, reply_markup=keyboard)
 
@@ -329,11 +350,12 @@ async def delete_rubric__handle_rubric_links_decision_to_move(message: types.Mes
     RUBRIC_CB.filter(action=RUBRIC_CB_ACTION_FOR_LINKS_MOVING),
     state=RubricDeletingStatesGroup.handling_of_new_rubric_to_move_links_into
 )
+@rate_limit(THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK)
 async def delete_rubric__handle_new_rubric_for_links_moving(call: types.CallbackQuery, callback_data: dict,
                                                             state: FSMContext
                                                             ) -> None:
     """ Handle new rubric data. Delete rubric and move related links in another rubric """
-    await call.message.delete_reply_markup()
+    user_id = call.from_user.id
 
     async with state.proxy() as data:
         rubric_id = data['id']
@@ -343,10 +365,11 @@ async def delete_rubric__handle_new_rubric_for_links_moving(call: types.Callback
 
     async with async_db_sessionmaker() as session:
         await db.delete_one_rubric(session, rubric_id, migrate_links_in_rubric_with_id=new_rubric_id)
+    user_data_versions.bump(user_id)
 
     text = '✅ Links related with the deleting rubric have migrated in the chosen rubric!'
     keyboard = LinksAndRubricsMainReplyKeyboard(one_time_keyboard=True)
-    await call.message.answer(text, reply_markup=keyboard)
+    await show_callback_result(call, text, menu_markup=keyboard)
 
     await state.finish()
 
@@ -11,3 +11,9 @@ from .rubrics import (
     RUBRIC_CB,
     RubricListInlineKeyboard
 )
+
+from .cache import (
+    inline_keyboards_cache,
+    get_link_list_inline_keyboard,
+    get_rubric_list_inline_keyboard
+)
@@ -0,0 +1,159 @@
+"""
+Contains cache of the built inline keyboards.
+
+Inline keyboards with the user rubrics and links [pickers] depend only on the user data,
+so they are built once per user data version and reused on the repeat opens -
+with skipping of both the db query and the keyboard building.
+
+.. class:: InlineKeyboardsCache
+
+.. async:: get_rubric_list_inline_keyboard(user_id: int, action: str, *,
+        except_rubrics_with_id: Optional[frozenset[int]] = None) -> Optional[RubricListInlineKeyboard]
+.. async:: get_link_list_inline_keyboard(user_id: int, action: str) -> Optional[LinkListInlineKeyboard]
+
+.. data:: inline_keyboards_cache
+"""
+
+from typing import (
+    Awaitable,
+    Callable,
+    Hashable,
+    Optional
+)
+
+from aiogram import types
+
+from .links import LinkListInlineKeyboard
+from .rubrics import RubricListInlineKeyboard
+from ... import db
+from ...db.postgres import async_db_sessionmaker
+from ...settings import INLINE_KEYBOARDS_CACHE_SIZE
+from ...utils.cache import (
+    LRUCache,
+    user_data_versions
+)
+
+
+__all__ = [
+    'InlineKeyboardsCache',
+    'get_rubric_list_inline_keyboard',
+    'get_link_list_inline_keyboard',
+    'inline_keyboards_cache'
+]
+
+
+class InlineKeyboardsCache:
+    """
+    Implements cache of the inline keyboards built from the user data.
+    Keyboards are keyed by (user id, user data version, action, variant),
+    so they are invalidated by bumping of the user data version.
+    """
+
+    def __init__(self, maxsize: int):
+        self._keyboards = LRUCache(maxsize)
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._keyboards)
+
+    async def get_or_build(self, user_id: int, action: str,
+                           builder: Callable[[], Awaitable[Optional[types.InlineKeyboardMarkup]]],
+                           *,
+                           variant: Hashable = None
+                           ) -> Optional[types.InlineKeyboardMarkup]:
+        """
+        Return cached keyboard or build, cache and return the new one.
+        Empty result [None - user does not have data to show] is cached too.
+
+        :param user_id: owner of the data
+        :type user_id: int
+        :param action: action of the keyboard callback data
+        :type action: str
+        :param builder: coroutine function that builds the keyboard
+        :type builder: Callable[[], Awaitable[Optional[types.InlineKeyboardMarkup]]]
+        :keyword variant: additional part of the key [for keyboards built with different arguments]
+        :type variant: Hashable
+
+        :return: keyboard or None if there is nothing to show
+        :rtype: Optional[types.InlineKeyboardMarkup]
+        """
+
+        key = (user_id, user_data_versions.get(user_id), action, variant)
+
+        # tuple wrapper to distinguish cached `None` from cache miss
+        cached = self._keyboards.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached[0]
+
+        self.misses += 1
+        keyboard = await builder()
+        self._keyboards.set(key, (keyboard,))
+
+        return keyboard
+
+    def clear(self) -> None:
+        """ Remove all cached keyboards """
+        self._keyboards.clear()
+
+
+inline_keyboards_cache = InlineKeyboardsCache(INLINE_KEYBOARDS_CACHE_SIZE)
+
+
+async def get_rubric_list_inline_keyboard(user_id: int, action: str, *,
+                                          except_rubrics_with_id: Optional[frozenset[int]] = None
+                                          ) -> Optional[RubricListInlineKeyboard]:
+    """
+    Return cached inline keyboard with the user rubrics.
+
+    :param user_id: owner of the rubrics
+    :type user_id: int
+    :param action: action of the callback data
+    :type action: str
+    :keyword except_rubrics_with_id: rubrics that should not be shown
+    :type except_rubrics_with_id: Optional[frozenset[int]]
+
+    :return: keyboard or None if there are no rubrics to show
+    :rtype: Optional[RubricListInlineKeyboard]
+    """
+
+    async def build() -> Optional[RubricListInlineKeyboard]:
+        async with async_db_sessionmaker() as session:
+            rubrics = await db.fetch_all_rubrics(session, user_id)
+
+        if except_rubrics_with_id:
+            rubrics = [rubric for rubric in rubrics if rubric.id not in except_rubrics_with_id]
+
+        if not rubrics:
+            return None
+
+        return RubricListInlineKeyboard(rubrics, action=action, row_width=1)
+
+    return await inline_keyboards_cache.get_or_build(user_id, action, build, variant=except_rubrics_with_id)
+
+
+async def get_link_list_inline_keyboard(user_id: int, action: str) -> Optional[LinkListInlineKeyboard]:
+    """
+    Return cached inline keyboard with the user links.
+
+    :param user_id: owner of the links
+    :type user_id: int
+    :param action: action of the callback data
+    :type action: str
+
+    :return: keyboard or None if there are no links to show
+    :rtype: Optional[LinkListInlineKeyboard]
+    """
+
+    async def build() -> Optional[LinkListInlineKeyboard]:
+        async with async_db_sessionmaker() as session:
+            links = await db.fetch_all_links(session, user_id, with_rubric=True)
+
+        if not links:
+            return None
+
+        return LinkListInlineKeyboard(links, action=action, row_width=1)
+
+    return await inline_keyboards_cache.get_or_build(user_id, action, build)
@@ -0,0 +1,38 @@
+"""
+Contains helpers for the callback data encoding.
+
+.. def:: encode_callback_data(callback_data: CallbackData, action: str, id_: Any) -> str
+"""
+
+import functools
+from typing import Any
+
+from aiogram.utils.callback_data import CallbackData
+
+
+__all__ = ['encode_callback_data']
+
+
+@functools.lru_cache(maxsize=None)
+def _get_callback_data_prefix(callback_data: CallbackData, action: str) -> str:
+    """ Return encoded callback data without the last part [id] """
+    return callback_data.sep.join((callback_data.prefix, action, ''))
+
+
+def encode_callback_data(callback_data: CallbackData, action: str, id_: Any) -> str:
+    """
+    Encode callback data with parts (action, id) as `CallbackData.new` does,
+    but without validation of the parts on every call - prefix with action is encoded once.
+
+    :param callback_data: callback data factory with parts (action, id)
+    :type callback_data: CallbackData
+    :param action: value of the `action` part
+    :type action: str
+    :param id_: value of the `id` part
+    :type id_: Any
+
+    :return: encoded callback data
+    :rtype: str
+    """
+
+    return _get_callback_data_prefix(callback_data, action) + str(id_)
@@ -9,6 +9,7 @@ Contains inline keyboards related with links.
 from aiogram import types
 from aiogram.utils.callback_data import CallbackData
 
+from .callback_data import encode_callback_data
 from ...db.models import Link
 
 
@@ -42,7 +43,7 @@ class LinkListInlineKeyboard(types.InlineKeyboardMarkup):
         buttons = [
             types.InlineKeyboardButton(
                 link.short_url_with_description_and_rubric,
-                callback_data=LINK_CB.new(action=action, id=link.id)
+                callback_data=encode_callback_data(LINK_CB, action, link.id)
             )
             for link in links
         ]
@@ -14,6 +14,7 @@ from typing import (
 from aiogram import types
 from aiogram.utils.callback_data import CallbackData
 
+from .callback_data import encode_callback_data
 from ...settings import EMPTY_VALUE
 from ...db.models import Rubric
 
@@ -58,14 +59,12 @@ class RubricListInlineKeyboard(types.InlineKeyboardMarkup):
         buttons: list[types.InlineKeyboardButton] = []
 
         if except_rubrics_with_id is None:
-            except_rubrics_with_id = set()
-        else:
-            except_rubrics_with_id = {int(rubric_id) for rubric_id in except_rubrics_with_id}
+            except_rubrics_with_id = frozenset()
 
         if empty_value_on_the_start:
             buttons.append(types.InlineKeyboardButton(
                 EMPTY_VALUE,
-                callback_data=RUBRIC_CB.new(action=action, id=EMPTY_VALUE)
+                callback_data=encode_callback_data(RUBRIC_CB, action, EMPTY_VALUE)
             ))
 
         for rubric in rubrics:
@@ -76,7 +75,7 @@ class RubricListInlineKeyboard(types.InlineKeyboardMarkup):
 
                 button = types.InlineKeyboardButton(
                     text,
-                    callback_data=RUBRIC_CB.new(action=action, id=rubric_id)
+                    callback_data=encode_callback_data(RUBRIC_CB, action, rubric_id)
                 )
                 buttons.append(button)
 
@@ -1,25 +1,48 @@
 """
 Contains all objects that might be imported in child packages (handlers, ...).
 
+.. data:: send_scheduler
 .. data:: bot
 .. data:: dp
 .. data:: storage
+    FSM storage of the backend set in settings
+.. data:: throttler
+    Throttler of the anti-flood middleware [by the FSM storage]
 .. data:: async_db_sessionmaker
+    Imported on demand [with SQLAlchemy and db engine creating]
 """
 
-from aiogram import (
-    Bot,
-    Dispatcher,
-    types
+from typing import Any
+
+import aiohttp
+from aiogram import types
+from aiogram.bot.api import (
+    TELEGRAM_PRODUCTION,
+    TelegramAPIServer
 )
-from aiogram.contrib.fsm_storage.redis import RedisStorage2
 
 from . import settings
-from .db.postgres import async_db_sessionmaker
 from .settings import (
+    BOT_API_CONNECT_TIMEOUT_IN_SECONDS,
+    BOT_API_CONNECTIONS_LIMIT,
+    BOT_API_DNS_CACHE_TTL_IN_SECONDS,
+    BOT_API_KEEPALIVE_TIMEOUT_IN_SECONDS,
+    BOT_API_REQUEST_TIMEOUT_IN_SECONDS,
+    BOT_API_SERVER_URL,
+    FSM_STORAGE_BACKEND,
     LOGGING_CONFIG_PATH,
-    REDIS_CONFIG
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_CHAT_RATE_LIMIT_PER_SECOND,
+    OUTBOUND_CHATS_CACHE_SIZE,
+    OUTBOUND_GLOBAL_RATE_LIMIT_PER_SECOND,
+    OUTBOUND_MAX_RETRIES,
+    THROTTLING_RECONCILE_INTERVAL_IN_SECONDS
 )
+from .storages import create_storage
+from .utils.bot import InstrumentedBot
+from .utils.dispatcher import DrainingDispatcher
+from .utils.send_scheduler import OutboundScheduler
+from .utils.throttlers import create_throttler
 from .utils.logging_ import setup_logging
 
 
@@ -33,7 +56,30 @@ setup_logging(LOGGING_CONFIG_PATH)
 
 # objects for importing - - - - - - - - - - - - - - - - - - - - - - -
 # # bot-dp
-bot = Bot(token=settings.BOT_TOKEN, parse_mode=types.ParseMode.HTML)
-storage = RedisStorage2(**REDIS_CONFIG)
-dp = Dispatcher(bot=bot, storage=storage)
+bot_api_server = TelegramAPIServer.from_base(BOT_API_SERVER_URL) if BOT_API_SERVER_URL else TELEGRAM_PRODUCTION
+storage = create_storage(FSM_STORAGE_BACKEND)
+# global rate limit is shared by processes through the redis storage
+send_scheduler = OutboundScheduler(
+    OUTBOUND_GLOBAL_RATE_LIMIT_PER_SECOND, OUTBOUND_CHAT_RATE_LIMIT_PER_SECOND, OUTBOUND_CHAT_BURST,
+    chats_cache_size=OUTBOUND_CHATS_CACHE_SIZE, max_retries=OUTBOUND_MAX_RETRIES, storage=storage
+)
+bot = InstrumentedBot(
+    token=settings.BOT_TOKEN, parse_mode=types.ParseMode.HTML, server=bot_api_server, send_scheduler=send_scheduler,
+    connections_limit=BOT_API_CONNECTIONS_LIMIT,
+    keepalive_timeout=BOT_API_KEEPALIVE_TIMEOUT_IN_SECONDS,
+    ttl_dns_cache=BOT_API_DNS_CACHE_TTL_IN_SECONDS,
+    timeout=aiohttp.ClientTimeout(total=BOT_API_REQUEST_TIMEOUT_IN_SECONDS, connect=BOT_API_CONNECT_TIMEOUT_IN_SECONDS)
+)
+dp = DrainingDispatcher(bot=bot, storage=storage)
+throttler = create_throttler(storage, local_first=bool(THROTTLING_RECONCILE_INTERVAL_IN_SECONDS))
 # - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - - -
+
+
+def __getattr__(name: str) -> Any:
+    # db is not needed by processes that do not process updates [ingest]
+    if name == 'async_db_sessionmaker':
+        from .db.postgres import async_db_sessionmaker
+
+        return async_db_sessionmaker
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -1,17 +1,50 @@
 """
 Contains middlewares. Also it is possible to setup them here on the fly.
+
+.. def:: setup_middlewares() -> None
 """
 
+import logging
+
+from .fsm_batching import FSMBatchingMiddleware
+from .load_shedding import LoadSheddingMiddleware
+from .metrics import MetricsMiddleware
 from .throttling import ThrottlingMiddleware
-from ..loader import dp
-from ..settings import THROTTLING_RATE_LIMIT_IN_SECONDS
+from ..loader import (
+    dp,
+    throttler
+)
+from ..settings import (
+    LOAD_SHEDDING_IN_FLIGHT_HANDLERS_THRESHOLD,
+    LOAD_SHEDDING_LOOP_LAG_THRESHOLD_IN_SECONDS,
+    THROTTLING_RATE_LIMIT_IN_SECONDS,
+    THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_CALLBACK
+)
+from ..utils.loop_lag import loop_lag_monitor
+
+
+__all__ = ['setup_middlewares']
 
 
-if __name__ != "__main__":
-    import logging
+logger = logging.getLogger(__name__)
 
-    logger = logging.getLogger(__name__)
 
-    dp.middleware.setup(ThrottlingMiddleware(limit=THROTTLING_RATE_LIMIT_IN_SECONDS))
+def setup_middlewares() -> None:
+    """
+    Setup middlewares in dp [once - with handlers registration, FSM writes batching goes first,
+    load shedding goes after throttling - throttled updates are not answered that bot is busy]
+    """
+    # storage supports batches [redis]
+    if hasattr(dp.storage, 'start_batch'):
+        dp.middleware.setup(FSMBatchingMiddleware())
+    dp.middleware.setup(MetricsMiddleware())
+    dp.middleware.setup(
+        ThrottlingMiddleware(limit=THROTTLING_RATE_LIMIT_IN_SECONDS, throttler=throttler,
+                             callback_limit=THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_CALLBACK)
+    )
+    dp.middleware.setup(
+        LoadSheddingMiddleware(loop_lag_monitor, lag_threshold=LOAD_SHEDDING_LOOP_LAG_THRESHOLD_IN_SECONDS,
+                               in_flight_threshold=LOAD_SHEDDING_IN_FLIGHT_HANDLERS_THRESHOLD)
+    )
 
     logger.debug('Middlewares has been installed')
@@ -0,0 +1,31 @@
+"""
+Contains FSM writes batching middleware implementation.
+
+.. class:: FSMBatchingMiddleware(BaseMiddleware)
+
+.. const:: WRITES_BATCH_KEY
+"""
+
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+
+# key of the started batch in the update data
+WRITES_BATCH_KEY = 'fsm_writes_batch'
+
+
+class FSMBatchingMiddleware(BaseMiddleware):
+    """
+    Implements middleware that batches FSM writes of the update [storage has to support batches]:
+    batch is started before the update processing and flushed after it [also if processing has failed].
+    """
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        """ Start the batch of the update """
+        data[WRITES_BATCH_KEY] = self.manager.dispatcher.storage.start_batch()
+
+    async def on_post_process_update(self, update: types.Update, results: list, data: dict):
+        """ Flush the batch of the update """
+        batch = data.pop(WRITES_BATCH_KEY, None)
+        if batch is not None:
+            await self.manager.dispatcher.storage.flush_batch(batch)
@@ -0,0 +1,124 @@
+"""
+Contains load shedding middleware implementation.
+
+.. class:: LoadSheddingMiddleware(BaseMiddleware)
+
+.. decorator:: low_priority
+    Mark handler as the one that might be shed under load [expensive views]
+
+.. const:: LOW_PRIORITY_KEY
+.. const:: IN_FLIGHT_HANDLER_KEY
+.. const:: BUSY_TEXT
+"""
+
+from typing import Callable
+
+from aiogram import types
+from aiogram.dispatcher.handler import (
+    CancelHandler,
+    current_handler
+)
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from ..utils.loop_lag import LoopLagMonitor
+from ..utils.metrics import metrics
+
+
+LOW_PRIORITY_KEY = 'is_low_priority'
+# key of the handler data with the mark that handler is counted as in-flight one
+IN_FLIGHT_HANDLER_KEY = 'is_in_flight_handler'
+
+BUSY_TEXT = '🚦 The bot is busy right now. Try again in a few seconds, please!'
+
+
+def low_priority(func: Callable) -> Callable:
+    """
+    Decorator for marking handler as low-priority one.
+
+    :param func: handler
+    :type func: Callable
+
+    :return: handler with set attr
+    :rtype: Callable
+    """
+
+    setattr(func, LOW_PRIORITY_KEY, True)
+
+    return func
+
+
+class LoadSheddingMiddleware(BaseMiddleware):
+    """
+    Implements middleware that sheds low-priority handlers under load:
+    if event loop lag or quantity of the in-flight handlers is past its threshold,
+    user is answered that bot is busy instead of the handler running.
+    Other handlers [writes, `/cancel`, ...] are always run. Shed handlers are counted in metrics.
+    """
+
+    def __init__(self, monitor: LoopLagMonitor, *, lag_threshold: float, in_flight_threshold: int):
+        """
+        :param monitor: monitor of the event loop lag
+        :type monitor: LoopLagMonitor
+        :keyword lag_threshold: event loop lag in seconds
+        :type lag_threshold: float
+        :keyword in_flight_threshold: quantity of the handlers that are being processed
+        :type in_flight_threshold: int
+        """
+
+        self.monitor = monitor
+        self.lag_threshold = lag_threshold
+        self.in_flight_threshold = in_flight_threshold
+
+        self._in_flight_handlers = 0
+
+        super(LoadSheddingMiddleware, self).__init__()
+
+    @property
+    def in_flight_handlers(self) -> int:
+        """ Quantity of the handlers that are being processed """
+        return self._in_flight_handlers
+
+    @property
+    def is_overloaded(self) -> bool:
+        """ Whether any load is past its threshold """
+        return self._in_flight_handlers >= self.in_flight_threshold or self.monitor.lag >= self.lag_threshold
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        """ Shed the low-priority message handler under load """
+        if self._should_shed():
+            await message.answer(BUSY_TEXT)
+
+            raise CancelHandler()
+
+        self._enter(data)
+
+    async def on_process_callback_query(self, call: types.CallbackQuery, data: dict):
+        """ Shed the low-priority callback query handler under load """
+        if self._should_shed():
+            await call.answer(BUSY_TEXT)
+
+            raise CancelHandler()
+
+        self._enter(data)
+
+    async def on_post_process_message(self, message: types.Message, results: list, data: dict):
+        self._exit(data)
+
+    async def on_post_process_callback_query(self, call: types.CallbackQuery, results: list, data: dict):
+        self._exit(data)
+
+    def _should_shed(self) -> bool:
+        handler = current_handler.get()
+        if not getattr(handler, LOW_PRIORITY_KEY, False) or not self.is_overloaded:
+            return False
+
+        metrics.increment('handlers_shed', handler.__name__)
+        return True
+
+    def _enter(self, data: dict) -> None:
+        self._in_flight_handlers += 1
+        data[IN_FLIGHT_HANDLER_KEY] = True
+
+    def _exit(self, data: dict) -> None:
+        if data.pop(IN_FLIGHT_HANDLER_KEY, False):
+            self._in_flight_handlers -= 1
@@ -0,0 +1,46 @@
+"""
+Contains metrics middleware implementation.
+
+.. class:: MetricsMiddleware(BaseMiddleware)
+"""
+
+from aiogram import types
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from ..utils.metrics import (
+    current_flow,
+    metrics
+)
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Implements middleware that marks the update processing with the flow [handler name],
+    so outbound Bot API calls are counted by the flows that make them.
+    Processed updates are counted [per update metrics are calculated by them].
+    """
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        """ Count the update """
+        metrics.increment('updates')
+
+    @staticmethod
+    def _start_flow() -> None:
+        handler = current_handler.get()
+        flow = handler.__name__ if handler else 'unhandled'
+
+        current_flow.set(flow)
+        metrics.increment('flow_runs', flow)
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        """ Start the flow of the message handler """
+        self._start_flow()
+
+    async def on_process_callback_query(self, call: types.CallbackQuery, data: dict):
+        """ Start the flow of the callback query handler """
+        self._start_flow()
+
+    async def on_process_inline_query(self, inline_query: types.InlineQuery, data: dict):
+        """ Start the flow of the inline query handler """
+        self._start_flow()
@@ -8,18 +8,17 @@ Contains throttling middleware implementation.
 
 .. const:: THROTTLING_RATE_LIMIT_KEY
 .. const:: THROTTLING_KEY
+.. const:: CALLBACK_TAP_KEY
 """
 
-import asyncio
+import functools
+import math
 from typing import (
     Callable,
     Optional
 )
 
-from aiogram import (
-    Dispatcher,
-    types
-)
+from aiogram import types
 from aiogram.dispatcher import DEFAULT_RATE_LIMIT
 from aiogram.dispatcher.handler import (
     CancelHandler,
@@ -28,9 +27,18 @@ from aiogram.dispatcher.handler import (
 from aiogram.dispatcher.middlewares import BaseMiddleware
 from aiogram.utils.exceptions import Throttled
 
+from ..utils.metrics import metrics
+from ..utils.throttlers import (
+    BucketThrottler,
+    Throttler
+)
+from ..utils.timers import timers
+
 
 THROTTLING_RATE_LIMIT_KEY = 'throttling_rate_limit'
 THROTTLING_KEY = 'throttling_key'
+# key of the handler data with the tap [(user, message, callback data)] processed by the handler
+CALLBACK_TAP_KEY = 'callback_tap'
 
 
 def rate_limit(limit: float, key: Optional[str] = None) -> Callable:
@@ -67,12 +75,21 @@ def rate_limit(limit: float, key: Optional[str] = None) -> Callable:
 
 class ThrottlingMiddleware(BaseMiddleware):
     """
-    Implements anti-flood middleware
+    Implements anti-flood middleware [calls are registered by throttler - dispatcher throttling if omitted].
+
+    Taps of the inline keyboards are throttled by the handlers [actions] too, throttled tap is only answered.
+    Repeated tap of the button whose previous tap is being processed is coalesced with it [only answered].
     """
 
-    def __init__(self, limit: float = DEFAULT_RATE_LIMIT, key_prefix: str = 'antiflood_'):
+    def __init__(self, limit: float = DEFAULT_RATE_LIMIT, key_prefix: str = 'antiflood_',
+                 throttler: Optional[Throttler] = None, callback_limit: Optional[float] = None):
         self.rate_limit = limit
+        self.callback_rate_limit = callback_limit if callback_limit is not None else limit
         self.prefix = key_prefix
+        self.throttler = throttler or BucketThrottler()
+
+        # taps [(user, message, callback data)] that are being processed
+        self._taps_in_process: set[tuple[int, Optional[int], Optional[str]]] = set()
 
         super(ThrottlingMiddleware, self).__init__()
 
@@ -83,7 +100,6 @@ class ThrottlingMiddleware(BaseMiddleware):
         """
 
         handler = current_handler.get()
-        dispatcher = Dispatcher.get_current()
 
         if handler:
             limit = getattr(handler, THROTTLING_RATE_LIMIT_KEY, self.rate_limit)
@@ -93,7 +109,7 @@ class ThrottlingMiddleware(BaseMiddleware):
             key = f"{self.prefix}_message"
 
         try:
-            await dispatcher.throttle(key, rate=limit)
+            await self.throttler.throttle(key, chat=message.chat.id, user=message.from_user.id, rate=limit)
         except Throttled as t:
             await self.message_throttled(message, t)
 
@@ -101,25 +117,69 @@ class ThrottlingMiddleware(BaseMiddleware):
 
     async def message_throttled(self, message: types.Message, throttled: Throttled):
         """
-        Notify user only on first exceed and notify about unlocking only on last exceed
+        Notify user only on first exceed and notify about unlocking only on last exceed.
+        Unlocking is notified by timer [update processing is not held for the throttling window],
+        timer of the user key is replaced on every exceed.
         """
 
-        handler = current_handler.get()
-        dispatcher = Dispatcher.get_current()
-
-        if handler:
-            key = getattr(handler, THROTTLING_KEY, f"{self.prefix}_{handler.__name__}")
-        else:
-            key = f"{self.prefix}_message"
-
         delta = throttled.rate - throttled.delta
 
         if throttled.exceeded_count <= 2:
             await message.reply('Too many requests! Don`t flood, please!')
 
-        await asyncio.sleep(delta)
+        timers.call_later(
+            (throttled.chat, throttled.user, throttled.key), delta,
+            functools.partial(self.notify_unlocked, message, throttled.key, throttled.exceeded_count)
+        )
 
-        thr = await dispatcher.check_key(key)
+    async def notify_unlocked(self, message: types.Message, key: str, exceeded_count: int):
+        """ Notify user about unlocking if there have not been exceeds after the last one """
+        thr = await self.throttler.check_key(key, chat=message.chat.id, user=message.from_user.id)
 
-        if thr.exceeded_count == throttled.exceeded_count:
+        if thr.exceeded_count == exceeded_count:
             await message.reply('Unlocked. You can continue!')
+
+    async def on_process_callback_query(self, call: types.CallbackQuery, data: dict):
+        """
+        This handler is called when dispatcher receives a callback query.
+        Coalesce repeated taps and manage taps to avoid flood.
+        """
+
+        tap = (call.from_user.id, call.message.message_id if call.message else None, call.data)
+        if tap in self._taps_in_process:
+            metrics.increment('callback_taps_coalesced')
+            await call.answer()
+
+            raise CancelHandler()
+
+        self._taps_in_process.add(tap)
+        data[CALLBACK_TAP_KEY] = tap
+
+        handler = current_handler.get()
+        limit = getattr(handler, THROTTLING_RATE_LIMIT_KEY, self.callback_rate_limit)
+        key = getattr(handler, THROTTLING_KEY, f"{self.prefix}_{handler.__name__}")
+
+        try:
+            await self.throttler.throttle(key, chat=call.message.chat.id if call.message else None,
+                                          user=call.from_user.id, rate=limit)
+        except Throttled as t:
+            await self.callback_query_throttled(call, t)
+
+            raise CancelHandler()
+
+    async def on_post_process_callback_query(self, call: types.CallbackQuery, results: list, data: dict):
+        """ Release the tap after processing """
+        tap = data.get(CALLBACK_TAP_KEY)
+        if tap is not None:
+            self._taps_in_process.discard(tap)
+
+    @staticmethod
+    async def callback_query_throttled(call: types.CallbackQuery, throttled: Throttled):
+        """
+        Answer throttled tap without processing.
+        Telegram apps may cache the answer until unlocking [repeated taps of the button are not sent].
+        """
+
+        metrics.increment('callback_taps_throttled')
+        await call.answer('⏳ Too many taps! Wait a bit, please.',
+                          cache_time=math.ceil(max(throttled.rate - throttled.delta, 0)))
@@ -9,6 +9,31 @@ Contains settings, constants and environment data.
 .. const:: DEBUG_DB
 
 .. const:: BOT_TOKEN
+.. const:: BOT_API_SERVER_URL
+
+.. const:: BOT_RUN_MODE
+.. const:: WEBHOOK_HOST
+.. const:: WEBHOOK_PATH
+.. const:: WEBHOOK_URL
+.. const:: WEBHOOK_SECRET_TOKEN
+.. const:: WEBAPP_HOST
+.. const:: WEBAPP_PORT
+.. const:: HEALTH_CHECK_PATH
+.. const:: SHUTDOWN_TIMEOUT_IN_SECONDS
+.. const:: STARTUP_BUDGET_IN_SECONDS
+
+.. const:: UPDATES_STREAM_PREFIX
+.. const:: UPDATES_STREAM_SHARDS
+.. const:: UPDATES_STREAM_MAX_LENGTH
+.. const:: UPDATES_CONSUMER_GROUP
+.. const:: WORKER_NAME
+.. const:: WORKER_INDEX
+.. const:: WORKER_COUNT
+.. const:: WORKER_SHARDS
+.. const:: WORKER_BATCH_SIZE
+.. const:: WORKER_MAX_IN_FLIGHT_UPDATES
+.. const:: WORKER_BLOCK_TIMEOUT_IN_MILLISECONDS
+.. const:: WORKER_PENDING_IDLE_TIMEOUT_IN_MILLISECONDS
 
 .. const:: DB_ENGINE
 .. const:: DB_DRIVER
@@ -19,6 +44,10 @@ Contains settings, constants and environment data.
 .. const:: DB_NAME
 .. const:: DATABASE_URL
 .. const:: DB_CONNECTION_STRING
+.. const:: DB_POOL_SIZE
+.. const:: DB_POOL_MAX_OVERFLOW
+.. const:: DB_POOL_RECYCLE_IN_SECONDS
+.. const:: DB_WARM_UP_CONNECTIONS
 
 
 .. const:: REDIS_HOST
@@ -26,14 +55,58 @@ Contains settings, constants and environment data.
 .. const:: REDIS_PASSWORD
 .. const:: REDIS_URL
 
+.. const:: FSM_STORAGE_BACKEND
+.. const:: FSM_STATE_TTL_IN_SECONDS
+.. const:: FSM_STATES_TTLS_IN_SECONDS
+.. const:: FSM_EXPIRED_STATE_TTL_IN_SECONDS
+.. const:: FSM_BUCKET_TTL_IN_SECONDS
+.. const:: FSM_SWEEP_INTERVAL_IN_SECONDS
+.. const:: FSM_SWEEP_BATCH_SIZE
+.. const:: FSM_STORAGE_SERIALIZER
+
 .. const:: ADMINS
 .. const:: THROTTLING_RATE_LIMIT_IN_SECONDS
+.. const:: THROTTLING_RECONCILE_INTERVAL_IN_SECONDS
+.. const:: THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_CALLBACK
+.. const:: THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_RUBRIC_LINKS_CALLBACK
+.. const:: THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK
+.. const:: NAVIGATION_MODE
+
+.. const:: LOAD_SHEDDING_LOOP_LAG_THRESHOLD_IN_SECONDS
+.. const:: LOAD_SHEDDING_IN_FLIGHT_HANDLERS_THRESHOLD
+.. const:: LOOP_LAG_SAMPLING_INTERVAL_IN_SECONDS
+
+.. const:: USER_DATA_VERSIONS_CACHE_SIZE
+.. const:: INLINE_KEYBOARDS_CACHE_SIZE
+.. const:: FSM_STORAGE_CACHE_SIZE
+
+.. const:: INLINE_QUERY_RESULTS_LIMIT
+.. const:: INLINE_QUERY_CACHE_TIME_IN_SECONDS
+.. const:: INLINE_QUERY_SERVER_CACHE_SIZE
+.. const:: INLINE_QUERY_SERVER_CACHE_TTL_IN_SECONDS
+
+.. const:: OUTBOUND_GLOBAL_RATE_LIMIT_PER_SECOND
+.. const:: OUTBOUND_CHAT_RATE_LIMIT_PER_SECOND
+.. const:: OUTBOUND_CHAT_BURST
+.. const:: OUTBOUND_CHATS_CACHE_SIZE
+.. const:: OUTBOUND_MAX_RETRIES
+
+.. const:: BROADCAST_RATE_LIMIT_PER_SECOND
+.. const:: BROADCAST_CONCURRENCY
+.. const:: BROADCAST_BATCH_SIZE
+
+.. const:: BOT_API_CONNECTIONS_LIMIT
+.. const:: BOT_API_KEEPALIVE_TIMEOUT_IN_SECONDS
+.. const:: BOT_API_DNS_CACHE_TTL_IN_SECONDS
+.. const:: BOT_API_CONNECT_TIMEOUT_IN_SECONDS
+.. const:: BOT_API_REQUEST_TIMEOUT_IN_SECONDS
 
 .. const:: EMPTY_VALUE
 """
 
 import os
 import pathlib
+import socket
 from urllib.parse import urlparse
 
 from dotenv import load_dotenv
@@ -57,6 +130,62 @@ DEBUG_DB = True
 
 # API TOKENS ////////////////////////////////////////////////////////////////////////////////////////////////
 BOT_TOKEN = os.getenv('TG_BOT_TOKEN')
+# base url of the Bot API server [e.g. local Bot API server or fake server for load testing]
+BOT_API_SERVER_URL = os.getenv('BOT_API_SERVER_URL')
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
+# RUN SETTINGS //////////////////////////////////////////////////////////////////////////////////////////////
+# `polling` - long polling; `webhook` - aiohttp server receives updates from Telegram;
+# `ingest` - long polling with pushing updates in redis streams; `worker` - processing updates from redis streams
+BOT_RUN_MODE = os.getenv('BOT_RUN_MODE', 'polling')
+
+# public url that Telegram sends updates to: {WEBHOOK_HOST}{WEBHOOK_PATH} [`None` - host is not set]
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_URL = f'{WEBHOOK_HOST}{WEBHOOK_PATH}' if WEBHOOK_HOST else None
+# Telegram passes it in `X-Telegram-Bot-Api-Secret-Token` header of every webhook request
+WEBHOOK_SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN')
+
+WEBAPP_HOST = os.getenv('WEBAPP_HOST', '0.0.0.0')
+# heroku env
+WEBAPP_PORT = int(os.getenv('PORT')) if os.getenv('PORT') else 8080
+
+HEALTH_CHECK_PATH = '/health'
+
+# in-flight updates are waited on shutdown up to this time [the rest of the shutdown is not limited by it]
+SHUTDOWN_TIMEOUT_IN_SECONDS: float = float(os.getenv('SHUTDOWN_TIMEOUT_IN_SECONDS', 25))
+# time of the app importing and dp setup that is checked by startup profiling [`--profile-startup`]
+STARTUP_BUDGET_IN_SECONDS: float = float(os.getenv('STARTUP_BUDGET_IN_SECONDS', 1.5))
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
+# UPDATES STREAMS SETTINGS [`ingest` and `worker` run modes] ///////////////////////////////////////////////
+# ingest process pushes updates in the redis streams {UPDATES_STREAM_PREFIX}:{user id % UPDATES_STREAM_SHARDS}
+UPDATES_STREAM_PREFIX = 'updates'
+UPDATES_STREAM_SHARDS = int(os.getenv('UPDATES_STREAM_SHARDS', 8))
+# streams are trimmed approximately to this length
+UPDATES_STREAM_MAX_LENGTH = 100_000
+UPDATES_CONSUMER_GROUP = 'workers'
+
+# name has to be stable between restarts of the worker [to process own pending updates after crash]
+WORKER_NAME = os.getenv('WORKER_NAME', socket.gethostname())
+# every shard has to be consumed by one worker [to keep per-user order of the updates]:
+#   * explicit shards, e.g. `0,1,2,3`;
+#   * or index of the worker among `WORKER_COUNT` ones [shards are `shard % WORKER_COUNT == WORKER_INDEX`]
+# [`None` - shards are not assigned, worker run mode refuses to start]
+WORKER_INDEX = int(os.getenv('WORKER_INDEX')) if os.getenv('WORKER_INDEX') else None
+WORKER_COUNT = int(os.getenv('WORKER_COUNT')) if os.getenv('WORKER_COUNT') else None
+if os.getenv('WORKER_SHARDS'):
+    WORKER_SHARDS = [int(shard) for shard in os.getenv('WORKER_SHARDS').split(',') if shard]
+elif WORKER_INDEX is not None and WORKER_COUNT:
+    WORKER_SHARDS = [shard for shard in range(UPDATES_STREAM_SHARDS) if shard % WORKER_COUNT == WORKER_INDEX]
+else:
+    WORKER_SHARDS = None
+WORKER_BATCH_SIZE = 100
+# updates that are read but not processed yet [worker stops reading while the limit is reached]
+WORKER_MAX_IN_FLIGHT_UPDATES = int(os.getenv('WORKER_MAX_IN_FLIGHT_UPDATES', 1_000))
+WORKER_BLOCK_TIMEOUT_IN_MILLISECONDS = 5_000
+# pending updates of another consumer are claimed after this time [e.g. shard has been moved from crashed worker]
+WORKER_PENDING_IDLE_TIMEOUT_IN_MILLISECONDS = 60_000
 # \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
 
 # DB SETTINGS ///////////////////////////////////////////////////////////////////////////////////////////////
@@ -79,6 +208,14 @@ if DATABASE_URL:
     DB_CONNECTION_STRING = f'{DB_ENGINE}+{DB_DRIVER}://{CONNECTION_DATA}'
 else:
     DB_CONNECTION_STRING = f'{DB_ENGINE}+{DB_DRIVER}://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+
+# connections kept open in the pool [+ overflow connections that are closed on return]
+DB_POOL_SIZE: int = int(os.getenv('DB_POOL_SIZE', 10))
+DB_POOL_MAX_OVERFLOW: int = int(os.getenv('DB_POOL_MAX_OVERFLOW', 10))
+# connections are reopened after this time [server or proxy might drop long-lived connections]
+DB_POOL_RECYCLE_IN_SECONDS: int = 1_800
+# quantity of the pool connections opened on startup [with the hot statements prepared on every one]
+DB_WARM_UP_CONNECTIONS: int = int(os.getenv('DB_WARM_UP_CONNECTIONS', 5))
 # \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
 
 # REDIS SETTINGS ////////////////////////////////////////////////////////////////////////////////////////////
@@ -100,10 +237,102 @@ REDIS_CONFIG = {
 }
 # \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
 
+# FSM SETTINGS [abandoned conversations eviction] ///////////////////////////////////////////////////////////
+# `redis` or `memory` [states are kept by the process - tests, profiling, single-node runs]
+FSM_STORAGE_BACKEND: str = os.getenv('FSM_STORAGE_BACKEND', 'redis')
+# conversation [state and data] is evicted after time in seconds without FSM writes
+FSM_STATE_TTL_IN_SECONDS: int = int(os.getenv('FSM_STATE_TTL_IN_SECONDS', 60 * 60))
+# TTL by states groups or states [`Group` or `Group:state`] - short one for the confirmations of deleting
+FSM_STATES_TTLS_IN_SECONDS: dict[str, int] = {
+    'RubricDeletingStatesGroup': 60 * 10,
+    'ManageSeriousDeletingStatesGroup': 60 * 10,
+}
+# evicted conversation is remembered to resume the user at main keyboard on the next message
+FSM_EXPIRED_STATE_TTL_IN_SECONDS: int = 60 * 60 * 24 * 7
+# throttling buckets
+FSM_BUCKET_TTL_IN_SECONDS: int = 60 * 60 * 24
+FSM_SWEEP_INTERVAL_IN_SECONDS: float = float(os.getenv('FSM_SWEEP_INTERVAL_IN_SECONDS', 60))
+# max quantity of the addresses swept by one redis call
+FSM_SWEEP_BATCH_SIZE: int = 500
+# serializer of the FSM data: `msgpack` [falls back to `json` if not installed, reads JSON data]
+# or `json` [does not read msgpack data - switch back only after TTL of the conversations]
+FSM_STORAGE_SERIALIZER: str = os.getenv('FSM_STORAGE_SERIALIZER', 'msgpack')
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
 # BOT SETTINGS //////////////////////////////////////////////////////////////////////////////////////////////
 ADMINS: list[int] = [int(admin_id) for admin_id in os.getenv('ADMINS').split(',') if admin_id]
 THROTTLING_RATE_LIMIT_IN_SECONDS: float = .2
 THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_BUG_COMMAND: float = 60 * 5
+# calls that pass the token buckets of the process are sent to redis with this interval in seconds
+# [only calls of the flooding users go to redis at once; 0 - every call goes to redis]
+THROTTLING_RECONCILE_INTERVAL_IN_SECONDS: float = float(os.getenv('THROTTLING_RECONCILE_INTERVAL_IN_SECONDS', 1))
+# taps of the inline keyboards by actions [rubric with links is the heaviest read, deleting writes to db]
+THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_CALLBACK: float = .5
+THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_RUBRIC_LINKS_CALLBACK: float = 1
+THROTTLING_RATE_LIMIT_IN_SECONDS_FOR_DELETING_CALLBACK: float = 2
+# `classic` - every step is answered with the new message;
+# `edit_in_place` - results of the inline keyboards are shown by editing of the message with keyboard
+NAVIGATION_MODE: str = os.getenv('NAVIGATION_MODE', 'edit_in_place')
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
+# LOAD SHEDDING SETTINGS [low-priority handlers are answered that bot is busy] //////////////////////////////
+# lag in seconds of the event loop [sampled in background] past which the load is shed
+LOAD_SHEDDING_LOOP_LAG_THRESHOLD_IN_SECONDS: float = float(os.getenv('LOAD_SHEDDING_LOOP_LAG_THRESHOLD_IN_SECONDS', .5))
+# quantity of the message and callback query handlers being processed past which the load is shed
+LOAD_SHEDDING_IN_FLIGHT_HANDLERS_THRESHOLD: int = int(os.getenv('LOAD_SHEDDING_IN_FLIGHT_HANDLERS_THRESHOLD', 200))
+LOOP_LAG_SAMPLING_INTERVAL_IN_SECONDS: float = .1
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
+# CACHE SETTINGS ////////////////////////////////////////////////////////////////////////////////////////////
+# quantity of the users whose data versions are kept in memory
+USER_DATA_VERSIONS_CACHE_SIZE: int = int(os.getenv('USER_DATA_VERSIONS_CACHE_SIZE', 10_000))
+# quantity of the built inline keyboards [pickers] kept in memory
+INLINE_KEYBOARDS_CACHE_SIZE: int = int(os.getenv('INLINE_KEYBOARDS_CACHE_SIZE', 2_000))
+# quantity of the (chat, user) FSM states kept in memory in front of redis [0 - cache is disabled];
+# cache is coherent only if updates of the user are processed by one process [long polling, sharded workers]
+FSM_STORAGE_CACHE_SIZE: int = int(os.getenv('FSM_STORAGE_CACHE_SIZE', 10_000))
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
+# INLINE MODE SETTINGS //////////////////////////////////////////////////////////////////////////////////////
+# max quantity of the results in answer [Telegram allows up to 50]
+INLINE_QUERY_RESULTS_LIMIT: int = 20
+# results caching on the Telegram side [results are personal]
+INLINE_QUERY_CACHE_TIME_IN_SECONDS: int = 10
+# results caching on the bot side by (user, query)
+INLINE_QUERY_SERVER_CACHE_SIZE: int = int(os.getenv('INLINE_QUERY_SERVER_CACHE_SIZE', 5_000))
+INLINE_QUERY_SERVER_CACHE_TTL_IN_SECONDS: float = 60
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
+# OUTBOUND SETTINGS [Telegram limits of the sent messages] //////////////////////////////////////////////////
+# messages of all processes of the bot [limit is kept in redis with the redis FSM storage]
+OUTBOUND_GLOBAL_RATE_LIMIT_PER_SECOND: float = 30
+OUTBOUND_CHAT_RATE_LIMIT_PER_SECOND: float = 1
+# quantity of the messages that might be sent in the chat at once [e.g. acknowledgement and the next step]
+OUTBOUND_CHAT_BURST: int = 3
+# quantity of the chats whose rate limits are kept in memory
+OUTBOUND_CHATS_CACHE_SIZE: int = 10_000
+# times the request is repeated after `RetryAfter` error
+OUTBOUND_MAX_RETRIES: int = 3
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
+# BROADCAST SETTINGS ////////////////////////////////////////////////////////////////////////////////////////
+# part of the global rate limit [the rest is left for the answers to the users]
+BROADCAST_RATE_LIMIT_PER_SECOND: float = 20
+# max quantity of the simultaneously sent messages
+BROADCAST_CONCURRENCY: int = 20
+# quantity of the recipients fetched at once [progress is saved after every batch]
+BROADCAST_BATCH_SIZE: int = 500
+# \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
+
+# BOT API CLIENT SETTINGS [connector of the shared aiohttp session] /////////////////////////////////////////
+# max quantity of the simultaneous connections to Bot API server
+BOT_API_CONNECTIONS_LIMIT: int = int(os.getenv('BOT_API_CONNECTIONS_LIMIT', 100))
+# idle connections are kept open to avoid TCP and TLS handshakes on the next requests
+BOT_API_KEEPALIVE_TIMEOUT_IN_SECONDS: float = 60
+BOT_API_DNS_CACHE_TTL_IN_SECONDS: int = 300
+BOT_API_CONNECT_TIMEOUT_IN_SECONDS: float = 5
+# long polling timeout is added to it by the dispatcher
+BOT_API_REQUEST_TIMEOUT_IN_SECONDS: float = 30
 # \\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\\
 
 # BOT VARS //////////////////////////////////////////////////////////////////////////////////////////////////
@@ -2,7 +2,10 @@
 Contains modules that implements states.
 """
 
-from .common import ManageSeriousDeletingStatesGroup
+from .common import (
+    ManageSeriousDeletingStatesGroup,
+    ExpiredStatesGroup
+)
 from .links import LinkAddingStatesGroup
 from .rubrics import (
     RubricAddingStatesGroup,
@@ -2,6 +2,7 @@
 Contains common states groups.
 
 .. class:: ManageSeriousDeletingStatesGroup(StatesGroup)
+.. class:: ExpiredStatesGroup(StatesGroup)
 """
 
 from aiogram.dispatcher.filters.state import (
@@ -15,3 +16,9 @@ class ManageSeriousDeletingStatesGroup(StatesGroup):
 
     handling_of_delete_choice = State()
     handling_of_user_confirmation = State()
+
+
+class ExpiredStatesGroup(StatesGroup):
+    """ Implements states group of the abandoned conversations [evicted by TTL] """
+
+    expired = State()
@@ -0,0 +1,21 @@
+"""
+Contains FSM storages.
+"""
+
+from .caching import CachingStorage
+from .factory import (
+    create_storage,
+    STORAGE_BACKEND_REDIS,
+    STORAGE_BACKEND_MEMORY
+)
+from .memory import MemoryStorage
+from .pipelined import (
+    WritesBatch,
+    PipelinedRedisStorage
+)
+from .serializers import (
+    Serializer,
+    JSONSerializer,
+    MsgPackSerializer,
+    get_serializer
+)
@@ -0,0 +1,201 @@
+"""
+Contains caching FSM storage.
+
+.. class:: CachingStorage(BaseStorage)
+"""
+
+import copy
+import time
+from typing import (
+    Any,
+    Callable,
+    Optional,
+    Union
+)
+
+from aiogram.dispatcher.storage import BaseStorage
+
+from ..utils.cache import LRUCache
+from ..utils.metrics import metrics
+
+
+__all__ = ['CachingStorage']
+
+
+_MISSING = object()
+
+ChatOrUser = Union[str, int, None]
+
+
+class _CachedAddress:
+    """ Cached state, data and bucket of the (chat, user) [missing values are not cached yet] """
+
+    __slots__ = ('state', 'data', 'bucket', 'expires_at')
+
+    def __init__(self):
+        self.state: Any = _MISSING
+        self.data: Any = _MISSING
+        self.bucket: Any = _MISSING
+        # monotonic time [0 - address does not expire]
+        self.expires_at = 0.0
+
+
+class CachingStorage(BaseStorage):
+    """
+    Implements write-through in-process LRU cache in front of the FSM storage [e.g. redis].
+    Wrapped storage is the source of truth: writes go to it first, reads are served from the cache if possible.
+
+    Cache is coherent only if updates of the user are processed by one process
+    [long polling, workers with own shards of the updates streams].
+
+    If wrapped storage expires conversations by TTL of the state [out of the process - e.g. by sweeper],
+    cached address expires after the same TTL since it has been cached, so the evicted conversation is read again.
+
+    Cache hits and misses are counted in metrics [hit is a saved round-trip to the wrapped storage].
+    Other attributes [e.g. `redis()`, `start_batch()`] are taken from the wrapped storage.
+    """
+
+    def __init__(self, storage: BaseStorage, *, cache_size: int,
+                 get_state_ttl: Optional[Callable[[Optional[str]], Optional[int]]] = None):
+        """
+        :param storage: wrapped storage
+        :type storage: BaseStorage
+        :keyword cache_size: quantity of the (chat, user) addresses kept in memory
+        :type cache_size: int
+        :keyword get_state_ttl: function that returns TTL in seconds of the conversation in the state
+        :type get_state_ttl: Optional[Callable[[Optional[str]], Optional[int]]]
+        """
+
+        self.storage = storage
+        self.get_state_ttl = get_state_ttl
+
+        self._cache = LRUCache(cache_size)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.storage, name)
+
+    async def close(self):
+        self._cache.clear()
+        await self.storage.close()
+
+    async def wait_closed(self):
+        return await self.storage.wait_closed()
+
+    async def flush_batch(self, batch: Any) -> None:
+        """ Flush batch of the wrapped storage [cached values of the batch addresses are forgotten on failure] """
+        try:
+            await self.storage.flush_batch(batch)
+        except Exception:
+            for address in batch.addresses:
+                self._cache.pop(address)
+            raise
+
+    def invalidate(self, *, chat: ChatOrUser = None, user: ChatOrUser = None) -> None:
+        """ Forget cached values of the address [e.g. they have been changed out of the process] """
+        self._cache.pop(self.check_address(chat=chat, user=user))
+
+    def _get_cached(self, address: tuple[str, str], field: str) -> Any:
+        cached_address = self._cache.get(address)
+        if cached_address is not None and cached_address.expires_at and cached_address.expires_at <= time.monotonic():
+            self._cache.pop(address)
+            cached_address = None
+
+        value = getattr(cached_address, field) if cached_address is not None else _MISSING
+
+        metrics.increment('storage_cache_hits' if value is not _MISSING else 'storage_cache_misses')
+
+        return value
+
+    def _set_cached(self, address: tuple[str, str], field: str, value: Any) -> None:
+        cached_address = self._cache.get(address)
+        if cached_address is None:
+            cached_address = _CachedAddress()
+            self._cache.set(address, cached_address)
+
+        setattr(cached_address, field, value)
+
+        if self.get_state_ttl is not None:
+            ttl = self.get_state_ttl(cached_address.state if cached_address.state is not _MISSING else None)
+            cached_address.expires_at = time.monotonic() + ttl if ttl else 0.0
+
+    async def _write(self, address: tuple[str, str], field: str, value: Any, write) -> None:
+        try:
+            await write
+        except Exception:
+            # value in the wrapped storage is unknown
+            self._cache.pop(address)
+            raise
+
+        self._set_cached(address, field, value)
+
+    # state ------------------------------------------------------------------------------------------------------------
+    async def get_state(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                        default: Optional[str] = None) -> Optional[str]:
+        address = chat, user = self.check_address(chat=chat, user=user)
+
+        state = self._get_cached(address, 'state')
+        if state is _MISSING:
+            state = await self.storage.get_state(chat=chat, user=user)
+            self._set_cached(address, 'state', state)
+
+        return state if state is not None else default
+
+    async def set_state(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, state: Optional[str] = None):
+        address = chat, user = self.check_address(chat=chat, user=user)
+        await self._write(address, 'state', state, self.storage.set_state(chat=chat, user=user, state=state))
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # data -------------------------------------------------------------------------------------------------------------
+    async def get_data(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                       default: Optional[dict] = None) -> dict:
+        address = chat, user = self.check_address(chat=chat, user=user)
+
+        data = self._get_cached(address, 'data')
+        if data is _MISSING:
+            data = await self.storage.get_data(chat=chat, user=user)
+            self._set_cached(address, 'data', data)
+
+        # callers mutate data [e.g. FSM proxy]
+        return copy.deepcopy(data) if data else (default or {})
+
+    async def set_data(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, data: Optional[dict] = None):
+        address = chat, user = self.check_address(chat=chat, user=user)
+        await self._write(
+            address, 'data', copy.deepcopy(data) or {}, self.storage.set_data(chat=chat, user=user, data=data)
+        )
+
+    async def update_data(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, data: Optional[dict] = None,
+                          **kwargs):
+        temp_data = await self.get_data(chat=chat, user=user)
+        temp_data.update(data or {}, **kwargs)
+        await self.set_data(chat=chat, user=user, data=temp_data)
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # bucket -----------------------------------------------------------------------------------------------------------
+    def has_bucket(self):
+        return self.storage.has_bucket()
+
+    async def get_bucket(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                         default: Optional[dict] = None) -> dict:
+        address = chat, user = self.check_address(chat=chat, user=user)
+
+        bucket = self._get_cached(address, 'bucket')
+        if bucket is _MISSING:
+            bucket = await self.storage.get_bucket(chat=chat, user=user)
+            self._set_cached(address, 'bucket', bucket)
+
+        return copy.deepcopy(bucket) if bucket else (default or {})
+
+    async def set_bucket(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, bucket: Optional[dict] = None):
+        address = chat, user = self.check_address(chat=chat, user=user)
+        await self._write(
+            address, 'bucket', copy.deepcopy(bucket) or {},
+            self.storage.set_bucket(chat=chat, user=user, bucket=bucket)
+        )
+
+    async def update_bucket(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                            bucket: Optional[dict] = None, **kwargs):
+        temp_bucket = await self.get_bucket(chat=chat, user=user)
+        temp_bucket.update(bucket or {}, **kwargs)
+        await self.set_bucket(chat=chat, user=user, bucket=temp_bucket)
+    # ------------------------------------------------------------------------------------------------------------------
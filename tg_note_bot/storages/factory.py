@@ -0,0 +1,67 @@
+"""
+Contains factory of the FSM storage by backend [set in settings].
+
+.. def:: create_storage(backend: str) -> BaseStorage
+
+.. const:: STORAGE_BACKEND_REDIS
+.. const:: STORAGE_BACKEND_MEMORY
+"""
+
+from aiogram.dispatcher.storage import BaseStorage
+
+from .caching import CachingStorage
+from .memory import MemoryStorage
+from .pipelined import PipelinedRedisStorage
+from .serializers import get_serializer
+from ..settings import (
+    FSM_BUCKET_TTL_IN_SECONDS,
+    FSM_EXPIRED_STATE_TTL_IN_SECONDS,
+    FSM_STATE_TTL_IN_SECONDS,
+    FSM_STATES_TTLS_IN_SECONDS,
+    FSM_STORAGE_CACHE_SIZE,
+    FSM_STORAGE_SERIALIZER,
+    REDIS_CONFIG
+)
+from ..states import ExpiredStatesGroup
+
+
+__all__ = ['create_storage', 'STORAGE_BACKEND_REDIS', 'STORAGE_BACKEND_MEMORY']
+
+
+STORAGE_BACKEND_REDIS = 'redis'
+STORAGE_BACKEND_MEMORY = 'memory'
+
+
+def create_storage(backend: str) -> BaseStorage:
+    """
+    Create FSM storage.
+
+    :param backend: `redis` [with batched writes, behind in-process cache if it is enabled]
+        or `memory` [process keeps states itself - tests, profiling, single-node runs]
+    :type backend: str
+
+    :return: FSM storage
+    :rtype: BaseStorage
+
+    :raises ValueError: raised if backend is unknown
+    """
+
+    if backend == STORAGE_BACKEND_MEMORY:
+        return MemoryStorage(
+            state_ttl=FSM_STATE_TTL_IN_SECONDS, state_ttls=FSM_STATES_TTLS_IN_SECONDS,
+            expired_state=ExpiredStatesGroup.expired.state, expired_state_ttl=FSM_EXPIRED_STATE_TTL_IN_SECONDS,
+            bucket_ttl=FSM_BUCKET_TTL_IN_SECONDS
+        )
+
+    if backend != STORAGE_BACKEND_REDIS:
+        raise ValueError(f'Unknown FSM storage backend: <{backend}>')
+
+    storage = PipelinedRedisStorage(
+        **REDIS_CONFIG, state_ttl=FSM_STATE_TTL_IN_SECONDS, bucket_ttl=FSM_BUCKET_TTL_IN_SECONDS,
+        state_ttls=FSM_STATES_TTLS_IN_SECONDS, serializer=get_serializer(FSM_STORAGE_SERIALIZER),
+        expired_state=ExpiredStatesGroup.expired.state, expired_state_ttl=FSM_EXPIRED_STATE_TTL_IN_SECONDS
+    )
+    if FSM_STORAGE_CACHE_SIZE:
+        storage = CachingStorage(storage, cache_size=FSM_STORAGE_CACHE_SIZE, get_state_ttl=storage.get_state_ttl)
+
+    return storage
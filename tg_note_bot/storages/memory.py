@@ -0,0 +1,257 @@
+"""
+Contains in-memory FSM storage.
+
+Storage keeps states, data and throttling buckets in the dict of the process, so it is suitable
+for tests, profiling and single-node runs [state is lost on restart, it is not shared by processes].
+Expiration follows the redis storage: conversation expires after TTL of its state passed since the last write
+and its state is replaced with the expired state [by sweeper or on read]; buckets expire after own TTL.
+
+.. class:: MemoryStorage(BaseStorage)
+"""
+
+import copy
+import heapq
+import time
+from typing import (
+    Any,
+    Optional,
+    Union
+)
+
+from aiogram.dispatcher.storage import BaseStorage
+
+
+__all__ = ['MemoryStorage']
+
+
+ChatOrUser = Union[str, int, None]
+
+
+class _Record:
+    """ State, data and bucket of the (chat, user) with expiration times [0 - does not expire] """
+
+    __slots__ = ('state', 'data', 'bucket', 'expires_at', 'bucket_expires_at')
+
+    def __init__(self):
+        self.state: Optional[str] = None
+        self.data: dict = {}
+        self.bucket: dict = {}
+        self.expires_at = 0.0
+        self.bucket_expires_at = 0.0
+
+    @property
+    def is_empty(self) -> bool:
+        return self.state is None and not self.data and not self.bucket
+
+
+class MemoryStorage(BaseStorage):
+    """
+    Implements in-memory storage with TTLs [interface and expiration of `PipelinedRedisStorage`].
+    Returned data and buckets are copies [callers mutate them].
+    """
+
+    def __init__(self, *, state_ttl: Optional[int] = None, state_ttls: Optional[dict[str, int]] = None,
+                 expired_state: str, expired_state_ttl: int, bucket_ttl: Optional[int] = None):
+        """
+        :keyword state_ttl: default TTL in seconds of the conversation [does not expire if omitted]
+        :type state_ttl: Optional[int]
+        :keyword state_ttls: TTLs in seconds by states and states groups [`Group:state` or `Group`]
+        :type state_ttls: Optional[dict[str, int]]
+        :keyword expired_state: state the evicted conversation is replaced with
+        :type expired_state: str
+        :keyword expired_state_ttl: time in seconds the expired state is kept
+        :type expired_state_ttl: int
+        :keyword bucket_ttl: TTL in seconds of the bucket [does not expire if omitted]
+        :type bucket_ttl: Optional[int]
+        """
+
+        self.state_ttl = state_ttl
+        self.state_ttls = state_ttls or {}
+        self.expired_state = expired_state
+        self.expired_state_ttl = expired_state_ttl
+        self.bucket_ttl = bucket_ttl
+
+        self._records: dict[tuple[Any, Any], _Record] = {}
+        # (expiration time, address) - outdated items are skipped on sweeping
+        self._expirations: list[tuple[float, tuple[Any, Any]]] = []
+        self._bucket_expirations: list[tuple[float, tuple[Any, Any]]] = []
+
+    def get_state_ttl(self, state: Optional[str]) -> Optional[int]:
+        """ Return TTL in seconds of the conversation in the state [`None` - conversation does not expire] """
+        if state is None:
+            return self.state_ttl
+
+        group, _, _ = state.partition(':')
+        return self.state_ttls.get(state, self.state_ttls.get(group, self.state_ttl))
+
+    async def close(self):
+        self._records.clear()
+        self._expirations.clear()
+        self._bucket_expirations.clear()
+
+    async def wait_closed(self):
+        pass
+
+    # expiration -------------------------------------------------------------------------------------------------------
+    async def evict_expired_states(self, limit: int) -> tuple[int, int]:
+        """
+        Evict expired conversations [and forget expired buckets].
+
+        :param limit: max quantity of the swept addresses
+        :type limit: int
+
+        :return: quantity of the evicted states, quantity of the swept addresses
+        :rtype: tuple[int, int]
+        """
+
+        now = time.time()
+        evicted_states = swept_addresses = 0
+        while self._expirations and self._expirations[0][0] <= now and swept_addresses < limit:
+            expires_at, address = heapq.heappop(self._expirations)
+            record = self._records.get(address)
+            # conversation has been prolonged or finished
+            if record is None or record.expires_at != expires_at:
+                continue
+
+            swept_addresses += 1
+            evicted_states += self._evict(address, record)
+
+        while self._bucket_expirations and self._bucket_expirations[0][0] <= now:
+            expires_at, address = heapq.heappop(self._bucket_expirations)
+            record = self._records.get(address)
+            if record is not None and record.bucket_expires_at == expires_at:
+                record.bucket = {}
+                record.bucket_expires_at = 0.0
+                self._drop_if_empty(address, record)
+
+        return evicted_states, swept_addresses
+
+    def _evict(self, address: tuple[Any, Any], record: _Record) -> bool:
+        """ Evict the conversation and return whether state has been replaced with the expired one """
+        is_state_evicted = record.state not in (None, self.expired_state)
+        record.data = {}
+        if is_state_evicted:
+            record.state = self.expired_state
+            self._set_expiration(address, record, self.expired_state_ttl)
+        else:
+            # expired state is forgotten after own TTL
+            record.state = None
+            record.expires_at = 0.0
+            self._drop_if_empty(address, record)
+
+        return is_state_evicted
+
+    def _set_expiration(self, address: tuple[Any, Any], record: _Record, ttl: Optional[int]) -> None:
+        if not ttl:
+            record.expires_at = 0.0
+            return
+
+        record.expires_at = time.time() + ttl
+        heapq.heappush(self._expirations, (record.expires_at, address))
+
+    @staticmethod
+    def _get_address(chat: ChatOrUser, user: ChatOrUser) -> tuple[Any, Any]:
+        """ Inlined `check_address` [it is called on every access] """
+        if chat is None:
+            if user is None:
+                raise ValueError('`user` or `chat` parameter is required but no one is provided!')
+            return user, user
+        return chat, user if user is not None else chat
+
+    def _get_record(self, chat: ChatOrUser, user: ChatOrUser) -> Optional[_Record]:
+        address = self._get_address(chat, user)
+        record = self._records.get(address)
+        if record is None:
+            return None
+
+        now = time.time()
+        if 0.0 < record.expires_at <= now:
+            self._evict(address, record)
+        if 0.0 < record.bucket_expires_at <= now:
+            record.bucket = {}
+            record.bucket_expires_at = 0.0
+            return self._drop_if_empty(address, record)
+
+        return record if record.state is not None or record.data or record.bucket else None
+
+    def _get_or_create_record(self, chat: ChatOrUser, user: ChatOrUser) -> _Record:
+        record = self._get_record(chat, user)
+        if record is None:
+            record = self._records[self._get_address(chat, user)] = _Record()
+
+        return record
+
+    def _drop_if_empty(self, address: tuple[Any, Any], record: _Record) -> Optional[_Record]:
+        if record.is_empty:
+            self._records.pop(address, None)
+            return None
+
+        return record
+
+    def _prolong(self, chat: ChatOrUser, user: ChatOrUser, record: _Record) -> None:
+        """ Set expiration of the conversation after write """
+        address = self._get_address(chat, user)
+        if record.state == self.expired_state:
+            ttl = self.expired_state_ttl
+        else:
+            ttl = self.get_state_ttl(record.state) if record.state is not None or record.data else None
+
+        self._set_expiration(address, record, ttl)
+        self._drop_if_empty(address, record)
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # state and data ---------------------------------------------------------------------------------------------------
+    async def get_state(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                        default: Optional[str] = None) -> Optional[str]:
+        record = self._get_record(chat, user)
+        return record.state if record is not None and record.state is not None else default
+
+    async def get_data(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                       default: Optional[dict] = None) -> dict:
+        record = self._get_record(chat, user)
+        return copy.deepcopy(record.data) if record is not None and record.data else (default or {})
+
+    async def set_state(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, state: Optional[str] = None):
+        record = self._get_or_create_record(chat, user)
+        record.state = state
+        self._prolong(chat, user, record)
+
+    async def set_data(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, data: Optional[dict] = None):
+        record = self._get_or_create_record(chat, user)
+        record.data = copy.deepcopy(data) or {}
+        self._prolong(chat, user, record)
+
+    async def update_data(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, data: Optional[dict] = None,
+                          **kwargs):
+        temp_data = await self.get_data(chat=chat, user=user)
+        temp_data.update(data or {}, **kwargs)
+        await self.set_data(chat=chat, user=user, data=temp_data)
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # bucket -----------------------------------------------------------------------------------------------------------
+    def has_bucket(self):
+        return True
+
+    async def get_bucket(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                         default: Optional[dict] = None) -> dict:
+        record = self._get_record(chat, user)
+        return copy.deepcopy(record.bucket) if record is not None and record.bucket else (default or {})
+
+    async def set_bucket(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, bucket: Optional[dict] = None):
+        record = self._get_or_create_record(chat, user)
+        record.bucket = copy.deepcopy(bucket) or {}
+        address = self._get_address(chat, user)
+        if self.bucket_ttl and record.bucket:
+            record.bucket_expires_at = time.time() + self.bucket_ttl
+            heapq.heappush(self._bucket_expirations, (record.bucket_expires_at, address))
+        else:
+            record.bucket_expires_at = 0.0
+
+        self._drop_if_empty(address, record)
+
+    async def update_bucket(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                            bucket: Optional[dict] = None, **kwargs):
+        temp_bucket = await self.get_bucket(chat=chat, user=user)
+        temp_bucket.update(bucket or {}, **kwargs)
+        await self.set_bucket(chat=chat, user=user, bucket=temp_bucket)
+    # ------------------------------------------------------------------------------------------------------------------
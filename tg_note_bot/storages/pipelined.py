@@ -0,0 +1,326 @@
+"""
+Contains redis FSM storage with batched writes and expiration of the abandoned conversations.
+
+Handler step usually makes several FSM writes [data by proxy, then state by `next()` or `finish()`],
+every one is a separate redis round-trip. Storage collects writes of the update in the batch
+and sends them at once in one `MULTI`/`EXEC` transaction [batch is started and flushed by middleware].
+Reads of the update see its batched writes.
+
+Data and buckets are serialized by the pluggable serializer [JSON by default - format of `RedisStorage2`].
+
+Conversation [state and data] of the address expires after TTL of its state passed since the last write:
+every write puts the address in the expiration index [sorted set by expiration time].
+Sweeper evicts expired conversations by the index: data is deleted, state is replaced with the expired state
+[so the user is resumed on the next message]. Keys also expire in redis [for the case sweeper is not run].
+
+.. class:: WritesBatch
+.. class:: PipelinedRedisStorage(RedisStorage2)
+
+.. const:: EXPIRATION_INDEX_KEY
+.. const:: NATIVE_EXPIRATION_FACTOR
+"""
+
+import contextvars
+import time
+from typing import (
+    Callable,
+    Optional,
+    Union
+)
+
+from aiogram.contrib.fsm_storage.redis import (
+    RedisStorage2,
+    STATE_BUCKET_KEY,
+    STATE_DATA_KEY,
+    STATE_KEY
+)
+
+from .serializers import (
+    JSONSerializer,
+    Serializer
+)
+from ..utils.metrics import metrics
+
+
+__all__ = ['WritesBatch', 'PipelinedRedisStorage', 'EXPIRATION_INDEX_KEY', 'NATIVE_EXPIRATION_FACTOR']
+
+
+# sorted set of the addresses [`chat:user`] by expiration time of their conversations
+EXPIRATION_INDEX_KEY = 'expirations'
+# keys expire in redis after the TTL multiplied by factor [sweeper evicts them earlier]
+NATIVE_EXPIRATION_FACTOR = 2
+
+# KEYS: expiration index; ARGV: now, limit, keys prefix, expired state, expired state TTL
+# returns: evicted states, swept addresses
+EVICT_EXPIRED_SCRIPT = '''
+local addresses = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+local evicted = 0
+for _, address in ipairs(addresses) do
+    local state_key = ARGV[3] .. ':' .. address .. ':state'
+    if redis.call('EXISTS', state_key) == 1 then
+        redis.call('SET', state_key, ARGV[4], 'EX', ARGV[5])
+        evicted = evicted + 1
+    end
+    redis.call('DEL', ARGV[3] .. ':' .. address .. ':data')
+    redis.call('ZREM', KEYS[1], address)
+end
+return {evicted, #addresses}
+'''
+
+ChatOrUser = Union[str, int, None]
+
+# raw value of the write that only sets expiration of the key
+_EXPIRATION_ONLY = object()
+
+
+class WritesBatch:
+    """ Writes of the update: key -> (raw value [`None` - key is deleted], expiration in seconds) """
+
+    def __init__(self):
+        self.writes: dict[str, tuple[Union[str, bytes, None, object], Optional[int]]] = {}
+        # address [`chat:user`] -> expiration time [`None` - address is removed from the index]
+        self.expirations: dict[str, Optional[float]] = {}
+        # (chat, user) addresses of the writes
+        self.addresses: set[tuple[str, str]] = set()
+        # (chat, user) -> state [known states of the addresses]
+        self.states: dict[tuple[str, str], Optional[str]] = {}
+        self.is_flushed = False
+        self.token: Optional[contextvars.Token] = None
+
+
+_current_batch: contextvars.ContextVar[Optional[WritesBatch]] = contextvars.ContextVar('current_batch', default=None)
+
+
+class PipelinedRedisStorage(RedisStorage2):
+    """
+    Implements redis storage that batches writes made in the context of the started batch.
+    Out of the batch [or after its flushing - e.g. in the task spawned by handler] writes are sent at once.
+
+    TTL of the state is taken by the state name, then by its group name, `state_ttl` is the default one.
+    """
+
+    def __init__(self, *args, state_ttls: Optional[dict[str, int]] = None, expired_state: str,
+                 expired_state_ttl: int, serializer: Optional[Serializer] = None, **kwargs):
+        """
+        Other arguments are passed to `RedisStorage2` [`state_ttl` - default TTL of the conversation].
+
+        :keyword state_ttls: TTLs in seconds by states and states groups [`Group:state` or `Group`]
+        :type state_ttls: Optional[dict[str, int]]
+        :keyword expired_state: state the evicted conversation is replaced with
+        :type expired_state: str
+        :keyword expired_state_ttl: time in seconds the expired state is kept
+        :type expired_state_ttl: int
+        :keyword serializer: serializer of the data and buckets [JSON if omitted]
+        :type serializer: Optional[Serializer]
+        """
+
+        super().__init__(*args, **kwargs)
+
+        self.state_ttls = state_ttls or {}
+        self.expired_state = expired_state
+        self.expired_state_ttl = expired_state_ttl
+        self.serializer = serializer or JSONSerializer()
+
+    def get_state_ttl(self, state: Optional[str]) -> Optional[int]:
+        """ Return TTL in seconds of the conversation in the state [`None` - conversation does not expire] """
+        if state is None:
+            return self._state_ttl
+
+        group, _, _ = state.partition(':')
+        return self.state_ttls.get(state, self.state_ttls.get(group, self._state_ttl))
+
+    # batches ----------------------------------------------------------------------------------------------------------
+    def start_batch(self) -> WritesBatch:
+        """
+        Start batch of the writes in the current context.
+
+        :return: started batch
+        :rtype: WritesBatch
+        """
+
+        batch = WritesBatch()
+        batch.token = _current_batch.set(batch)
+
+        return batch
+
+    async def flush_batch(self, batch: WritesBatch) -> None:
+        """
+        Send writes of the batch in one transaction and end the batch.
+
+        :param batch: batch started in the current context
+        :type batch: WritesBatch
+
+        :return: None
+        :rtype: None
+        """
+
+        batch.is_flushed = True
+        if batch.token is not None:
+            _current_batch.reset(batch.token)
+            batch.token = None
+
+        if not batch.writes:
+            return
+
+        await self._execute(batch)
+
+        metrics.increment('storage_batches_flushed')
+        metrics.increment('storage_batched_writes', value=len(batch.writes))
+
+    async def _execute(self, batch: WritesBatch) -> None:
+        redis = await self.redis()
+        transaction = redis.multi_exec()
+        for key, (raw_value, expire) in batch.writes.items():
+            if raw_value is None:
+                transaction.delete(key)
+            elif raw_value is _EXPIRATION_ONLY:
+                transaction.expire(key, expire)
+            else:
+                transaction.set(key, raw_value, expire=expire)
+
+        expiration_index_key = self.generate_key(EXPIRATION_INDEX_KEY)
+        for address, expires_at in batch.expirations.items():
+            if expires_at is None:
+                transaction.zrem(expiration_index_key, address)
+            else:
+                transaction.zadd(expiration_index_key, expires_at, address)
+
+        await transaction.execute()
+
+    @staticmethod
+    def _get_open_batch() -> Optional[WritesBatch]:
+        batch = _current_batch.get()
+        return batch if batch is not None and not batch.is_flushed else None
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # expiration -------------------------------------------------------------------------------------------------------
+    async def evict_expired_states(self, limit: int) -> tuple[int, int]:
+        """
+        Evict expired conversations [atomically - sweepers of the several processes do not intersect].
+
+        :param limit: max quantity of the swept addresses
+        :type limit: int
+
+        :return: quantity of the evicted states, quantity of the swept addresses
+        :rtype: tuple[int, int]
+        """
+
+        redis = await self.redis()
+        evicted_states, swept_addresses = await redis.eval(
+            EVICT_EXPIRED_SCRIPT,
+            keys=[self.generate_key(EXPIRATION_INDEX_KEY)],
+            args=[time.time(), limit, self.generate_key(), self.expired_state, self.expired_state_ttl]
+        )
+
+        return evicted_states, swept_addresses
+
+    def _get_native_expire(self, state: Optional[str]) -> Optional[int]:
+        if state == self.expired_state:
+            return self.expired_state_ttl
+
+        ttl = self.get_state_ttl(state)
+        return ttl * NATIVE_EXPIRATION_FACTOR if ttl else None
+
+    def _set_expiration(self, batch: WritesBatch, chat: str, user: str, *, state: Optional[str],
+                        has_data: bool) -> None:
+        ttl = self.get_state_ttl(state)
+        is_expirable = ttl and state != self.expired_state and (state is not None or has_data)
+
+        batch.expirations[f'{chat}:{user}'] = time.time() + ttl if is_expirable else None
+    # ------------------------------------------------------------------------------------------------------------------
+
+    # reads and writes -------------------------------------------------------------------------------------------------
+    async def _read(self, key: str, *, encoding: Optional[str] = None) -> Union[str, bytes, None]:
+        batch = self._get_open_batch()
+        if batch is not None and key in batch.writes:
+            raw_value, _ = batch.writes[key]
+            if raw_value is not _EXPIRATION_ONLY:
+                return raw_value
+
+        redis = await self.redis()
+        return await redis.get(key, encoding=encoding)
+
+    async def _read_state(self, chat: str, user: str) -> Optional[str]:
+        batch = self._get_open_batch()
+        if batch is not None and (chat, user) in batch.states:
+            return batch.states[chat, user]
+
+        state = await self._read(self.generate_key(chat, user, STATE_KEY), encoding='utf8') or None
+        if batch is not None:
+            batch.states[chat, user] = state
+
+        return state
+
+    async def _write(self, chat: str, user: str, update_batch: Callable[[WritesBatch], None]) -> None:
+        """ Update the open batch or execute the update at once """
+        batch = self._get_open_batch()
+        is_open_batch = batch is not None
+        if not is_open_batch:
+            batch = WritesBatch()
+
+        update_batch(batch)
+        batch.addresses.add((chat, user))
+
+        if not is_open_batch:
+            await self._execute(batch)
+
+    async def get_state(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                        default: Optional[str] = None) -> Optional[str]:
+        chat, user = self.check_address(chat=chat, user=user)
+        return await self._read_state(chat, user)
+
+    async def get_data(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                       default: Optional[dict] = None) -> dict:
+        chat, user = self.check_address(chat=chat, user=user)
+        raw_data = await self._read(self.generate_key(chat, user, STATE_DATA_KEY))
+        return self.serializer.loads(raw_data) if raw_data else (default or {})
+
+    async def set_state(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, state: Optional[str] = None):
+        chat, user = self.check_address(chat=chat, user=user)
+        state_key = self.generate_key(chat, user, STATE_KEY)
+        data_key = self.generate_key(chat, user, STATE_DATA_KEY)
+        expire = self._get_native_expire(state)
+
+        def update_batch(batch: WritesBatch) -> None:
+            batch.writes[state_key] = (state, expire)
+            batch.states[chat, user] = state
+
+            # data expires with the state
+            raw_data, _ = batch.writes.get(data_key, (_EXPIRATION_ONLY, None))
+            if raw_data is not None and (raw_data is not _EXPIRATION_ONLY or expire is not None):
+                batch.writes[data_key] = (raw_data, expire)
+
+            self._set_expiration(batch, chat, user, state=state, has_data=False)
+
+        await self._write(chat, user, update_batch)
+
+    async def set_data(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, data: Optional[dict] = None):
+        chat, user = self.check_address(chat=chat, user=user)
+        data_key = self.generate_key(chat, user, STATE_DATA_KEY)
+        state = await self._read_state(chat, user)
+        expire = self._get_native_expire(state)
+
+        def update_batch(batch: WritesBatch) -> None:
+            # empty data is not kept [missing data is read as empty]
+            batch.writes[data_key] = (self.serializer.dumps(data), expire) if data else (None, None)
+            batch.states[chat, user] = state
+
+            self._set_expiration(batch, chat, user, state=state, has_data=bool(data))
+
+        await self._write(chat, user, update_batch)
+
+    async def get_bucket(self, *, chat: ChatOrUser = None, user: ChatOrUser = None,
+                         default: Optional[dict] = None) -> dict:
+        chat, user = self.check_address(chat=chat, user=user)
+        raw_bucket = await self._read(self.generate_key(chat, user, STATE_BUCKET_KEY))
+        return self.serializer.loads(raw_bucket) if raw_bucket else (default or {})
+
+    async def set_bucket(self, *, chat: ChatOrUser = None, user: ChatOrUser = None, bucket: Optional[dict] = None):
+        chat, user = self.check_address(chat=chat, user=user)
+        bucket_key = self.generate_key(chat, user, STATE_BUCKET_KEY)
+
+        def update_batch(batch: WritesBatch) -> None:
+            batch.writes[bucket_key] = (self.serializer.dumps(bucket), self._bucket_ttl)
+
+        await self._write(chat, user, update_batch)
+    # ------------------------------------------------------------------------------------------------------------------
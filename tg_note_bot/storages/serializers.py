@@ -0,0 +1,113 @@
+"""
+Contains serializers of the FSM data [and throttling buckets].
+
+msgpack is more compact than JSON and faster to decode, but it is optional:
+if it is not installed, JSON is used. msgpack serializer reads JSON written before [keys are not migrated]:
+data is a dict - JSON of the dict starts with `{` that is never the first byte of msgpack map.
+Values have to be serializable by both formats [strings, numbers, booleans, None, lists and dicts].
+
+.. class:: Serializer(ABC)
+.. class:: JSONSerializer(Serializer)
+.. class:: MsgPackSerializer(Serializer)
+
+.. def:: get_serializer(name: str) -> Serializer
+
+.. data:: SERIALIZERS
+"""
+
+import json
+import logging
+from abc import (
+    ABC,
+    abstractmethod
+)
+from typing import Any
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+__all__ = ['Serializer', 'JSONSerializer', 'MsgPackSerializer', 'get_serializer', 'SERIALIZERS']
+
+
+logger = logging.getLogger(__name__)
+
+
+JSON_OBJECT_PREFIX = b'{'
+
+
+class Serializer(ABC):
+    """ Implements interface of the serializer """
+
+    name: str
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        """ Serialize value """
+
+    @abstractmethod
+    def loads(self, raw_value: bytes) -> Any:
+        """ Deserialize value """
+
+
+class JSONSerializer(Serializer):
+    """ Implements JSON serializer [format of `RedisStorage2`] """
+
+    name = 'json'
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode()
+
+    def loads(self, raw_value: bytes) -> Any:
+        return json.loads(raw_value)
+
+
+class MsgPackSerializer(Serializer):
+    """ Implements msgpack serializer that also reads JSON objects """
+
+    name = 'msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError('msgpack is not installed')
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, raw_value: bytes) -> Any:
+        if raw_value.startswith(JSON_OBJECT_PREFIX):
+            return json.loads(raw_value)
+
+        return msgpack.unpackb(raw_value, raw=False)
+
+
+# name: serializer class
+SERIALIZERS: dict[str, type[Serializer]] = {
+    JSONSerializer.name: JSONSerializer,
+    MsgPackSerializer.name: MsgPackSerializer
+}
+
+
+def get_serializer(name: str) -> Serializer:
+    """
+    Return serializer by name [msgpack falls back to JSON if it is not installed].
+
+    :param name: name of the serializer
+    :type name: str
+
+    :return: serializer
+    :rtype: Serializer
+
+    :raises ValueError: raised if serializer is unknown
+    """
+
+    if name not in SERIALIZERS:
+        raise ValueError(f'Unknown FSM storage serializer: <{name}>')
+
+    if name == MsgPackSerializer.name and msgpack is None:
+        logger.warning('msgpack is not installed - FSM data is serialized to JSON')
+        return JSONSerializer()
+
+    return SERIALIZERS[name]()
@@ -10,6 +10,7 @@ from aiogram import Dispatcher
 from aiogram.utils import markdown as md
 
 from ..settings import ADMINS
+from .sending import send_to_chats
 
 
 logger = logging.getLogger(__name__)
@@ -32,12 +33,12 @@ async def notify_admins_on_startup(dp: Dispatcher) -> None:
         sep='\n'
     )
 
-    for admin in ADMINS:
-        try:
-            await dp.bot.send_message(admin, message)
+    result = await send_to_chats(dp.bot, ADMINS, message, concurrency=len(ADMINS) or 1)
 
-            logger.debug(f'Admin with id <{admin}> has been notified about startup')
-        except Exception as error:
-            logger.exception(msg=str(error), exc_info=error)
-        else:
-            logger.info('Admins have been notified on startup')
+    if result.failed_count or result.blocked_chat_ids:
+        logger.warning(
+            f'{result.failed_count + len(result.blocked_chat_ids)} admins have not been notified on startup '
+            f'[unavailable: {result.blocked_chat_ids}]'
+        )
+    else:
+        logger.info('Admins have been notified on startup')
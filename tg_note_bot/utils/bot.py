@@ -0,0 +1,79 @@
+"""
+Contains bot implementation with instrumented Bot API requests.
+
+.. class:: InstrumentedBot(Bot)
+"""
+
+import functools
+import time
+from typing import (
+    Any,
+    Optional
+)
+
+from aiogram import Bot
+
+from .metrics import (
+    current_flow,
+    metrics
+)
+from .send_scheduler import (
+    OutboundScheduler,
+    is_scheduled_method
+)
+
+
+__all__ = ['InstrumentedBot']
+
+
+class InstrumentedBot(Bot):
+    """
+    Implements bot that counts outbound Bot API calls:
+    in total, by API method and by flow [handler] that has made the call.
+    Latency of the requests [without waiting in the outbound queue] is observed by API method.
+
+    If outbound scheduler is passed, sent messages are paced by it [under Telegram rate limits].
+    """
+
+    def __init__(self, *args, send_scheduler: Optional[OutboundScheduler] = None,
+                 keepalive_timeout: Optional[float] = None, ttl_dns_cache: Optional[int] = None, **kwargs):
+        """
+        :keyword send_scheduler: scheduler of the sent messages [messages are sent directly if omitted]
+        :type send_scheduler: Optional[OutboundScheduler]
+        :keyword keepalive_timeout: time in seconds the idle connection is kept open [aiohttp default if omitted]
+        :type keepalive_timeout: Optional[float]
+        :keyword ttl_dns_cache: time in seconds the resolved DNS entries are cached [aiohttp default if omitted]
+        :type ttl_dns_cache: Optional[int]
+        """
+
+        super().__init__(*args, **kwargs)
+
+        self.send_scheduler = send_scheduler
+
+        # connector of the session that is shared by all requests [session is created lazily by aiogram]
+        if keepalive_timeout is not None:
+            self._connector_init['keepalive_timeout'] = keepalive_timeout
+        if ttl_dns_cache is not None:
+            self._connector_init['ttl_dns_cache'] = ttl_dns_cache
+
+    async def request(self, method: str, data: Optional[dict] = None, files: Optional[dict] = None,
+                      **kwargs) -> Any:
+        metrics.increment('api_calls')
+        metrics.increment('api_calls_by_method', method)
+        metrics.increment('api_calls_by_flow', current_flow.get())
+
+        chat_id = data.get('chat_id') if data else None
+        if self.send_scheduler is not None and chat_id is not None and is_scheduled_method(method):
+            return await self.send_scheduler.submit(
+                chat_id, functools.partial(self._timed_request, method, data, files, **kwargs)
+            )
+
+        return await self._timed_request(method, data, files, **kwargs)
+
+    async def _timed_request(self, method: str, data: Optional[dict] = None, files: Optional[dict] = None,
+                             **kwargs) -> Any:
+        started_at = time.perf_counter()
+        try:
+            return await super().request(method, data, files, **kwargs)
+        finally:
+            metrics.observe('api_latency_by_method', method, time.perf_counter() - started_at)
@@ -0,0 +1,225 @@
+"""
+Contains broadcasting of the messages to all bot users.
+
+Messages are sent concurrently [with bounded concurrency] under the broadcast rate limit [by `send_to_chats`],
+recipients that have blocked the bot are marked in db and skipped by the next broadcasts.
+Broadcast to all users saves progress after every batch of the recipients, so it might be resumed after restart.
+
+.. class:: BroadcastReport(NamedTuple)
+
+.. async:: run_broadcast(bot: Bot, broadcast_id: int) -> BroadcastReport
+.. def:: start_broadcast(bot: Bot, broadcast_id: int, report_chat_id: int) -> bool
+.. def:: is_broadcast_running() -> bool
+.. async:: stop_broadcast(timeout: float) -> bool
+"""
+
+import asyncio
+import logging
+import time
+from typing import (
+    NamedTuple,
+    Optional
+)
+
+from aiogram import Bot
+from aiogram.utils import markdown as md
+
+from .. import db
+from ..db.postgres import async_db_sessionmaker
+from ..settings import (
+    BROADCAST_BATCH_SIZE,
+    BROADCAST_CONCURRENCY,
+    BROADCAST_RATE_LIMIT_PER_SECOND
+)
+from .send_scheduler import TokenBucket
+from .sending import send_to_chats
+
+
+__all__ = [
+    'BroadcastReport',
+    'run_broadcast', 'start_broadcast', 'is_broadcast_running', 'stop_broadcast'
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+_broadcast_task: Optional[asyncio.Task] = None
+# broadcast is paused after the current batch [e.g. on shutdown]
+_broadcast_is_stopping = False
+
+
+class BroadcastReport(NamedTuple):
+    """ Report of the broadcast run """
+
+    broadcast_id: int
+    sent_count: int
+    failed_count: int
+    blocked_count: int
+    elapsed: float
+    is_finished: bool = True
+
+    @property
+    def throughput(self) -> float:
+        """ Processed recipients per second """
+        processed_count = self.sent_count + self.failed_count + self.blocked_count
+        return processed_count / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def tg_repr(self) -> str:
+        """ Return report tg representation """
+        return md.text(
+            md.hbold(
+                f'Broadcast #{self.broadcast_id} has been finished:' if self.is_finished
+                else f'Broadcast #{self.broadcast_id} has been paused [resume it with /admin_broadcast_resume]:'
+            ),
+            f'sent: {self.sent_count}',
+            f'failed: {self.failed_count}',
+            f'blocked: {self.blocked_count}',
+            f'elapsed [this run]: {self.elapsed:.1f} s',
+            f'throughput [this run]: {self.throughput:.1f} recipients per second',
+            sep='\n'
+        )
+
+
+async def run_broadcast(bot: Bot, broadcast_id: int) -> BroadcastReport:
+    """
+    Send broadcast message to all non-blocked users [starting after the last processed user].
+
+    :param bot: bot
+    :type bot: Bot
+    :param broadcast_id: broadcast id
+    :type broadcast_id: int
+
+    :return: report of the run [counts are total for the broadcast]
+    :rtype: BroadcastReport
+
+    :raises ValueError: raised if broadcast does not exist
+    """
+
+    async with async_db_sessionmaker() as session:
+        broadcast = await db.fetch_one_broadcast(session, broadcast_id)
+    if broadcast is None:
+        raise ValueError(f'Broadcast <{broadcast_id}> does not exist')
+
+    sent_count, failed_count, blocked_count = broadcast.sent_count, broadcast.failed_count, broadcast.blocked_count
+    last_user_id = broadcast.last_user_id
+    rate_limiter = TokenBucket(BROADCAST_RATE_LIMIT_PER_SECOND, BROADCAST_RATE_LIMIT_PER_SECOND)
+
+    logger.info(f'Broadcast <{broadcast_id}> has been started after user <{last_user_id}>')
+    started_at = time.perf_counter()
+    is_finished = True
+
+    # streaming session keeps cursor open - progress is saved with another one
+    async with async_db_sessionmaker() as stream_session, async_db_sessionmaker() as session:
+        async for user_ids in db.stream_broadcast_recipients(
+                stream_session, after_user_id=last_user_id, batch_size=BROADCAST_BATCH_SIZE
+        ):
+            result = await send_to_chats(
+                bot, user_ids, broadcast.message, concurrency=BROADCAST_CONCURRENCY, rate_limiter=rate_limiter
+            )
+            if result.blocked_chat_ids:
+                await db.mark_users_as_blocked(session, result.blocked_chat_ids)
+
+            sent_count += result.sent_count
+            failed_count += result.failed_count
+            blocked_count += len(result.blocked_chat_ids)
+            last_user_id = user_ids[-1]
+
+            await db.update_broadcast_progress(
+                session, broadcast_id, last_user_id=last_user_id, sent_count=sent_count,
+                failed_count=failed_count, blocked_count=blocked_count, is_finished=False
+            )
+
+            if _broadcast_is_stopping:
+                is_finished = False
+                break
+        else:
+            await db.update_broadcast_progress(
+                session, broadcast_id, last_user_id=last_user_id, sent_count=sent_count,
+                failed_count=failed_count, blocked_count=blocked_count, is_finished=True
+            )
+
+    report = BroadcastReport(
+        broadcast_id, sent_count, failed_count, blocked_count, time.perf_counter() - started_at,
+        is_finished=is_finished
+    )
+    logger.info(
+        f'Broadcast <{broadcast_id}> has been {"finished" if report.is_finished else "paused"}: '
+        f'sent {sent_count}, failed {failed_count}, '
+        f'blocked {blocked_count} [{report.throughput:.1f} recipients per second]'
+    )
+
+    return report
+
+
+def is_broadcast_running() -> bool:
+    """ Return whether broadcast is running [only one broadcast is run at once] """
+    return _broadcast_task is not None and not _broadcast_task.done()
+
+
+def start_broadcast(bot: Bot, broadcast_id: int, report_chat_id: int) -> bool:
+    """
+    Run broadcast in background and send its report to the chat on finish.
+
+    :param bot: bot
+    :type bot: Bot
+    :param broadcast_id: broadcast id
+    :type broadcast_id: int
+    :param report_chat_id: chat the report is sent to
+    :type report_chat_id: int
+
+    :return: False if another broadcast is running else True
+    :rtype: bool
+    """
+
+    global _broadcast_task
+
+    if is_broadcast_running():
+        return False
+
+    async def run_and_report() -> None:
+        try:
+            report = await run_broadcast(bot, broadcast_id)
+        except Exception as error:
+            logger.exception(f'Broadcast <{broadcast_id}> has failed')
+            await bot.send_message(
+                report_chat_id,
+                f'Broadcast #{broadcast_id} has failed: {md.quote_html(str(error))}. '
+                'Resume it with /admin_broadcast_resume'
+            )
+        else:
+            await bot.send_message(report_chat_id, report.tg_repr)
+
+    _broadcast_task = asyncio.create_task(run_and_report())
+
+    return True
+
+
+async def stop_broadcast(timeout: float) -> bool:
+    """
+    Pause running broadcast after the current batch [its progress is saved, so it might be resumed].
+
+    :param timeout: max time in seconds to wait for the current batch [broadcast is cancelled after it]
+    :type timeout: float
+
+    :return: whether broadcast has been paused in time [True if there is no running broadcast]
+    :rtype: bool
+    """
+
+    global _broadcast_is_stopping
+
+    if not is_broadcast_running():
+        return True
+
+    _broadcast_is_stopping = True
+    try:
+        await asyncio.wait_for(asyncio.shield(_broadcast_task), timeout)
+    except asyncio.TimeoutError:
+        _broadcast_task.cancel()
+        await asyncio.wait([_broadcast_task])
+        return False
+    finally:
+        _broadcast_is_stopping = False
+
+    return True
@@ -0,0 +1,128 @@
+"""
+Contains in-process caches.
+
+.. class:: LRUCache
+    Bounded mapping that evicts the least recently used items (optionally, with items expiration)
+.. class:: UserDataVersions
+    Keeps versions of the user data [links and rubrics] to invalidate derived caches
+
+.. data:: user_data_versions
+"""
+
+import collections
+import itertools
+import time
+from typing import (
+    Any,
+    Hashable,
+    Optional
+)
+
+from ..settings import USER_DATA_VERSIONS_CACHE_SIZE
+
+
+__all__ = ['LRUCache', 'UserDataVersions', 'user_data_versions']
+
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Implements bounded mapping that evicts the least recently used items.
+    Optionally, items expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        """
+        :param maxsize: max quantity of the kept items
+        :type maxsize: int
+        :param ttl: time to live of the item in seconds [items do not expire if omitted]
+        :type ttl: Optional[float]
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        # key: (expiration time, value)
+        self._items: collections.OrderedDict[Hashable, tuple[float, Any]] = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """ Return value by key and mark it as recently used """
+        try:
+            expires_at, value = self._items[key]
+        except KeyError:
+            return default
+
+        if expires_at and expires_at <= time.monotonic():
+            del self._items[key]
+            return default
+
+        self._items.move_to_end(key)
+
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """ Set value by key and evict the least recently used item if size is exceeded """
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+
+        self._items[key] = (expires_at, value)
+        self._items.move_to_end(key)
+
+        if len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """ Remove item by key and return its value """
+        expires_at, value = self._items.pop(key, (0.0, default))
+
+        return value
+
+    def clear(self) -> None:
+        """ Remove all items """
+        self._items.clear()
+
+
+class UserDataVersions:
+    """
+    Keeps versions of the user data.
+    Version has to be bumped on every change of the user links or rubrics,
+    so the caches which keys include the version are invalidated.
+
+    Versions are taken from the one global counter, so they are never repeated.
+    If the version of some user is evicted [to keep memory bounded],
+    all unknown users get a new version - caches built with the forgotten versions become unreachable.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+
+        self._counter = itertools.count(1)
+        self._versions: collections.OrderedDict[int, int] = collections.OrderedDict()
+        self._version_of_unknown_users = 0
+
+    def get(self, user_id: int) -> int:
+        """ Return current version of the user data """
+        return self._versions.get(user_id, self._version_of_unknown_users)
+
+    def bump(self, user_id: int) -> int:
+        """ Set a new version of the user data and return it """
+        version = next(self._counter)
+
+        self._versions[user_id] = version
+        self._versions.move_to_end(user_id)
+
+        if len(self._versions) > self.maxsize:
+            self._versions.popitem(last=False)
+            self._version_of_unknown_users = next(self._counter)
+
+        return version
+
+
+user_data_versions = UserDataVersions(USER_DATA_VERSIONS_CACHE_SIZE)
@@ -0,0 +1,104 @@
+"""
+Contains dispatcher implementation that tracks in-flight updates [for the graceful shutdown].
+Messages are routed by the exact text [reply keyboard buttons] - see `utils.text_routing`.
+
+.. class:: DrainingDispatcher(TextRoutingDispatcher)
+"""
+
+import asyncio
+import contextlib
+from typing import (
+    Any,
+    AsyncIterator,
+    Optional
+)
+
+from aiogram import types
+
+from .text_routing import TextRoutingDispatcher
+
+
+__all__ = ['DrainingDispatcher']
+
+
+class DrainingDispatcher(TextRoutingDispatcher):
+    """
+    Implements dispatcher that counts updates which are being processed,
+    so shutdown might stop receiving of the new updates and wait until the received ones are processed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.intake_is_stopped = False
+
+        # tasks that receive updates out of the dispatcher [e.g. reading of the updates streams]
+        self._intake_tasks: set[asyncio.Task] = set()
+        self._in_flight_updates = 0
+        self._drained: Optional[asyncio.Event] = None
+
+    @property
+    def in_flight_updates(self) -> int:
+        """ Quantity of the updates [or batches of the updates] that are being processed """
+        return self._in_flight_updates
+
+    def register_intake_task(self, task: asyncio.Task) -> None:
+        """ Register task that receives updates [it has to check `intake_is_stopped` before receiving] """
+        self._intake_tasks.add(task)
+        task.add_done_callback(self._intake_tasks.discard)
+
+    def stop_intake(self) -> None:
+        """ Stop receiving of the new updates [long polling and updates streams] """
+        self.intake_is_stopped = True
+        self.stop_polling()
+
+    async def cancel_intake_tasks(self) -> None:
+        """
+        Cancel intake tasks that are still waiting for the updates.
+        Has to be called after in-flight updates are drained [received updates are not confirmed yet, so
+        they are redelivered after restart].
+        """
+
+        tasks = list(self._intake_tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks)
+
+    @contextlib.asynccontextmanager
+    async def in_flight(self) -> AsyncIterator[None]:
+        """ Mark work as in-flight while the context is entered [e.g. processing with acknowledgement] """
+        self._in_flight_updates += 1
+        try:
+            yield
+        finally:
+            self._in_flight_updates -= 1
+            if not self._in_flight_updates and self._drained is not None:
+                self._drained.set()
+
+    async def process_update(self, update: types.Update) -> Any:
+        async with self.in_flight():
+            return await super().process_update(update)
+
+    async def wait_drained(self, timeout: float) -> bool:
+        """
+        Wait until in-flight updates are processed.
+
+        :param timeout: max time in seconds to wait
+        :type timeout: float
+
+        :return: whether all in-flight updates have been processed in time
+        :rtype: bool
+        """
+
+        # event is created lazily - dispatcher is created before the event loop is run
+        self._drained = asyncio.Event()
+        if not self._in_flight_updates:
+            return True
+
+        try:
+            await asyncio.wait_for(self._drained.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+        return True
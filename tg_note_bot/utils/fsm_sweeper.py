@@ -0,0 +1,99 @@
+"""
+Contains sweeper of the abandoned FSM conversations.
+
+Sweeper is run in the background by the processes that process updates [several sweepers do not intersect]
+and evicts conversations whose TTL has passed [storage has to support eviction].
+Evicted states are counted in metrics and reported in logs.
+
+.. def:: start_sweeper(storage: BaseStorage, *, interval: float, batch_size: int) -> None
+.. async:: stop_sweeper() -> None
+.. async:: sweep_expired_states(storage: BaseStorage, batch_size: int) -> int
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from aiogram.dispatcher.storage import BaseStorage
+
+from .metrics import metrics
+
+
+__all__ = ['start_sweeper', 'stop_sweeper', 'sweep_expired_states']
+
+
+logger = logging.getLogger(__name__)
+
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+async def sweep_expired_states(storage: BaseStorage, batch_size: int) -> int:
+    """
+    Evict all expired conversations [by batches].
+
+    :param storage: FSM storage that supports eviction
+    :type storage: BaseStorage
+    :param batch_size: max quantity of the addresses swept by one call of the storage
+    :type batch_size: int
+
+    :return: quantity of the evicted states
+    :rtype: int
+    """
+
+    evicted_states = 0
+    while True:
+        batch_evicted_states, swept_addresses = await storage.evict_expired_states(batch_size)
+        evicted_states += batch_evicted_states
+
+        if swept_addresses < batch_size:
+            break
+
+    if evicted_states:
+        metrics.increment('fsm_states_evicted', value=evicted_states)
+        logger.info(f'{evicted_states} abandoned FSM states have been evicted')
+
+    return evicted_states
+
+
+async def _run_sweeper(storage: BaseStorage, interval: float, batch_size: int) -> None:
+    while True:
+        try:
+            await sweep_expired_states(storage, batch_size)
+        except Exception:
+            logger.exception('Sweeping of the abandoned FSM states has failed')
+
+        await asyncio.sleep(interval)
+
+
+def start_sweeper(storage: BaseStorage, *, interval: float, batch_size: int) -> None:
+    """
+    Start sweeper in the background.
+
+    :param storage: FSM storage that supports eviction
+    :type storage: BaseStorage
+    :keyword interval: time in seconds between sweeps
+    :type interval: float
+    :keyword batch_size: max quantity of the addresses swept by one call of the storage
+    :type batch_size: int
+
+    :return: None
+    :rtype: None
+    """
+
+    global _sweeper_task
+
+    if _sweeper_task is None or _sweeper_task.done():
+        _sweeper_task = asyncio.create_task(_run_sweeper(storage, interval, batch_size))
+
+
+async def stop_sweeper() -> None:
+    """ Cancel sweeper [evictions are atomic - nothing is lost] """
+    global _sweeper_task
+
+    if _sweeper_task is None:
+        return
+
+    _sweeper_task.cancel()
+    await asyncio.wait([_sweeper_task])
+    _sweeper_task = None
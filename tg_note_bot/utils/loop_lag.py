@@ -0,0 +1,73 @@
+"""
+Contains monitor of the event loop lag.
+
+Monitor sleeps for the sampling interval in the background, the time it wakes up late is the lag:
+callbacks and tasks that are ready to run are waiting for the loop [overloaded process answers late].
+Lag is observed in metrics [percentiles are shown to admins].
+
+.. class:: LoopLagMonitor
+
+.. data:: loop_lag_monitor
+"""
+
+import asyncio
+from typing import Optional
+
+from .metrics import metrics
+
+
+__all__ = ['LoopLagMonitor', 'loop_lag_monitor']
+
+
+class LoopLagMonitor:
+    """ Implements sampler of the event loop lag """
+
+    def __init__(self):
+        self._last_lag = 0.0
+        # loop time the sampler has to wake up at [`None` - monitor is not running]
+        self._wake_up_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def lag(self) -> float:
+        """ Lag in seconds [the last measured one or the current delay of the sampler if it is longer] """
+        if self._wake_up_at is None:
+            return self._last_lag
+
+        return max(self._last_lag, asyncio.get_running_loop().time() - self._wake_up_at)
+
+    def start(self, interval: float) -> None:
+        """
+        Start sampling in the background.
+
+        :param interval: time in seconds between samples
+        :type interval: float
+
+        :return: None
+        :rtype: None
+        """
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._sample(interval))
+
+    async def stop(self) -> None:
+        """ Stop sampling """
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        await asyncio.wait([self._task])
+        self._task = None
+        self._wake_up_at = None
+
+    async def _sample(self, interval: float) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wake_up_at = loop.time() + interval
+            await asyncio.sleep(interval)
+
+            self._last_lag = max(loop.time() - self._wake_up_at, 0.0)
+            metrics.observe('event_loop_lag', value=self._last_lag)
+
+
+loop_lag_monitor = LoopLagMonitor()
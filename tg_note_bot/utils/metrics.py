@@ -0,0 +1,118 @@
+"""
+Contains in-process metrics of the bot.
+
+Metrics are kept in memory of the process [they are reset on restart]
+and might be shown to admins by the command.
+
+.. class:: Metrics
+.. class:: TimingSummary
+
+.. data:: current_flow
+    Context variable with name of the flow [handler] that processes the current update
+.. data:: metrics
+
+.. const:: BACKGROUND_FLOW
+.. const:: TIMING_SAMPLES_SIZE
+"""
+
+import collections
+import contextvars
+from typing import (
+    Hashable,
+    NamedTuple,
+    Optional
+)
+
+
+__all__ = ['Metrics', 'TimingSummary', 'current_flow', 'metrics', 'BACKGROUND_FLOW', 'TIMING_SAMPLES_SIZE']
+
+
+# flow of the work that is done out of the update processing [startup, polling, ...]
+BACKGROUND_FLOW = 'background'
+# quantity of the last samples the timing percentiles are calculated by
+TIMING_SAMPLES_SIZE = 1_000
+
+current_flow: contextvars.ContextVar[str] = contextvars.ContextVar('current_flow', default=BACKGROUND_FLOW)
+
+
+class TimingSummary(NamedTuple):
+    """ Summary of the timing [in seconds] """
+
+    count: int
+    mean: float
+    p50: float
+    p95: float
+    max: float
+
+
+class _Timing:
+    """ Total count and sum of the observed values with the last samples """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples: collections.deque[float] = collections.deque(maxlen=TIMING_SAMPLES_SIZE)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def summarize(self) -> TimingSummary:
+        ordered_samples = sorted(self.samples)
+
+        def percentile(percent: float) -> float:
+            return ordered_samples[min(int(percent / 100 * len(ordered_samples)), len(ordered_samples) - 1)]
+
+        return TimingSummary(self.count, self.total / self.count, percentile(50), percentile(95), ordered_samples[-1])
+
+
+class Metrics:
+    """
+    Implements registry of the counters and timings.
+    Every metric is identified by the name and optionally split by the label.
+    """
+
+    def __init__(self):
+        self._counters: collections.Counter[tuple[str, Optional[Hashable]]] = collections.Counter()
+        self._timings: dict[tuple[str, Optional[Hashable]], _Timing] = {}
+
+    def increment(self, name: str, label: Optional[Hashable] = None, value: int = 1) -> None:
+        """ Increment counter """
+        self._counters[name, label] += value
+
+    def get(self, name: str, label: Optional[Hashable] = None) -> int:
+        """ Return value of the counter """
+        return self._counters[name, label]
+
+    def get_labeled(self, name: str) -> dict[Hashable, int]:
+        """ Return values of the counter split by labels """
+        return {
+            label: value
+            for (counter_name, label), value in self._counters.items()
+            if counter_name == name and label is not None
+        }
+
+    def observe(self, name: str, label: Optional[Hashable] = None, value: float = 0.0) -> None:
+        """ Observe value of the timing [in seconds] """
+        timing = self._timings.get((name, label))
+        if timing is None:
+            timing = self._timings[name, label] = _Timing()
+
+        timing.observe(value)
+
+    def get_timings(self, name: str) -> dict[Optional[Hashable], TimingSummary]:
+        """ Return summaries of the timing split by labels """
+        return {
+            label: timing.summarize()
+            for (timing_name, label), timing in self._timings.items()
+            if timing_name == name
+        }
+
+    def reset(self) -> None:
+        """ Reset all metrics """
+        self._counters.clear()
+        self._timings.clear()
+
+
+metrics = Metrics()
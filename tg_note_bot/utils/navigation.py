@@ -0,0 +1,134 @@
+"""
+Contains helpers for the navigation between the bot steps.
+
+Behaviour depends on `NAVIGATION_MODE` setting:
+    * `classic` - every step is answered with the new message;
+    * `edit_in_place` - result of the inline keyboard choice replaces the message with keyboard,
+      acknowledgement of the step is merged with the next prompt - each step costs one Bot API call.
+
+.. async:: show_callback_result(call: types.CallbackQuery, text: str, *,
+        reply_markup: Optional[ReplyMarkup] = None, menu_markup: Optional[types.ReplyKeyboardMarkup] = None,
+        **kwargs) -> None
+.. async:: answer_with_acknowledgement(message: types.Message, acknowledgement: str, text: str, *,
+        reply_markup: Optional[ReplyMarkup] = None, **kwargs) -> None
+
+.. def:: is_edit_in_place() -> bool
+
+.. const:: NAVIGATION_MODE_CLASSIC
+.. const:: NAVIGATION_MODE_EDIT_IN_PLACE
+"""
+
+import logging
+from typing import (
+    Optional,
+    Union
+)
+
+from aiogram import types
+from aiogram.utils import markdown as md
+from aiogram.utils.exceptions import (
+    MessageCantBeEdited,
+    MessageToEditNotFound
+)
+
+from ..settings import NAVIGATION_MODE
+
+
+__all__ = [
+    'show_callback_result',
+    'answer_with_acknowledgement',
+    'is_edit_in_place',
+    'NAVIGATION_MODE_CLASSIC',
+    'NAVIGATION_MODE_EDIT_IN_PLACE'
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+NAVIGATION_MODE_CLASSIC = 'classic'
+NAVIGATION_MODE_EDIT_IN_PLACE = 'edit_in_place'
+
+if NAVIGATION_MODE not in (NAVIGATION_MODE_CLASSIC, NAVIGATION_MODE_EDIT_IN_PLACE):
+    raise ValueError(f'Unknown navigation mode: <{NAVIGATION_MODE}>')
+
+ReplyMarkup = Union[
+    types.InlineKeyboardMarkup,
+    types.ReplyKeyboardMarkup,
+    types.ReplyKeyboardRemove,
+    types.ForceReply
+]
+
+
+def is_edit_in_place() -> bool:
+    """ Return True if messages are edited in place """
+    return NAVIGATION_MODE == NAVIGATION_MODE_EDIT_IN_PLACE
+
+
+async def show_callback_result(call: types.CallbackQuery, text: str, *,
+                               reply_markup: Optional[ReplyMarkup] = None,
+                               menu_markup: Optional[types.ReplyKeyboardMarkup] = None,
+                               **kwargs) -> None:
+    """
+    Show result of the inline keyboard choice.
+
+    In `edit_in_place` mode message with inline keyboard is edited [text is replaced, keyboard is removed].
+    Only inline keyboard might be attached on editing, so if `reply_markup` is another keyboard
+    or message can not be edited - result is sent in the new message.
+
+    In `classic` mode inline keyboard is removed and result is sent in the new message.
+
+    :param call: callback query from the inline keyboard
+    :type call: types.CallbackQuery
+    :param text: result text
+    :type text: str
+    :keyword reply_markup: keyboard that is required for the next step
+    :type reply_markup: Optional[ReplyMarkup]
+    :keyword menu_markup: menu keyboard that is sent only with the new message
+        [on editing the previously sent reply keyboard is kept available]
+    :type menu_markup: Optional[types.ReplyKeyboardMarkup]
+    :param kwargs: named arguments that will be passed in sending/editing method
+
+    :return: None
+    :rtype: None
+    """
+
+    if is_edit_in_place() and (reply_markup is None or isinstance(reply_markup, types.InlineKeyboardMarkup)):
+        try:
+            await call.message.edit_text(text, reply_markup=reply_markup, **kwargs)
+        except (MessageCantBeEdited, MessageToEditNotFound) as error:
+            logger.debug(f'Message can not be edited in place [{error}]. New message will be sent')
+        else:
+            return
+    else:
+        await call.message.delete_reply_markup()
+
+    await call.message.answer(text, reply_markup=reply_markup or menu_markup, **kwargs)
+
+
+async def answer_with_acknowledgement(message: types.Message, acknowledgement: str, text: str, *,
+                                      reply_markup: Optional[ReplyMarkup] = None,
+                                      **kwargs) -> None:
+    """
+    Answer with acknowledgement of the step and with text of the next step.
+    In `edit_in_place` mode both are sent in one message, in `classic` mode - in two messages.
+
+    :param message: message to answer
+    :type message: types.Message
+    :param acknowledgement: acknowledgement of the passed step
+    :type acknowledgement: str
+    :param text: text of the next step
+    :type text: str
+    :keyword reply_markup: keyboard for the next step
+    :type reply_markup: Optional[ReplyMarkup]
+    :param kwargs: named arguments that will be passed in sending method
+
+    :return: None
+    :rtype: None
+    """
+
+    if is_edit_in_place():
+        await message.answer(md.text(acknowledgement, text, sep='\n'), reply_markup=reply_markup, **kwargs)
+    else:
+        await message.answer(acknowledgement)
+        await message.answer(text, reply_markup=reply_markup, **kwargs)
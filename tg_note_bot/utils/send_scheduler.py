@@ -0,0 +1,330 @@
+"""
+Contains scheduler of the outbound Bot API requests that honors Telegram rate limits.
+
+Requests of the chat are queued and sent one by one [in order] under two token buckets:
+the global one [~30 messages per second] and the chat one [~1 message per second with small burst].
+Global bucket is shared by all processes of the bot [worker processes send in parallel]:
+it is kept in redis and evaluated by the Lua script [one round-trip, time is taken from the redis server].
+Its capacity is 1 token, so messages are spread evenly [no burst on top of the refilled tokens].
+`RetryAfter` error delays the queue of the chat and the request is repeated,
+so under load replies are delayed instead of lost [or bot is banned].
+
+.. class:: TokenBucket
+.. class:: RedisTokenBucket
+.. class:: OutboundScheduler
+
+.. def:: is_scheduled_method(method: str) -> bool
+"""
+
+import asyncio
+import collections
+import hashlib
+import logging
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Optional,
+    Union
+)
+
+from aiogram.dispatcher.storage import BaseStorage
+from aiogram.utils.exceptions import RetryAfter
+from aioredis import (
+    RedisError,
+    ReplyError
+)
+
+from .cache import LRUCache
+from .metrics import metrics
+
+
+__all__ = ['TokenBucket', 'RedisTokenBucket', 'OutboundScheduler', 'is_scheduled_method']
+
+
+logger = logging.getLogger(__name__)
+
+
+# methods that are counted by Telegram as the sent messages
+SCHEDULED_METHODS_PREFIXES = ('send', 'edit', 'copy', 'forward')
+NON_SCHEDULED_METHODS = frozenset({'sendchataction'})
+
+# redis key of the global bucket is `<prefix>:outbound:global`
+GLOBAL_BUCKET_KEY_PARTS = ('outbound', 'global')
+
+# KEYS: redis key of the bucket; ARGV: tokens refilled per second, capacity
+# returns: 0 - token is taken, else time in ms until token is available
+ACQUIRE_TOKEN_SCRIPT = '''
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate / 1000)
+local delay = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    delay = math.max(1, math.ceil((1 - tokens) * 1000 / rate))
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity * 1000 / rate) + 1000)
+return delay
+'''
+ACQUIRE_TOKEN_SCRIPT_DIGEST = hashlib.sha1(ACQUIRE_TOKEN_SCRIPT.encode()).hexdigest()
+
+ChatId = Union[int, str]
+RequestFactory = Callable[[], Awaitable[Any]]
+
+
+def is_scheduled_method(method: str) -> bool:
+    """ Return whether requests of the method are counted in the rate limits """
+    method = method.lower()
+    return method.startswith(SCHEDULED_METHODS_PREFIXES) and method not in NON_SCHEDULED_METHODS
+
+
+class TokenBucket:
+    """
+    Implements token bucket: tokens are refilled with the constant rate up to the capacity,
+    every acquiring takes one token.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        :param rate: quantity of the tokens refilled per second
+        :type rate: float
+        :param capacity: max quantity of the tokens [burst]
+        :type capacity: float
+        """
+
+        self.rate = rate
+        self.capacity = capacity
+
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def get_delay(self) -> float:
+        """ Return time in seconds until token is available """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """ Wait until token is available and take it """
+        while (delay := self.get_delay()) > 0:
+            await asyncio.sleep(delay)
+
+        self._tokens -= 1
+
+
+class RedisTokenBucket:
+    """
+    Implements token bucket that is shared by processes [redis connection and keys prefix are taken from the storage].
+    If redis is not available, tokens are taken from the bucket of the process [requests are not lost].
+    """
+
+    def __init__(self, storage: BaseStorage, rate: float, capacity: float):
+        """
+        :param storage: redis FSM storage [`redis()` and `generate_key()` are used]
+        :type storage: BaseStorage
+        :param rate: quantity of the tokens refilled per second
+        :type rate: float
+        :param capacity: max quantity of the tokens [burst]
+        :type capacity: float
+        """
+
+        self.storage = storage
+        self.rate = rate
+        self.capacity = capacity
+
+        self._key = storage.generate_key(*GLOBAL_BUCKET_KEY_PARTS)
+        self._fallback_bucket = TokenBucket(rate, capacity)
+
+    async def get_delay(self) -> float:
+        """ Take token if it is available and return 0, else return time in seconds until it is available """
+        redis = await self.storage.redis()
+        args = [self.rate, self.capacity]
+        try:
+            delay_in_ms = await redis.evalsha(ACQUIRE_TOKEN_SCRIPT_DIGEST, keys=[self._key], args=args)
+        except ReplyError as e:
+            if not str(e).startswith('NOSCRIPT'):
+                raise
+            # script is cached by redis on the first evaluation
+            delay_in_ms = await redis.eval(ACQUIRE_TOKEN_SCRIPT, keys=[self._key], args=args)
+
+        return delay_in_ms / 1000
+
+    async def acquire(self) -> None:
+        """ Wait until token is available and take it """
+        try:
+            while (delay := await self.get_delay()) > 0:
+                await asyncio.sleep(delay)
+        except (OSError, RedisError):
+            logger.exception('Global rate limit is not available in redis - the limit of the process is used')
+            await self._fallback_bucket.acquire()
+
+
+class _ChatQueue:
+    """ Queue of the requests to the chat with the drain task """
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.requests: collections.deque[tuple[RequestFactory, asyncio.Future]] = collections.deque()
+        self.task: Optional[asyncio.Task] = None
+
+
+class OutboundScheduler:
+    """
+    Implements scheduler of the outbound requests.
+    Every chat has own queue that is drained by the separate task while it is not empty.
+    """
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: int, *,
+                 chats_cache_size: int, max_retries: int, storage: Optional[BaseStorage] = None):
+        """
+        :param global_rate: messages per second to all chats [of all processes]
+        :type global_rate: float
+        :param chat_rate: messages per second to one chat
+        :type chat_rate: float
+        :param chat_burst: quantity of the messages that might be sent in the chat at once
+        :type chat_burst: int
+        :keyword chats_cache_size: quantity of the chats whose buckets are kept after their queues are drained
+        :type chats_cache_size: int
+        :keyword max_retries: times the request is repeated after `RetryAfter` error
+        :type max_retries: int
+        :keyword storage: FSM storage - global bucket is kept in redis if it is the redis one
+            [else it is the bucket of the process - bot is run in one process]
+        :type storage: Optional[BaseStorage]
+        """
+
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+
+        # capacity is 1 token: the rate is not exceeded by the burst of the full bucket
+        self._global_bucket: Union[TokenBucket, RedisTokenBucket] = (
+            RedisTokenBucket(storage, global_rate, 1) if hasattr(storage, 'redis') else TokenBucket(global_rate, 1)
+        )
+        self._chat_buckets = LRUCache(chats_cache_size)
+        self._queues: dict[ChatId, _ChatQueue] = {}
+
+    @property
+    def queued_requests(self) -> int:
+        """ Quantity of the requests that are waiting in the queues """
+        return sum(len(queue.requests) for queue in self._queues.values())
+
+    def submit(self, chat_id: ChatId, request_factory: RequestFactory) -> asyncio.Future:
+        """
+        Queue the request to the chat.
+
+        :param chat_id: chat the request is sent to
+        :type chat_id: Union[int, str]
+        :param request_factory: function that makes the request [called again on retry]
+        :type request_factory: Callable[[], Awaitable]
+
+        :return: future with the result of the request
+        :rtype: asyncio.Future
+        """
+
+        future = asyncio.get_running_loop().create_future()
+
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = _ChatQueue(self._get_chat_bucket(chat_id))
+
+        queue.requests.append((request_factory, future))
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._drain(chat_id, queue))
+
+        return future
+
+    async def wait_drained(self, timeout: float) -> int:
+        """
+        Wait until queued requests are sent [queues that are not drained in time are cancelled].
+
+        :param timeout: max time in seconds to wait
+        :type timeout: float
+
+        :return: quantity of the requests that have not been sent in time
+        :rtype: int
+        """
+
+        tasks = [queue.task for queue in self._queues.values() if queue.task is not None]
+        if not tasks:
+            return 0
+
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if not pending:
+            return 0
+
+        dropped_requests = self.queued_requests
+        for task in pending:
+            task.cancel()
+        await asyncio.wait(pending)
+
+        return dropped_requests
+
+    def _get_chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets.set(chat_id, bucket)
+
+        return bucket
+
+    async def _drain(self, chat_id: ChatId, queue: _ChatQueue) -> None:
+        try:
+            while queue.requests:
+                request_factory, future = queue.requests[0]
+                await self._send(chat_id, queue.bucket, request_factory, future)
+                queue.requests.popleft()
+        finally:
+            del self._queues[chat_id]
+
+            # queue might be stopped by cancellation
+            for _, future in queue.requests:
+                future.cancel()
+
+    async def _send(self, chat_id: ChatId, bucket: TokenBucket, request_factory: RequestFactory,
+                    future: asyncio.Future) -> None:
+        for attempt in range(self.max_retries + 1):
+            await bucket.acquire()
+            await self._global_bucket.acquire()
+
+            if future.cancelled():
+                return
+
+            try:
+                result = await request_factory()
+            except RetryAfter as error:
+                metrics.increment('api_retry_after')
+
+                if attempt == self.max_retries:
+                    self._set_future(future, exception=error)
+                    return
+
+                logger.warning(f'Requests to the chat <{chat_id}> are delayed on {error.timeout} seconds')
+                await asyncio.sleep(error.timeout)
+            except Exception as error:
+                self._set_future(future, exception=error)
+                return
+            else:
+                self._set_future(future, result=result)
+                return
+
+    @staticmethod
+    def _set_future(future: asyncio.Future, *, result: Any = None, exception: Optional[Exception] = None) -> None:
+        # sender might stop waiting [e.g. its task is cancelled]
+        if future.done():
+            return
+
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
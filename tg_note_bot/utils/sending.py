@@ -0,0 +1,94 @@
+"""
+Contains sending of the message to the chats [admins, broadcast recipients].
+
+Messages are sent concurrently [with bounded concurrency] and optionally under the rate limit,
+chats that have blocked the bot [or do not exist] are returned separately from the failed ones.
+Any error of the one chat [API errors, request timeouts, ...] fails only its message, not the whole sending.
+
+.. class:: SendingResult(NamedTuple)
+
+.. async:: send_to_chats(bot: Bot, chat_ids: Iterable[int], text: str, *, concurrency: int,
+        rate_limiter: Optional[TokenBucket] = None) -> SendingResult
+"""
+
+import asyncio
+import logging
+from typing import (
+    Iterable,
+    NamedTuple,
+    Optional
+)
+
+from aiogram import Bot
+from aiogram.utils.exceptions import (
+    ChatNotFound,
+    TelegramAPIError,
+    Unauthorized
+)
+
+from .send_scheduler import TokenBucket
+
+
+__all__ = ['SendingResult', 'send_to_chats']
+
+
+logger = logging.getLogger(__name__)
+
+
+class SendingResult(NamedTuple):
+    """ Result of the sending of the message to the chats """
+
+    sent_count: int
+    failed_count: int
+    blocked_chat_ids: list[int]
+
+
+async def send_to_chats(bot: Bot, chat_ids: Iterable[int], text: str, *, concurrency: int,
+                        rate_limiter: Optional[TokenBucket] = None) -> SendingResult:
+    """
+    Send message to the chats concurrently.
+
+    :param bot: bot
+    :type bot: Bot
+    :param chat_ids: recipients
+    :type chat_ids: Iterable[int]
+    :param text: message text
+    :type text: str
+    :keyword concurrency: max quantity of the simultaneously sent messages
+    :type concurrency: int
+    :keyword rate_limiter: bucket that limits rate of the sending [not limited if omitted]
+    :type rate_limiter: Optional[TokenBucket]
+
+    :return: quantity of the sent and failed messages, ids of the chats that have blocked the bot
+    :rtype: SendingResult
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    sent_count = failed_count = 0
+    blocked_chat_ids: list[int] = []
+
+    async def send(chat_id: int) -> None:
+        nonlocal sent_count, failed_count
+
+        async with semaphore:
+            if rate_limiter is not None:
+                await rate_limiter.acquire()
+
+            try:
+                await bot.send_message(chat_id, text)
+            except (Unauthorized, ChatNotFound) as error:
+                logger.debug(f'Chat <{chat_id}> is unavailable: {error}')
+                blocked_chat_ids.append(chat_id)
+            except TelegramAPIError as error:
+                logger.warning(f'Message to the chat <{chat_id}> has not been sent: {error}')
+                failed_count += 1
+            except Exception:
+                # e.g. `asyncio.TimeoutError` of the request - aiogram does not wrap it
+                logger.exception(f'Message to the chat <{chat_id}> has not been sent')
+                failed_count += 1
+            else:
+                sent_count += 1
+
+    await asyncio.gather(*[send(chat_id) for chat_id in chat_ids])
+
+    return SendingResult(sent_count, failed_count, blocked_chat_ids)
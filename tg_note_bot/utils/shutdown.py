@@ -0,0 +1,126 @@
+"""
+Contains graceful shutdown of the bot.
+
+Shutdown is done by stages:
+    * intake is stopped [long polling, updates streams];
+    * in-flight updates are waited up to the deadline;
+    * intake tasks that wait for the updates are cancelled;
+    * buffered writes are flushed up to the same deadline:
+        running broadcast is paused after the current batch [its progress is saved],
+        queued outbound requests are sent;
+    * FSM sweeper and event loop lag monitor are stopped, local throttling passes are reconciled,
+      delayed notifications [timers] are cancelled;
+    * FSM storage [redis], db connection pool and bot session are closed.
+Broadcasting and db are imported on demand, so they are not stopped [and not imported] if they have not been used.
+Timings of the stages are logged.
+
+.. async:: shutdown_gracefully(dp: DrainingDispatcher, *, timeout: float) -> None
+"""
+
+import contextlib
+import logging
+import sys
+import time
+from types import ModuleType
+from typing import (
+    Iterator,
+    Optional
+)
+
+from .dispatcher import DrainingDispatcher
+from .fsm_sweeper import stop_sweeper
+from .loop_lag import loop_lag_monitor
+from .throttlers import stop_reconciler
+from .timers import timers
+
+
+__all__ = ['shutdown_gracefully']
+
+
+logger = logging.getLogger(__name__)
+
+
+def _get_imported_module(name: str) -> Optional[ModuleType]:
+    """ Return module of the package if it has been imported """
+    return sys.modules.get(f'{__package__.rpartition(".")[0]}.{name}')
+
+
+async def shutdown_gracefully(dp: DrainingDispatcher, *, timeout: float) -> None:
+    """
+    Shutdown the bot gracefully.
+
+    :param dp: bot dispatcher [bot has to be `InstrumentedBot`]
+    :type dp: DrainingDispatcher
+    :keyword timeout: time in seconds for draining of the in-flight updates and flushing of the buffered writes
+    :type timeout: float
+
+    :return: None
+    :rtype: None
+    """
+
+    timings: list[tuple[str, float]] = []
+    deadline = time.monotonic() + timeout
+
+    def get_remaining_time() -> float:
+        return max(deadline - time.monotonic(), 0.0)
+
+    @contextlib.contextmanager
+    def stage(name: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings.append((name, time.perf_counter() - started_at))
+
+    logger.warning(f'Shutdown has been started [{dp.in_flight_updates} in-flight updates]')
+    started_at = time.perf_counter()
+
+    with stage('intake stopping'):
+        dp.stop_intake()
+
+    with stage('in-flight updates draining'):
+        if not await dp.wait_drained(get_remaining_time()):
+            logger.warning(f'{dp.in_flight_updates} in-flight updates have not been processed before deadline')
+
+    with stage('intake tasks cancelling'):
+        await dp.cancel_intake_tasks()
+
+    broadcasting = _get_imported_module('utils.broadcasting')
+    with stage('broadcast pausing'):
+        if broadcasting is not None and not await broadcasting.stop_broadcast(get_remaining_time()):
+            logger.warning('Broadcast has been cancelled before the end of the batch [batch is resent on resume]')
+
+    with stage('outbound queues flushing'):
+        send_scheduler = dp.bot.send_scheduler
+        if send_scheduler is not None and (dropped_requests := await send_scheduler.wait_drained(get_remaining_time())):
+            logger.warning(f'{dropped_requests} queued requests have not been sent before deadline')
+
+    with stage('FSM sweeper stopping'):
+        await stop_sweeper()
+
+    with stage('event loop lag monitor stopping'):
+        await loop_lag_monitor.stop()
+
+    with stage('throttling reconciliation'):
+        await stop_reconciler()
+
+    with stage('timers cancelling'):
+        if cancelled_timers := timers.cancel_all():
+            logger.warning(f'{cancelled_timers} pending timers have been cancelled')
+
+    with stage('storage closing'):
+        await dp.storage.close()
+        await dp.storage.wait_closed()
+
+    postgres = _get_imported_module('db.postgres')
+    with stage('db pool disposing'):
+        if postgres is not None:
+            await postgres.engine.dispose()
+
+    with stage('bot session closing'):
+        await dp.bot.session.close()
+
+    logger.warning(
+        f'Shutdown has been finished in {time.perf_counter() - started_at:.2f} s: '
+        + ', '.join(f'{name} {elapsed:.2f} s' for name, elapsed in timings)
+    )
@@ -0,0 +1,168 @@
+"""
+Contains profiling of the bot startup [app importing and dp setup].
+
+Startup is profiled in the separate interpreter with `-X importtime` [modules are imported once per process]:
+    * phases: app importing, dp setup [handlers and middlewares registration in the run mode];
+    * import time digest: the slowest modules [by self time] and top-level packages [by summed self time].
+Time of the phases is compared with the startup budget.
+
+.. class:: ImportRecord(NamedTuple)
+.. class:: StartupProfile(NamedTuple)
+
+.. def:: profile_startup(run_mode: str, *, budget: float) -> StartupProfile
+.. def:: parse_import_times(output: str) -> list[ImportRecord]
+"""
+
+import collections
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import time
+from typing import NamedTuple
+
+
+__all__ = ['ImportRecord', 'StartupProfile', 'profile_startup', 'parse_import_times']
+
+
+IMPORT_TIME_LINE_PREFIX = 'import time:'
+PHASES_LINE_PREFIX = 'startup phases:'
+# code run in the profiled interpreter [run mode is passed as argument]
+PROFILED_CODE = f'''
+import json, sys, time
+started_at = time.perf_counter()
+import tg_note_bot.app as app
+imported_at = time.perf_counter()
+app.setup_dispatcher(sys.argv[1])
+set_up_at = time.perf_counter()
+print({PHASES_LINE_PREFIX!r}, json.dumps({{'app importing': imported_at - started_at, 'dp setup': set_up_at - imported_at}}))
+'''
+
+
+class ImportRecord(NamedTuple):
+    """ Import time of the module [in seconds] """
+
+    name: str
+    self_time: float
+    cumulative_time: float
+
+    @property
+    def package(self) -> str:
+        """ Top-level package of the module """
+        return self.name.partition('.')[0]
+
+
+class StartupProfile(NamedTuple):
+    """ Profile of the startup [in seconds] """
+
+    run_mode: str
+    phases: dict[str, float]
+    imports: list[ImportRecord]
+    # time of the interpreter process [with interpreter startup and profiling overhead]
+    process_time: float
+    budget: float
+
+    @property
+    def total(self) -> float:
+        """ Time of the startup phases """
+        return sum(self.phases.values())
+
+    @property
+    def is_within_budget(self) -> bool:
+        """ Whether startup phases fit in the budget """
+        return self.total <= self.budget
+
+    def format_report(self, top: int) -> str:
+        """
+        Return report of the profile.
+
+        :param top: quantity of the slowest modules and packages in report
+        :type top: int
+
+        :return: report
+        :rtype: str
+        """
+
+        packages_time: collections.Counter[str] = collections.Counter()
+        for record in self.imports:
+            packages_time[record.package] += record.self_time
+
+        slowest_modules = sorted(self.imports, key=lambda record: record.self_time, reverse=True)[:top]
+
+        return '\n'.join([
+            f'Startup profile [run mode: {self.run_mode}]: {self.total * 1000:.0f} ms '
+            f'of {self.budget * 1000:.0f} ms budget - {"OK" if self.is_within_budget else "EXCEEDED"} '
+            f'[process: {self.process_time * 1000:.0f} ms, {len(self.imports)} modules imported]',
+            *[f'\t{phase}: {elapsed * 1000:.0f} ms' for phase, elapsed in self.phases.items()],
+            'Slowest packages [self time]:',
+            *[f'\t{package}: {elapsed * 1000:.0f} ms' for package, elapsed in packages_time.most_common(top)],
+            'Slowest modules [self time | cumulative time]:',
+            *[
+                f'\t{record.name}: {record.self_time * 1000:.1f} | {record.cumulative_time * 1000:.1f} ms'
+                for record in slowest_modules
+            ]
+        ])
+
+
+def parse_import_times(output: str) -> list[ImportRecord]:
+    """
+    Parse output of the `-X importtime` [`import time: self [us] | cumulative | imported package`].
+
+    :param output: stderr of the interpreter
+    :type output: str
+
+    :return: import times of the modules
+    :rtype: list[ImportRecord]
+    """
+
+    records = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORT_TIME_LINE_PREFIX):
+            continue
+
+        self_time, cumulative_time, name = line[len(IMPORT_TIME_LINE_PREFIX):].split('|')
+        # header line
+        if not self_time.strip().isdigit():
+            continue
+
+        records.append(ImportRecord(name.strip(), int(self_time) / 1_000_000, int(cumulative_time) / 1_000_000))
+
+    return records
+
+
+def profile_startup(run_mode: str, *, budget: float) -> StartupProfile:
+    """
+    Profile startup in the separate interpreter.
+
+    :param run_mode: bot run mode [dp setup depends on it]
+    :type run_mode: str
+    :keyword budget: time in seconds the startup phases have to fit in
+    :type budget: float
+
+    :return: startup profile
+    :rtype: StartupProfile
+
+    :raises RuntimeError: raised if profiled interpreter has failed
+    """
+
+    env = dict(os.environ)
+    package_parent_path = str(pathlib.Path(__file__).parent.parent.parent)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [package_parent_path, env.get('PYTHONPATH')]))
+
+    started_at = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROFILED_CODE, run_mode],
+        env=env, capture_output=True, text=True
+    )
+    process_time = time.perf_counter() - started_at
+
+    phases_lines = [line for line in process.stdout.splitlines() if line.startswith(PHASES_LINE_PREFIX)]
+    if process.returncode or not phases_lines:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith(IMPORT_TIME_LINE_PREFIX)]
+        raise RuntimeError('Profiled startup has failed:\n' + '\n'.join(errors[-30:]))
+
+    return StartupProfile(
+        run_mode, json.loads(phases_lines[-1][len(PHASES_LINE_PREFIX):]), parse_import_times(process.stderr),
+        process_time, budget
+    )
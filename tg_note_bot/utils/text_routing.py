@@ -0,0 +1,193 @@
+"""
+Contains handler of the messages that routes them by the exact text [reply keyboard buttons].
+
+Aiogram checks filters of the every registered handler until one of them passes,
+so the text message that is not the first button walks all `text=` filters of the buttons.
+Routing handler looks up handlers that might pass in the table by `(state, text)`:
+    * handlers with the exact `text=` filter - only the ones with this text;
+    * handlers with the `state=` filter - only the ones with this state or any state;
+    * handlers with the other filters - all of them.
+Handlers of the route keep the order of registration, and their filters are checked as usual
+[table only skips handlers whose filters cannot pass]. State is read once per update as `StateFilter` reads it.
+
+.. class:: TextRoutingHandler(Handler)
+.. class:: TextRoutingDispatcher(Dispatcher)
+"""
+
+from typing import (
+    Any,
+    Optional
+)
+
+from aiogram import (
+    Dispatcher,
+    types
+)
+from aiogram.dispatcher.filters import (
+    StateFilter,
+    Text
+)
+from aiogram.dispatcher.filters.filters import (
+    FilterNotPassed,
+    check_filters
+)
+from aiogram.dispatcher.handler import (
+    CancelHandler,
+    Handler,
+    SkipHandler,
+    _check_spec,
+    ctx_data,
+    current_handler
+)
+
+
+__all__ = ['TextRoutingHandler', 'TextRoutingDispatcher']
+
+
+# (state, exact text [`None` - text of no one button])
+RouteKey = tuple[Optional[str], Optional[str]]
+
+
+class TextRoutingHandler(Handler):
+    """ Implements handler of the messages that routes them by the table of the exact texts and states """
+
+    def __init__(self, dispatcher, once: bool = True, middleware_key: Optional[str] = None):
+        super(TextRoutingHandler, self).__init__(dispatcher, once=once, middleware_key=middleware_key)
+
+        # handler: (exact texts, states) [`None` - any one]
+        self._conditions: list[tuple[Handler.HandlerObj, Optional[frozenset[str]], Optional[frozenset[str]]]] = []
+        self._texts: frozenset[str] = frozenset()
+        self._routes: dict[RouteKey, list[Handler.HandlerObj]] = {}
+        self._is_compiled = False
+
+    def register(self, handler, filters=None, index=None):
+        super(TextRoutingHandler, self).register(handler, filters=filters, index=index)
+        self._is_compiled = False
+
+    def unregister(self, handler):
+        is_unregistered = super(TextRoutingHandler, self).unregister(handler)
+        self._is_compiled = False
+
+        return is_unregistered
+
+    def get_route(self, state: Optional[str], text: Optional[str]) -> list[Handler.HandlerObj]:
+        """
+        Return handlers whose filters might pass [routes are built lazily - once per key].
+
+        :param state: state of the user
+        :type state: Optional[str]
+        :param text: text of the message
+        :type text: Optional[str]
+
+        :return: handlers in the order of registration
+        :rtype: list[Handler.HandlerObj]
+        """
+
+        if not self._is_compiled:
+            self._compile()
+
+        key = (state, text if text in self._texts else None)
+        try:
+            return self._routes[key]
+        except KeyError:
+            route = self._routes[key] = [
+                handler_obj
+                for handler_obj, texts, states in self._conditions
+                if (texts is None or key[1] in texts) and (states is None or state in states)
+            ]
+            return route
+
+    def _compile(self) -> None:
+        self._conditions = [(handler_obj, *self._get_conditions(handler_obj)) for handler_obj in self.handlers]
+        self._texts = frozenset().union(*[texts for _, texts, _ in self._conditions if texts is not None])
+        self._routes = {}
+        self._is_compiled = True
+
+    @staticmethod
+    def _get_conditions(handler_obj: Handler.HandlerObj) -> tuple[Optional[frozenset[str]], Optional[frozenset[str]]]:
+        """ Return exact texts and states of the handler filters [`None` - filters pass any one] """
+        texts = states = None
+        for filter_obj in handler_obj.filters or ():
+            filter_ = filter_obj.filter
+            if isinstance(filter_, Text):
+                is_exact = (
+                    filter_.equals is not None and not filter_.ignore_case
+                    and all(isinstance(text, str) for text in filter_.equals)
+                )
+                if is_exact:
+                    texts = frozenset(filter_.equals) if texts is None else texts & frozenset(filter_.equals)
+            elif isinstance(filter_, StateFilter) and '*' not in filter_.states:
+                states = frozenset(filter_.states) if states is None else states & frozenset(filter_.states)
+
+        return texts, states
+
+    async def _get_state(self, message: types.Message) -> Optional[str]:
+        """ Return state of the user [read once per update - the same value as `StateFilter` reads] """
+        try:
+            return StateFilter.ctx_state.get()
+        except LookupError:
+            state = await self.dispatcher.storage.get_state(chat=message.chat.id, user=message.from_user.id)
+            StateFilter.ctx_state.set(state)
+
+            return state
+
+    async def notify(self, *args) -> list[Any]:
+        """ Notify handlers of the route [the same as `Handler.notify` otherwise] """
+        results = []
+
+        data = {}
+        ctx_data.set(data)
+
+        if self.middleware_key:
+            try:
+                await self.dispatcher.middleware.trigger(f'pre_process_{self.middleware_key}', args + (data,))
+            except CancelHandler:
+                return results
+
+        try:
+            message = args[0]
+            if isinstance(message, types.Message) and message.chat and message.from_user:
+                # text as `Text` filter takes it
+                text = message.text or message.caption or (message.poll.question if message.poll else '')
+                handlers = self.get_route(await self._get_state(message), text)
+            else:
+                handlers = self.handlers
+
+            for handler_obj in handlers:
+                try:
+                    data.update(await check_filters(handler_obj.filters, args))
+                except FilterNotPassed:
+                    continue
+                else:
+                    ctx_token = current_handler.set(handler_obj.handler)
+                    try:
+                        if self.middleware_key:
+                            await self.dispatcher.middleware.trigger(f'process_{self.middleware_key}', args + (data,))
+                        partial_data = _check_spec(handler_obj.spec, data)
+                        response = await handler_obj.handler(*args, **partial_data)
+                        if response is not None:
+                            results.append(response)
+                        if self.once:
+                            break
+                    except SkipHandler:
+                        continue
+                    except CancelHandler:
+                        break
+                    finally:
+                        current_handler.reset(ctx_token)
+        finally:
+            if self.middleware_key:
+                await self.dispatcher.middleware.trigger(f'post_process_{self.middleware_key}',
+                                                         args + (results, data,))
+
+        return results
+
+
+class TextRoutingDispatcher(Dispatcher):
+    """ Implements dispatcher that routes messages by `TextRoutingHandler` """
+
+    def _setup_filters(self):
+        # builtin filters are bound to the handlers of the events, so handler is replaced before binding
+        self.message_handlers = TextRoutingHandler(self, middleware_key='message')
+
+        super(TextRoutingDispatcher, self)._setup_filters()
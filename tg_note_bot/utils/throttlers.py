@@ -0,0 +1,420 @@
+"""
+Contains throttlers [backends of the anti-flood middleware].
+
+Dispatcher throttling reads the bucket of the user, calculates it and writes it back:
+it takes several round-trips to redis and it is not atomic [concurrent updates of the user
+processed by the several workers read the same bucket and all of them pass].
+Redis throttler evaluates the limiter in the Lua script: one round-trip, atomic across processes,
+time is taken from the redis server [clocks of the workers do not matter].
+
+Limiter is the sliding window of dispatcher throttling: call passes if the rate limit has passed since
+the previous call of the key [passed or throttled - flooding user stays locked], exceeds are counted.
+
+Local-first throttler saves the redis call for users that do not flood [almost all of them]:
+the process keeps token bucket of the key [1 token is refilled in the rate limit], full bucket passes the call
+locally, the call of the exhausted bucket is escalated to the redis limiter. Local passes are sent to redis
+with the escalated call of the key and by reconciler [periodically], so other processes see them with the lag
+of the reconciliation interval [updates of the user usually go to one process].
+
+.. class:: Throttler(ABC)
+.. class:: BucketThrottler(Throttler)
+.. class:: RedisThrottler(Throttler)
+.. class:: LocalFirstThrottler(Throttler)
+
+.. def:: create_throttler(storage: BaseStorage, *, local_first: bool = False) -> Throttler
+.. def:: start_reconciler(throttler: Throttler, *, interval: float) -> None
+.. async:: stop_reconciler() -> None
+
+.. const:: THROTTLING_KEY_SUFFIX
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from abc import (
+    ABC,
+    abstractmethod
+)
+from typing import (
+    Any,
+    Iterable,
+    Optional,
+    Union
+)
+
+from aiogram import Dispatcher
+from aiogram.dispatcher.storage import (
+    BaseStorage,
+    DELTA,
+    EXCEEDED_COUNT,
+    KEY,
+    LAST_CALL,
+    RATE_LIMIT,
+    RESULT
+)
+from aiogram.utils.exceptions import Throttled
+from aioredis import ReplyError
+
+from .metrics import metrics
+
+
+__all__ = [
+    'Throttler', 'BucketThrottler', 'RedisThrottler', 'LocalFirstThrottler',
+    'create_throttler', 'start_reconciler', 'stop_reconciler',
+    'THROTTLING_KEY_SUFFIX'
+]
+
+
+logger = logging.getLogger(__name__)
+
+
+# redis key of the throttling key is `<prefix>:<chat>:<user>:throttling:<throttling key>`
+THROTTLING_KEY_SUFFIX = 'throttling'
+
+# max quantity of the local passes sent to redis by one call
+RECONCILE_BATCH_SIZE = 500
+
+# KEYS: redis key of the throttling key;
+# ARGV: rate limit in ms, [ms since the local pass of the process that redis does not know]
+# returns: exceeded count [1 - call passes], delta in ms, time of the call in ms
+THROTTLE_SCRIPT = '''
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local rate = tonumber(ARGV[1])
+local last = redis.call('HMGET', KEYS[1], 'called_at', 'exceeded')
+local called_at = tonumber(last[1])
+local exceeded = tonumber(last[2]) or 1
+if ARGV[2] then
+    local passed_at = now - tonumber(ARGV[2])
+    if not called_at or passed_at > called_at then
+        called_at = passed_at
+        exceeded = 1
+    end
+end
+local delta = 0
+if called_at then
+    delta = now - called_at
+end
+if called_at and delta >= 0 and delta < rate then
+    exceeded = exceeded + 1
+else
+    exceeded = 1
+end
+redis.call('HSET', KEYS[1], 'called_at', now, 'exceeded', exceeded)
+redis.call('PEXPIRE', KEYS[1], rate * 2 + 1000)
+return {exceeded, delta, now}
+'''
+THROTTLE_SCRIPT_DIGEST = hashlib.sha1(THROTTLE_SCRIPT.encode()).hexdigest()
+
+# KEYS: redis keys of the throttling keys; ARGV: pairs of ms since the local pass and rate limit in ms
+# returns: quantity of the keys whose last call has been moved to the local pass
+RECORD_PASSES_SCRIPT = '''
+redis.replicate_commands()
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local recorded = 0
+for i, key in ipairs(KEYS) do
+    local passed_at = now - tonumber(ARGV[i * 2 - 1])
+    local called_at = tonumber(redis.call('HGET', key, 'called_at'))
+    if not called_at or passed_at > called_at then
+        redis.call('HSET', key, 'called_at', passed_at, 'exceeded', 1)
+        redis.call('PEXPIRE', key, tonumber(ARGV[i * 2]) * 2 + 1000)
+        recorded = recorded + 1
+    end
+end
+return recorded
+'''
+RECORD_PASSES_SCRIPT_DIGEST = hashlib.sha1(RECORD_PASSES_SCRIPT.encode()).hexdigest()
+
+ChatOrUser = Union[str, int, None]
+
+
+class Throttler(ABC):
+    """ Implements interface of the throttler [methods follow dispatcher `throttle` and `check_key`] """
+
+    @abstractmethod
+    async def throttle(self, key: str, *, chat: ChatOrUser, user: ChatOrUser, rate: float) -> None:
+        """
+        Register call of the key.
+
+        :param key: throttling key
+        :type key: str
+        :keyword chat: chat id
+        :type chat: ChatOrUser
+        :keyword user: user id
+        :type user: ChatOrUser
+        :keyword rate: rate limit in seconds
+        :type rate: float
+
+        :return: None
+        :rtype: None
+
+        :raises Throttled: raised if the rate limit is exceeded
+        """
+
+    @abstractmethod
+    async def check_key(self, key: str, *, chat: ChatOrUser, user: ChatOrUser) -> Throttled:
+        """
+        Return the state of the key [without call registering].
+
+        :param key: throttling key
+        :type key: str
+        :keyword chat: chat id
+        :type chat: ChatOrUser
+        :keyword user: user id
+        :type user: ChatOrUser
+
+        :return: state of the key
+        :rtype: Throttled
+        """
+
+
+class BucketThrottler(Throttler):
+    """ Implements throttler by buckets of the FSM storage [dispatcher throttling] """
+
+    async def throttle(self, key: str, *, chat: ChatOrUser, user: ChatOrUser, rate: float) -> None:
+        await Dispatcher.get_current().throttle(key, rate=rate, chat_id=chat, user_id=user, no_error=False)
+
+    async def check_key(self, key: str, *, chat: ChatOrUser, user: ChatOrUser) -> Throttled:
+        return await Dispatcher.get_current().check_key(key, chat_id=chat, user_id=user)
+
+
+class RedisThrottler(Throttler):
+    """ Implements throttler by the Lua script [redis connection and keys prefix are taken from the storage] """
+
+    def __init__(self, storage: BaseStorage):
+        """
+        :param storage: redis FSM storage [`redis()` and `generate_key()` are used]
+        :type storage: BaseStorage
+        """
+
+        self.storage = storage
+
+    async def throttle(self, key: str, *, chat: ChatOrUser, user: ChatOrUser, rate: float,
+                       local_pass_age: Optional[float] = None) -> None:
+        """ `local_pass_age` - time in seconds since the local pass of the key that redis does not know """
+        chat, user = self.storage.check_address(chat=chat, user=user)
+        args = [int(rate * 1000)]
+        if local_pass_age is not None:
+            args.append(int(local_pass_age * 1000))
+
+        exceeded_count, delta_in_ms, called_at_in_ms = await self._evaluate(
+            THROTTLE_SCRIPT, THROTTLE_SCRIPT_DIGEST, keys=[self._generate_key(key, chat, user)], args=args
+        )
+        if exceeded_count > 1:
+            raise Throttled(**{
+                KEY: key, 'chat': chat, 'user': user, RESULT: False, RATE_LIMIT: rate,
+                LAST_CALL: called_at_in_ms / 1000, DELTA: delta_in_ms / 1000, EXCEEDED_COUNT: exceeded_count
+            })
+
+    async def record_passes(self, passes: Iterable[tuple[str, str, str, float, float]]) -> int:
+        """
+        Record local passes of the keys [last call of the key is moved to the pass if it is later].
+
+        :param passes: (throttling key, chat, user, rate limit in seconds, time in seconds since the pass)
+        :type passes: Iterable[tuple[str, str, str, float, float]]
+
+        :return: quantity of the keys whose last call has been moved
+        :rtype: int
+        """
+
+        keys = []
+        args = []
+        for key, chat, user, rate, age in passes:
+            keys.append(self._generate_key(key, chat, user))
+            args.extend((int(age * 1000), int(rate * 1000)))
+
+        if not keys:
+            return 0
+
+        return await self._evaluate(RECORD_PASSES_SCRIPT, RECORD_PASSES_SCRIPT_DIGEST, keys=keys, args=args)
+
+    async def check_key(self, key: str, *, chat: ChatOrUser, user: ChatOrUser) -> Throttled:
+        chat, user = self.storage.check_address(chat=chat, user=user)
+        redis = await self.storage.redis()
+        called_at_in_ms, exceeded_count = await redis.hmget(
+            self._generate_key(key, chat, user), 'called_at', 'exceeded'
+        )
+
+        throttled_data = {KEY: key, 'chat': chat, 'user': user}
+        if called_at_in_ms is not None:
+            throttled_data[LAST_CALL] = int(called_at_in_ms) / 1000
+            throttled_data[EXCEEDED_COUNT] = int(exceeded_count)
+
+        return Throttled(**throttled_data)
+
+    def _generate_key(self, key: str, chat: str, user: str) -> str:
+        return self.storage.generate_key(chat, user, THROTTLING_KEY_SUFFIX, key)
+
+    async def _evaluate(self, script: str, digest: str, *, keys: list[str], args: list[int]) -> Any:
+        redis = await self.storage.redis()
+        try:
+            return await redis.evalsha(digest, keys=keys, args=args)
+        except ReplyError as e:
+            if not str(e).startswith('NOSCRIPT'):
+                raise
+            # script is cached by redis on the first evaluation
+            return await redis.eval(script, keys=keys, args=args)
+
+
+class _LocalBucket:
+    """ Token bucket of the key in the process [capacity is 1 token] """
+
+    __slots__ = ('tokens', 'updated_at', 'passed_at', 'rate')
+
+    def __init__(self, rate: float, now: float):
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated_at = now
+        # time of the local pass that redis does not know [`None` - redis knows all passes]
+        self.passed_at: Optional[float] = None
+
+    def refill(self, now: float) -> float:
+        self.tokens = min(self.tokens + (now - self.updated_at) / self.rate, 1.0)
+        self.updated_at = now
+
+        return self.tokens
+
+
+class LocalFirstThrottler(Throttler):
+    """ Implements two-level throttler: token buckets of the process in front of the redis throttler """
+
+    def __init__(self, shared: RedisThrottler):
+        """
+        :param shared: throttler that is shared by processes
+        :type shared: RedisThrottler
+        """
+
+        self.shared = shared
+
+        self._buckets: dict[tuple[str, str, str], _LocalBucket] = {}
+
+    @property
+    def buckets(self) -> int:
+        """ Quantity of the keys whose buckets are kept in the process """
+        return len(self._buckets)
+
+    async def throttle(self, key: str, *, chat: ChatOrUser, user: ChatOrUser, rate: float) -> None:
+        chat, user = self.shared.storage.check_address(chat=chat, user=user)
+        now = time.monotonic()
+        bucket = self._buckets.get((key, chat, user))
+        if bucket is None:
+            bucket = self._buckets[key, chat, user] = _LocalBucket(rate, now)
+        bucket.rate = rate
+
+        if bucket.refill(now) >= 1.0:
+            bucket.tokens -= 1.0
+            bucket.passed_at = now
+            metrics.increment('throttling_local_passes')
+            return
+
+        local_pass_age = now - bucket.passed_at if bucket.passed_at is not None else None
+        # sliding window: throttled call also restarts it [bucket is empty until the rate limit passes]
+        bucket.tokens = 0.0
+        bucket.passed_at = None
+        metrics.increment('throttling_escalations')
+
+        await self.shared.throttle(key, chat=chat, user=user, rate=rate, local_pass_age=local_pass_age)
+
+    async def check_key(self, key: str, *, chat: ChatOrUser, user: ChatOrUser) -> Throttled:
+        return await self.shared.check_key(key, chat=chat, user=user)
+
+    async def reconcile(self) -> int:
+        """
+        Send local passes to redis and forget buckets that have been refilled [idle keys].
+
+        :return: quantity of the sent passes
+        :rtype: int
+        """
+
+        now = time.monotonic()
+        passes = []
+        for (key, chat, user), bucket in list(self._buckets.items()):
+            if bucket.passed_at is not None:
+                passes.append((key, chat, user, bucket.rate, now - bucket.passed_at))
+                bucket.passed_at = None
+            elif bucket.refill(now) >= 1.0:
+                del self._buckets[key, chat, user]
+
+        for offset in range(0, len(passes), RECONCILE_BATCH_SIZE):
+            await self.shared.record_passes(passes[offset:offset + RECONCILE_BATCH_SIZE])
+
+        if passes:
+            metrics.increment('throttling_reconciled_passes', value=len(passes))
+
+        return len(passes)
+
+
+_reconciler_task: Optional[asyncio.Task] = None
+
+
+def create_throttler(storage: BaseStorage, *, local_first: bool = False) -> Throttler:
+    """
+    Create throttler of the FSM storage.
+
+    :param storage: FSM storage
+    :type storage: BaseStorage
+    :keyword local_first: whether redis throttler is fronted by the token buckets of the process
+    :type local_first: bool
+
+    :return: redis throttler if storage is the redis one [directly or behind cache] else bucket throttler
+    :rtype: Throttler
+    """
+
+    if not hasattr(storage, 'redis'):
+        return BucketThrottler()
+
+    throttler = RedisThrottler(storage)
+    return LocalFirstThrottler(throttler) if local_first else throttler
+
+
+async def _run_reconciler(throttler: LocalFirstThrottler, interval: float) -> None:
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await throttler.reconcile()
+            except Exception:
+                logger.exception('Reconciliation of the local throttling passes has failed')
+    finally:
+        # passes of the last interval are sent on stopping
+        await throttler.reconcile()
+
+
+def start_reconciler(throttler: Throttler, *, interval: float) -> None:
+    """
+    Start reconciler of the local passes in the background [if throttler keeps them].
+
+    :param throttler: throttler of the middleware
+    :type throttler: Throttler
+    :keyword interval: time in seconds between reconciliations
+    :type interval: float
+
+    :return: None
+    :rtype: None
+    """
+
+    global _reconciler_task
+
+    if not isinstance(throttler, LocalFirstThrottler):
+        return
+
+    if _reconciler_task is None or _reconciler_task.done():
+        _reconciler_task = asyncio.create_task(_run_reconciler(throttler, interval))
+
+
+async def stop_reconciler() -> None:
+    """ Stop reconciler [local passes are sent before] """
+    global _reconciler_task
+
+    if _reconciler_task is None:
+        return
+
+    _reconciler_task.cancel()
+    await asyncio.wait([_reconciler_task])
+    if not _reconciler_task.cancelled() and _reconciler_task.exception() is not None:
+        logger.error('Last reconciliation of the local throttling passes has failed',
+                     exc_info=_reconciler_task.exception())
+    _reconciler_task = None
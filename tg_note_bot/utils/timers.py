@@ -0,0 +1,103 @@
+"""
+Contains keyed timers of the delayed background work.
+
+Delayed work [e.g. notification after throttling window] is scheduled on the event loop timer,
+so it does not hold the task [and the update processing] while it waits. Task is created only when timer fires.
+Timer of the key is replaced by the later one: flooding user has one pending timer, not one per message.
+Pending timers and running tasks are shown to admins.
+
+.. class:: Timers
+
+.. data:: timers
+"""
+
+import asyncio
+import logging
+from typing import (
+    Awaitable,
+    Callable,
+    Hashable
+)
+
+from .metrics import metrics
+
+
+__all__ = ['Timers', 'timers']
+
+
+logger = logging.getLogger(__name__)
+
+
+class Timers:
+    """ Implements registry of the keyed timers """
+
+    def __init__(self):
+        self._handles: dict[Hashable, asyncio.TimerHandle] = {}
+        self._running_tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """ Quantity of the timers that have not fired yet """
+        return len(self._handles)
+
+    @property
+    def running(self) -> int:
+        """ Quantity of the tasks of the fired timers that are not done yet """
+        return len(self._running_tasks)
+
+    def call_later(self, key: Hashable, delay: float, callback: Callable[[], Awaitable]) -> None:
+        """
+        Run callback in the new task after delay [pending timer of the key is cancelled].
+
+        :param key: key of the timer
+        :type key: Hashable
+        :param delay: time in seconds
+        :type delay: float
+        :param callback: function that returns awaitable [called when timer fires]
+        :type callback: Callable[[], Awaitable]
+
+        :return: None
+        :rtype: None
+        """
+
+        previous_handle = self._handles.pop(key, None)
+        if previous_handle is not None:
+            previous_handle.cancel()
+            metrics.increment('timers_replaced')
+
+        self._handles[key] = asyncio.get_running_loop().call_later(max(delay, 0.0), self._fire, key, callback)
+        metrics.increment('timers_scheduled')
+
+    def cancel_all(self) -> int:
+        """
+        Cancel pending timers and running tasks [e.g. on shutdown].
+
+        :return: quantity of the cancelled timers
+        :rtype: int
+        """
+
+        cancelled_timers = len(self._handles)
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles.clear()
+
+        for task in self._running_tasks:
+            task.cancel()
+
+        return cancelled_timers
+
+    def _fire(self, key: Hashable, callback: Callable[[], Awaitable]) -> None:
+        del self._handles[key]
+
+        task = asyncio.ensure_future(callback())
+        self._running_tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+
+    def _on_task_done(self, task: asyncio.Task) -> None:
+        self._running_tasks.discard(task)
+
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('Timer callback has failed', exc_info=task.exception())
+
+
+timers = Timers()
@@ -0,0 +1,334 @@
+"""
+Contains processing of the updates via redis streams [`ingest` and `worker` run modes].
+
+Ingest process receives updates by long polling and pushes raw updates in the streams sharded by user id.
+Worker processes consume own shards through the consumer group:
+    * updates of the one user are processed sequentially [FSM needs the order],
+        updates of the different users - concurrently: worker keeps reading while users are processed
+        [slow user does not block others], up to the limit of the in-flight updates;
+    * update is acknowledged after processing, so updates of the crashed worker are redelivered:
+        own pending updates are processed on the start,
+        pending updates of another consumer are claimed after idle timeout
+        [e.g. shard has been moved to another worker].
+Shards are assigned to the worker explicitly [`WORKER_SHARDS` or `WORKER_INDEX` of `WORKER_COUNT`]:
+workers of the one consumer group that read the same stream would split updates of the one user.
+
+.. async:: run_updates_ingest(dp: DrainingDispatcher) -> None
+.. async:: run_updates_worker(dp: DrainingDispatcher) -> None
+
+.. def:: check_worker_shards() -> None
+.. def:: get_update_user_id(update: dict) -> int
+.. def:: get_stream_name(shard: int) -> str
+"""
+
+import asyncio
+import collections
+import json
+import logging
+import time
+from typing import (
+    Any,
+    Optional
+)
+
+import aiohttp
+import aioredis
+from aiogram import types
+
+from ..settings import (
+    REDIS_CONFIG,
+    UPDATES_CONSUMER_GROUP,
+    UPDATES_STREAM_MAX_LENGTH,
+    UPDATES_STREAM_PREFIX,
+    UPDATES_STREAM_SHARDS,
+    WORKER_BATCH_SIZE,
+    WORKER_BLOCK_TIMEOUT_IN_MILLISECONDS,
+    WORKER_MAX_IN_FLIGHT_UPDATES,
+    WORKER_NAME,
+    WORKER_PENDING_IDLE_TIMEOUT_IN_MILLISECONDS,
+    WORKER_SHARDS
+)
+from .dispatcher import DrainingDispatcher
+
+
+__all__ = ['run_updates_ingest', 'run_updates_worker', 'check_worker_shards', 'get_update_user_id', 'get_stream_name']
+
+
+logger = logging.getLogger(__name__)
+
+
+POLLING_TIMEOUT_IN_SECONDS = 20
+UPDATE_FIELD = 'update'
+
+# stream entry: (stream, entry id, fields)
+StreamEntry = tuple[bytes, bytes, dict[bytes, bytes]]
+
+
+def get_update_user_id(update: dict[str, Any]) -> int:
+    """
+    Return id of the user that has initiated the update [chat id if update is not from the user].
+
+    :param update: raw update
+    :type update: dict
+
+    :return: user id [0 if update is neither from the user nor from the chat, e.g. poll]
+    :rtype: int
+    """
+
+    for key, value in update.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+
+        user = value.get('from') or value.get('user')
+        if user:
+            return user['id']
+
+        chat = value.get('chat')
+        if chat:
+            return chat['id']
+
+    return 0
+
+
+def get_stream_name(shard: int) -> str:
+    """ Return name of the stream of the shard """
+    return f'{UPDATES_STREAM_PREFIX}:{shard}'
+
+
+async def create_redis() -> aioredis.Redis:
+    """ Create separate redis connection pool [worker blocks connection by reading] """
+    return await aioredis.create_redis_pool(
+        f'redis://{REDIS_CONFIG["host"] or "localhost"}:{REDIS_CONFIG["port"] or 6379}',
+        password=REDIS_CONFIG['password']
+    )
+
+
+# ingest ---------------------------------------------------------------------------------------------------------------
+async def run_updates_ingest(dp: DrainingDispatcher) -> None:
+    """
+    Receive updates by long polling and push them in the streams [until intake is stopped].
+    Offset is confirmed only after updates are pushed [updates are not lost if ingest crashes].
+
+    :param dp: bot dispatcher
+    :type dp: DrainingDispatcher
+
+    :return: None
+    :rtype: None
+    """
+
+    dp.register_intake_task(asyncio.current_task())
+
+    redis = await create_redis()
+    await dp.bot.delete_webhook()
+
+    logger.info(f'Updates ingest has been started [{UPDATES_STREAM_SHARDS} shards]')
+
+    offset: Optional[int] = None
+    request_timeout = aiohttp.ClientTimeout(total=POLLING_TIMEOUT_IN_SECONDS + 10)
+
+    try:
+        while not dp.intake_is_stopped:
+            try:
+                with dp.bot.request_timeout(request_timeout):
+                    updates = await dp.bot.request(
+                        'getUpdates', {'offset': offset, 'timeout': POLLING_TIMEOUT_IN_SECONDS}
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Updates have not been received')
+                await asyncio.sleep(1)
+                continue
+
+            if not updates:
+                continue
+
+            pipeline = redis.pipeline()
+            for update in updates:
+                shard = get_update_user_id(update) % UPDATES_STREAM_SHARDS
+                pipeline.xadd(
+                    get_stream_name(shard), {UPDATE_FIELD: json.dumps(update)},
+                    max_len=UPDATES_STREAM_MAX_LENGTH, exact_len=False
+                )
+            await pipeline.execute()
+
+            offset = updates[-1]['update_id'] + 1
+    finally:
+        redis.close()
+        await redis.wait_closed()
+# ----------------------------------------------------------------------------------------------------------------------
+
+
+# worker ---------------------------------------------------------------------------------------------------------------
+def check_worker_shards() -> None:
+    """
+    Check that own shards of the worker are assigned [before the start of the worker].
+
+    :return: None
+    :rtype: None
+
+    :raises ValueError: raised if shards are not assigned or they are not shards of the streams
+    """
+
+    if not WORKER_SHARDS:
+        raise ValueError(
+            'Worker run mode needs own shards of the updates streams: '
+            'set `WORKER_SHARDS` [e.g. 0,1,2,3] or `WORKER_INDEX` and `WORKER_COUNT`'
+        )
+
+    unknown_shards = [shard for shard in WORKER_SHARDS if not 0 <= shard < UPDATES_STREAM_SHARDS]
+    if unknown_shards:
+        raise ValueError(f'Unknown shards of the updates streams: <{unknown_shards}>')
+
+
+async def run_updates_worker(dp: DrainingDispatcher) -> None:
+    """
+    Consume own shards and process updates with the dispatcher [until intake is stopped].
+    Shards are checked by `check_worker_shards` before.
+
+    :param dp: bot dispatcher
+    :type dp: DrainingDispatcher
+
+    :return: None
+    :rtype: None
+    """
+
+    dp.register_intake_task(asyncio.current_task())
+
+    redis = await create_redis()
+    streams = [get_stream_name(shard) for shard in WORKER_SHARDS]
+    scheduler = _UserEntriesScheduler(dp, redis, max_in_flight=WORKER_MAX_IN_FLIGHT_UPDATES)
+
+    try:
+        await _create_consumer_groups(redis, streams)
+
+        logger.info(f'Updates worker <{WORKER_NAME}> has been started [shards: {WORKER_SHARDS}]')
+
+        # own pending updates [worker has crashed before acknowledgement]:
+        # read after the last read ones - pending updates that are being processed are returned again from `0`
+        latest_ids = ['0'] * len(streams)
+        while not dp.intake_is_stopped and (entries := await redis.xread_group(
+                UPDATES_CONSUMER_GROUP, WORKER_NAME, streams,
+                count=WORKER_BATCH_SIZE, latest_ids=latest_ids
+        )):
+            for stream, entry_id, _ in entries:
+                latest_ids[streams.index(stream.decode())] = entry_id.decode()
+            await scheduler.schedule(entries)
+
+        claimed_at = 0.0
+        while not dp.intake_is_stopped:
+            if time.monotonic() - claimed_at > WORKER_PENDING_IDLE_TIMEOUT_IN_MILLISECONDS / 1000 / 2:
+                await scheduler.schedule(await _claim_idle_entries(redis, streams))
+                claimed_at = time.monotonic()
+
+            entries = await redis.xread_group(
+                UPDATES_CONSUMER_GROUP, WORKER_NAME, streams,
+                timeout=WORKER_BLOCK_TIMEOUT_IN_MILLISECONDS, count=WORKER_BATCH_SIZE,
+                latest_ids=['>'] * len(streams)
+            )
+            await scheduler.schedule(entries)
+    finally:
+        # read updates have to be acknowledged before connection is closed
+        await scheduler.wait_processed()
+        redis.close()
+        await redis.wait_closed()
+
+
+async def _create_consumer_groups(redis: aioredis.Redis, streams: list[str]) -> None:
+    for stream in streams:
+        try:
+            await redis.xgroup_create(stream, UPDATES_CONSUMER_GROUP, latest_id='0', mkstream=True)
+        except aioredis.ReplyError as error:
+            # group already exists
+            if 'BUSYGROUP' not in str(error):
+                raise
+
+
+async def _claim_idle_entries(redis: aioredis.Redis, streams: list[str]) -> list[StreamEntry]:
+    claimed_entries: list[StreamEntry] = []
+
+    for stream in streams:
+        pending = await redis.xpending(stream, UPDATES_CONSUMER_GROUP, '-', '+', WORKER_BATCH_SIZE)
+        ids = [
+            entry_id for entry_id, consumer, idle_time, _ in pending
+            if consumer.decode() != WORKER_NAME and idle_time >= WORKER_PENDING_IDLE_TIMEOUT_IN_MILLISECONDS
+        ]
+        if not ids:
+            continue
+
+        claimed = await redis.xclaim(
+            stream, UPDATES_CONSUMER_GROUP, WORKER_NAME, WORKER_PENDING_IDLE_TIMEOUT_IN_MILLISECONDS, *ids
+        )
+        claimed_entries.extend((stream.encode(), entry_id, fields) for entry_id, fields in claimed)
+
+        logger.warning(f'{len(claimed)} pending updates of the stream <{stream}> have been claimed')
+
+    return claimed_entries
+
+
+class _UserEntriesScheduler:
+    """
+    Processes entries of the every user sequentially in own task [task lives while user has entries],
+    entries of the different users - concurrently. Task of the user is in-flight while it processes entries.
+    """
+
+    def __init__(self, dp: DrainingDispatcher, redis: aioredis.Redis, *, max_in_flight: int):
+        self.dp = dp
+        self.redis = redis
+
+        # user id: entries [stream, entry id, parsed update] that are waiting for the task of the user
+        self._queues: dict[int, collections.deque[tuple[bytes, bytes, Optional[dict[str, Any]]]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def schedule(self, entries: list[StreamEntry]) -> None:
+        """ Schedule entries [wait while the limit of the in-flight entries is reached] """
+        for stream, entry_id, fields in entries:
+            # entries of the deleted [trimmed] updates are returned without fields
+            update = json.loads(fields[UPDATE_FIELD.encode()]) if fields else None
+            user_id = get_update_user_id(update) if update else 0
+
+            await self._slots.acquire()
+
+            queue = self._queues.get(user_id)
+            if queue is None:
+                queue = self._queues[user_id] = collections.deque()
+                task = asyncio.create_task(self._process_user_entries(user_id, queue))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            queue.append((stream, entry_id, update))
+
+    async def wait_processed(self) -> None:
+        """ Wait until scheduled entries are processed """
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    async def _process_user_entries(self, user_id: int,
+                                    queue: collections.deque[tuple[bytes, bytes, Optional[dict[str, Any]]]]) -> None:
+        try:
+            async with self.dp.in_flight():
+                while queue:
+                    stream, entry_id, update = queue.popleft()
+                    try:
+                        await self._process_entry(stream, entry_id, update)
+                    except Exception:
+                        # not acknowledged entry is pending - it is processed again after restart
+                        logger.exception(f'Update <{entry_id.decode()}> of the stream <{stream.decode()}> '
+                                         f'has not been acknowledged')
+                    finally:
+                        self._slots.release()
+        finally:
+            del self._queues[user_id]
+
+    async def _process_entry(self, stream: bytes, entry_id: bytes, update: Optional[dict[str, Any]]) -> None:
+        if update is not None:
+            try:
+                # with update middlewares [as in long polling], in own task - own context of the update:
+                # state that `StateFilter` has cached for the previous update of the user is not reused
+                await asyncio.create_task(self.dp.updates_handler.notify(types.Update(**update)))
+            except Exception:
+                # update is acknowledged anyway - otherwise it is redelivered forever
+                logger.exception(f'Update <{entry_id.decode()}> of the stream <{stream.decode()}> has failed')
+
+        await self.redis.xack(stream, UPDATES_CONSUMER_GROUP, entry_id)
+# ----------------------------------------------------------------------------------------------------------------------
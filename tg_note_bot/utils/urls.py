@@ -0,0 +1,229 @@
+"""
+Contains extractor of the links from the message text.
+
+Links are taken from the entities Telegram has parsed [`url` and `text_link` ones].
+If there are no such entities [messages of the other clients, texts that Telegram has not parsed],
+text is tokenized by whitespaces and every token is checked by the string methods.
+Both ways are linear in the text length [no backtracking as `utils.regexp.url_regexp` has on the long garbage].
+
+Description of the link is:
+    * visible text of the `text_link` entity;
+    * text of the message without the link [the only one link in the message];
+    * text of the line without the links [several links in the message].
+
+.. def:: extract_links(text: Optional[str], entities: Optional[list[types.MessageEntity]] = None
+        ) -> list[ExtractedLink]
+.. def:: find_urls(text: str) -> list[FoundUrl]
+.. def:: is_url(token: str) -> bool
+
+.. class:: ExtractedLink(NamedTuple)
+.. class:: FoundUrl(NamedTuple)
+"""
+
+import re
+import string
+from typing import (
+    NamedTuple,
+    Optional
+)
+
+from aiogram import types
+
+
+__all__ = ['extract_links', 'find_urls', 'is_url', 'ExtractedLink', 'FoundUrl']
+
+
+URL_SCHEMES = ('http://', 'https://')
+# chars of the host with the user info and port [`user@host:port`]
+_HOST_CHARS = frozenset(string.ascii_letters + string.digits + '.-_@:')
+_LEADING_PUNCTUATION = '(["\'<{«'
+_TRAILING_PUNCTUATION = '.,;:!?)]"\'>}»'
+
+_TOKEN_PATTERN = re.compile(r'\S+')
+
+
+class FoundUrl(NamedTuple):
+    """ Url in the text [`start` and `end` - span of the visible text, `text` - the one of the `text_link`] """
+
+    url: str
+    start: int
+    end: int
+    text: Optional[str] = None
+
+
+class ExtractedLink(NamedTuple):
+    """ Link with its description """
+
+    url: str
+    description: Optional[str]
+
+
+def is_url(token: str) -> bool:
+    """
+    Check whether token is url: optional scheme, host with the top-level domain of 2-6 latin letters,
+    optional port and path.
+
+    :param token: token without whitespaces
+    :type token: str
+
+    :return: token is url
+    :rtype: bool
+    """
+
+    lowered = token[:8].lower()
+    for scheme in URL_SCHEMES:
+        if lowered.startswith(scheme):
+            token = token[len(scheme):]
+            break
+
+    host_end = len(token)
+    for separator in '/?#':
+        position = token.find(separator, 0, host_end)
+        if position != -1:
+            host_end = position
+
+    host = token[:host_end]
+    if not host or not _HOST_CHARS.issuperset(host):
+        return False
+
+    host = host.rpartition('@')[2]
+    host, colon, port = host.partition(':')
+    if colon and not port.isdigit():
+        return False
+
+    domain, dot, top_level_domain = host.rpartition('.')
+    return bool(domain) and bool(dot) and 2 <= len(top_level_domain) <= 6 and top_level_domain.isalpha()
+
+
+def _strip_punctuation(text: str, start: int, end: int) -> tuple[int, int]:
+    """ Return span of the token without the surrounding punctuation [closing bracket of the url is kept] """
+    while start < end and text[start] in _LEADING_PUNCTUATION:
+        start += 1
+
+    unclosed_brackets = text.count('(', start, end) - text.count(')', start, end)
+    while start < end and text[end - 1] in _TRAILING_PUNCTUATION:
+        if text[end - 1] == ')':
+            if unclosed_brackets >= 0:
+                break
+            unclosed_brackets += 1
+        end -= 1
+
+    return start, end
+
+
+def find_urls(text: str) -> list[FoundUrl]:
+    """
+    Find urls in the text by tokenizing.
+
+    :param text: text
+    :type text: str
+
+    :return: found urls in the order of the text
+    :rtype: list[FoundUrl]
+    """
+
+    urls = []
+    for match in _TOKEN_PATTERN.finditer(text):
+        start, end = _strip_punctuation(text, *match.span())
+        token = text[start:end]
+        if token and is_url(token):
+            urls.append(FoundUrl(token, start, end))
+
+    return urls
+
+
+def _find_urls_by_entities(text: str, entities: list[types.MessageEntity]) -> list[FoundUrl]:
+    """ Find urls by entities [offsets of the entities are in the UTF-16 code units] """
+    encoded_text = text.encode('utf-16-le')
+    # offset in the UTF-16 code units: index in the text [text has the astral chars - emoji, ...]
+    indexes: Optional[dict[int, int]] = None
+    if len(encoded_text) != len(text) * 2:
+        indexes, offset = {}, 0
+        for index, char in enumerate(text):
+            indexes[offset] = index
+            offset += 2 if ord(char) > 0xFFFF else 1
+        indexes[offset] = len(text)
+
+    urls = []
+    for entity in entities:
+        if entity.type not in (types.MessageEntityType.URL, types.MessageEntityType.TEXT_LINK):
+            continue
+
+        start, end = entity.offset, entity.offset + entity.length
+        if indexes is not None:
+            start, end = indexes.get(start), indexes.get(end)
+            if start is None or end is None:
+                continue
+
+        if entity.type == types.MessageEntityType.URL:
+            urls.append(FoundUrl(text[start:end], start, end))
+        else:
+            urls.append(FoundUrl(entity.url, start, end, text[start:end]))
+
+    urls.sort(key=lambda url: url.start)
+    return urls
+
+
+def _describe(text: str, urls: list[FoundUrl]) -> list[ExtractedLink]:
+    """ Describe urls by the text around them """
+    if len(urls) == 1 and urls[0].text is None:
+        url = urls[0]
+        description = (text[:url.start] + text[url.end:]).strip()
+        return [ExtractedLink(url.url, description or None)]
+
+    links, index = [], 0
+    while index < len(urls):
+        line_start = text.rfind('\n', 0, urls[index].start) + 1
+        line_end = text.find('\n', urls[index].end)
+        line_end = len(text) if line_end == -1 else line_end
+
+        # every line is described once: line without its urls
+        line_urls = []
+        while index < len(urls) and urls[index].start < line_end:
+            line_urls.append(urls[index])
+            index += 1
+
+        parts, position = [], line_start
+        for url in line_urls:
+            parts.append(text[position:url.start])
+            position = url.end
+        parts.append(text[position:line_end])
+        line_description = ''.join(parts).strip() or None
+
+        for url in line_urls:
+            if url.text is None:
+                links.append(ExtractedLink(url.url, line_description))
+            else:
+                description = url.text.strip()
+                links.append(ExtractedLink(url.url, description if description and description != url.url else None))
+
+    return links
+
+
+def extract_links(text: Optional[str], entities: Optional[list[types.MessageEntity]] = None) -> list[ExtractedLink]:
+    """
+    Extract all links with descriptions from the text [duplicated urls are dropped].
+
+    :param text: text or caption of the message
+    :type text: Optional[str]
+    :param entities: entities or caption entities of the message
+    :type entities: Optional[list[types.MessageEntity]]
+
+    :return: links in the order of the text
+    :rtype: list[ExtractedLink]
+    """
+
+    if not text:
+        return []
+
+    urls = _find_urls_by_entities(text, entities) if entities else []
+    if not urls:
+        urls = find_urls(text)
+
+    links, seen_urls = [], set()
+    for link in _describe(text, urls):
+        if link.url not in seen_urls:
+            seen_urls.add(link.url)
+            links.append(link)
+
+    return links
@@ -0,0 +1,169 @@
+"""
+Contains warm-up of the connections and statements on startup.
+
+Without warm-up the first users after restart pay for:
+    * TCP [and TLS] setup of the db and redis connections;
+    * SQLAlchemy compilation of the statements [compiled statements are cached by engine];
+    * preparing of the statements by postgres [asyncpg prepares statements per connection].
+So pool connections are opened concurrently and the hot statements are executed on every one
+for the synthetic users [writes are rolled back]. Cold and warm latency of the statements is logged.
+
+.. async:: warm_up(dp: Dispatcher) -> None
+.. async:: warm_up_db(connections: int) -> None
+.. async:: warm_up_redis(dp: Dispatcher) -> None
+
+.. const:: FIRST_WARM_UP_USER_ID
+"""
+
+import asyncio
+import logging
+import time
+from typing import (
+    Awaitable,
+    Callable
+)
+
+from aiogram import Dispatcher
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import db
+from ..db.models import (
+    Link,
+    Rubric,
+    User
+)
+from ..db.postgres import async_db_sessionmaker
+from ..settings import (
+    DB_WARM_UP_CONNECTIONS,
+    INLINE_QUERY_RESULTS_LIMIT
+)
+
+
+__all__ = ['warm_up', 'warm_up_db', 'warm_up_redis', 'FIRST_WARM_UP_USER_ID']
+
+
+logger = logging.getLogger(__name__)
+
+
+# telegram user ids are positive - synthetic users [one per connection] do not intersect with real ones,
+# so concurrent inserts are not locked by each other
+FIRST_WARM_UP_USER_ID = -1
+
+# (session, user id)
+HotStatement = Callable[[AsyncSession, int], Awaitable]
+
+
+async def _add_user_data(session: AsyncSession, user_id: int) -> None:
+    """ Flush inserts of the user, rubric and link [caller rolls them back] """
+    rubric = Rubric(name='warm-up', user_id=user_id)
+    session.add(User(id=user_id))
+    await session.flush()
+    session.add(rubric)
+    await session.flush()
+    session.add(Link(url='https://example.com', user_id=user_id, rubric_id=rubric.id))
+    await session.flush()
+
+
+# statements that are executed on the most of the updates [by handlers]
+HOT_STATEMENTS: dict[str, HotStatement] = {
+    'fetch_all_rubrics': lambda session, user_id: db.fetch_all_rubrics(session, user_id),
+    'fetch_all_rubrics_with_links': lambda session, user_id: db.fetch_all_rubrics(session, user_id, with_links=True),
+    'fetch_all_links': lambda session, user_id: db.fetch_all_links(session, user_id),
+    'fetch_all_links_grouped': lambda session, user_id: db.fetch_all_links(session, user_id, group_by_rubric=True),
+    'fetch_one_rubric': lambda session, user_id: db.fetch_one_rubric(session, 0),
+    'count_user_rubrics': lambda session, user_id: db.count_user_rubrics(session, user_id),
+    'does_rubric_have_unique_name': lambda session, user_id: db.does_rubric_have_unique_name(session, user_id, ''),
+    'search_links': lambda session, user_id: db.search_links(session, user_id, '', limit=INLINE_QUERY_RESULTS_LIMIT),
+    'add_user_rubric_link': _add_user_data
+}
+
+
+async def _execute_hot_statements(user_id: int, timings: dict[str, float]) -> None:
+    """ Execute hot statements in one session [one pool connection] and roll back """
+    async with async_db_sessionmaker() as session:
+        try:
+            for name, statement in HOT_STATEMENTS.items():
+                started_at = time.perf_counter()
+                await statement(session, user_id)
+                timings[name] = time.perf_counter() - started_at
+        finally:
+            await session.rollback()
+
+
+async def warm_up_db(connections: int) -> None:
+    """
+    Open pool connections concurrently and execute the hot statements on every one.
+
+    :param connections: quantity of the opened connections [up to the pool size]
+    :type connections: int
+
+    :return: None
+    :rtype: None
+    """
+
+    cold_timings: dict[str, float] = {}
+    started_at = time.perf_counter()
+    # sessions check out connections concurrently, so the pool opens the new ones
+    await asyncio.gather(
+        _execute_hot_statements(FIRST_WARM_UP_USER_ID, cold_timings),
+        *[_execute_hot_statements(FIRST_WARM_UP_USER_ID - number, {}) for number in range(1, connections)]
+    )
+    elapsed = time.perf_counter() - started_at
+
+    warm_timings: dict[str, float] = {}
+    await _execute_hot_statements(FIRST_WARM_UP_USER_ID, warm_timings)
+
+    logger.info(
+        f'Db has been warmed up in {elapsed * 1000:.1f} ms [{connections} connections], '
+        'statement latency cold -> warm: '
+        + ', '.join(
+            f'{name} {cold_timings[name] * 1000:.1f} -> {warm_timings[name] * 1000:.1f} ms' for name in HOT_STATEMENTS
+        )
+    )
+
+
+async def warm_up_redis(dp: Dispatcher) -> None:
+    """
+    Open connection of the FSM storage and ping redis.
+
+    :param dp: bot dispatcher
+    :type dp: Dispatcher
+
+    :return: None
+    :rtype: None
+    """
+
+    started_at = time.perf_counter()
+    redis = await dp.storage.redis()
+    await redis.ping()
+    cold_latency = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    await redis.ping()
+    warm_latency = time.perf_counter() - started_at
+
+    logger.info(f'Redis has been warmed up, ping latency cold -> warm: '
+                f'{cold_latency * 1000:.1f} -> {warm_latency * 1000:.1f} ms')
+
+
+async def warm_up(dp: Dispatcher) -> None:
+    """
+    Warm up db and redis before receiving of the updates.
+    Failed warm-up does not stop the bot [connections are opened on demand].
+
+    :param dp: bot dispatcher
+    :type dp: Dispatcher
+
+    :return: None
+    :rtype: None
+    """
+
+    warm_ups = [warm_up_db(DB_WARM_UP_CONNECTIONS)]
+    # FSM storage might be in-memory
+    if hasattr(dp.storage, 'redis'):
+        warm_ups.append(warm_up_redis(dp))
+
+    results = await asyncio.gather(*warm_ups, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error('Warm-up has failed', exc_info=result)
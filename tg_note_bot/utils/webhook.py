@@ -0,0 +1,95 @@
+"""
+Contains web application for the webhook mode.
+
+.. def:: create_web_app() -> web.Application
+.. async:: set_webhook(dp: Dispatcher) -> None
+
+.. const:: SECRET_TOKEN_HEADER
+"""
+
+import hmac
+import logging
+from typing import (
+    Awaitable,
+    Callable
+)
+
+from aiogram import Dispatcher
+from aiohttp import web
+
+from ..settings import (
+    HEALTH_CHECK_PATH,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET_TOKEN,
+    WEBHOOK_URL
+)
+
+
+__all__ = ['create_web_app', 'set_webhook', 'SECRET_TOKEN_HEADER']
+
+
+logger = logging.getLogger(__name__)
+
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+@web.middleware
+async def check_secret_token(request: web.Request, handler: Callable[[web.Request], Awaitable[web.StreamResponse]]
+                             ) -> web.StreamResponse:
+    """ Reject webhook requests without valid secret token [if secret token is set] """
+    if WEBHOOK_SECRET_TOKEN and request.path == WEBHOOK_PATH:
+        secret_token = request.headers.get(SECRET_TOKEN_HEADER, '')
+
+        if not hmac.compare_digest(secret_token.encode(), WEBHOOK_SECRET_TOKEN.encode()):
+            logger.warning(f'Webhook request with invalid secret token from <{request.remote}> has been rejected')
+            raise web.HTTPUnauthorized()
+
+    return await handler(request)
+
+
+async def health_check(request: web.Request) -> web.Response:
+    """ Answer that application is alive """
+    return web.json_response({'status': 'ok'})
+
+
+def create_web_app() -> web.Application:
+    """
+    Create web application with secret token checking and health check endpoint.
+    Webhook route is added by aiogram executor.
+
+    :return: web application
+    :rtype: web.Application
+
+    :raises ValueError: raised if webhook url is not configured [`WEBHOOK_HOST` is not set]
+    """
+
+    if WEBHOOK_URL is None:
+        raise ValueError('Webhook run mode needs public url of the bot: set `WEBHOOK_HOST` [e.g. https://example.com]')
+
+    app = web.Application(middlewares=[check_secret_token])
+    app.router.add_get(HEALTH_CHECK_PATH, health_check)
+
+    return app
+
+
+async def set_webhook(dp: Dispatcher) -> None:
+    """
+    Set webhook [with secret token if it is set].
+    Request is made directly, because `Bot.set_webhook` of the used aiogram version does not pass secret token.
+
+    :param dp: bot dispatcher
+    :type dp: Dispatcher
+
+    :return: None
+    :rtype: None
+    """
+
+    payload = {'url': WEBHOOK_URL}
+    if WEBHOOK_SECRET_TOKEN:
+        payload['secret_token'] = WEBHOOK_SECRET_TOKEN
+
+    await dp.bot.request('setWebhook', payload)
+
+    logger.info(f'Webhook has been set on <{WEBHOOK_URL}>')
+